@@ -1,13 +1,15 @@
 from enum import Enum, IntEnum
-from typing import List, Optional, Union
+from typing import Annotated, Any, FrozenSet, List, Optional, Tuple, Union
 
 import msgspec
 
 
-class StatusValue(msgspec.Struct):
+class StatusValue(msgspec.Struct, omit_defaults=True):
     key: str
     value: Optional[float]
     unit: str
+    # Set on a duty written by the bridge but not yet read back from the device.
+    pending: bool = False
 
 
 class MessageStatus(Enum):
@@ -20,21 +22,410 @@ class SpeedKwargs(msgspec.Struct):
     duty: int
 
 
-class FixedSpeedRequest(msgspec.Struct):
+class StatusFormat(Enum):
+    ROWS = "rows"
+    COLUMNAR = "columnar"
+
+
+class StatusSelector(msgspec.Struct, frozen=True):
+    """Projection of get.statuses; each given filter must match (None = all)."""
+
+    devices: Optional[FrozenSet[int]] = None
+    keys: Optional[FrozenSet[str]] = None
+    units: Optional[FrozenSet[str]] = None
+
+    def wants_device(self, device_id: int) -> bool:
+        return self.devices is None or device_id in self.devices
+
+    def filters_values(self) -> bool:
+        return self.keys is not None or self.units is not None
+
+    def wants_value(self, value: "StatusValue") -> bool:
+        return (self.keys is None or value.key in self.keys) and (
+            self.units is None or value.unit in self.units
+        )
+
+
+class RequestBase(msgspec.Struct, kw_only=True):
+    """Base of the tagged requests: the union decode also sees v1 "data".
+
+    A non-null data makes the message a v1 envelope, and the payload is then
+    decoded by its command's struct (see PipeRequest for the Raw default).
+    """
+
+    data: msgspec.Raw = msgspec.Raw(b"null")
+
+
+class GetStatusesRequest(RequestBase, tag="get.statuses", tag_field="command"):
+    select: Optional[StatusSelector] = None
+    format: StatusFormat = StatusFormat.ROWS
+    # Columnar only: scale values by 10**fixed_point and send them as integers.
+    fixed_point: Optional[int] = None
+    # Rows only: False drops description/speed_channels (see get.capabilities).
+    include_static: bool = True
+    # Serve cached values at most max_age seconds old without reading the device;
+    # older ones are refreshed, waiting at most timeout seconds before serving the
+    # stale cache. Without max_age every poll is a live read (timeout still caps it).
+    max_age: Optional[float] = None
+    timeout: Optional[float] = None
+
+
+class GetStatusSchemaRequest(RequestBase, tag="get.status_schema", tag_field="command"):
+    select: Optional[StatusSelector] = None
+
+
+class FixedSpeedRequest(RequestBase, tag="set.fixed_speed", tag_field="command"):
     device_id: int
     speed_kwargs: SpeedKwargs
+    # False acknowledges once the write is queued and returns a WriteResult
+    # ticket; the outcome is collected later with get.write_results.
+    wait: bool = True
+
+
+class FixedSpeedsRequest(RequestBase, tag="set.fixed_speeds", tag_field="command"):
+    """Several channels of one device, applied in a single device job."""
+
+    device_id: int
+    speeds: List[SpeedKwargs]
+    wait: bool = True
 
 
-class LedRequest(msgspec.Struct):
+# LED colour channels are validated on decode, before anything packs them.
+ColorChannel = Annotated[int, msgspec.Meta(ge=0, le=255)]
+Rgb = Tuple[ColorChannel, ColorChannel, ColorChannel]
+
+
+# A RequestBase only so that LedRequest can extend it: frames of a group ignore
+# "data" as they would any other unknown key.
+class LedFrame(RequestBase):
     # device is matched against each liquidctl device's description (the RGB
     # plugin targets devices by name, not by integer id).
     device: str
     channel: str
     mode: str
-    colors: List[List[int]]
+    # One [r, g, b] per LED, or the same packed as bytes (base64 in JSON) in rgb.
+    colors: List[Rgb] = []
+    rgb: Optional[bytes] = None
+    # Palette frame: one palette index per LED, packed as bytes.
+    palette: Optional[List[Rgb]] = None
+    indices: Optional[bytes] = None
+
+
+class LedRequest(LedFrame, tag="set.led", tag_field="command"):
+    # Delta frame: [index, r, g, b] changes to the channel's current frame.
+    delta: Optional[List[Tuple[int, ColorChannel, ColorChannel, ColorChannel]]] = None
+    wait: bool = True
+
+
+class LedGroupRequest(RequestBase, tag="set.led_group", tag_field="command"):
+    """Frames for several devices/channels, committed together."""
+
+    frames: List[LedFrame]
+    wait: bool = True
+
+
+class GetLedGroupsRequest(RequestBase, tag="get.led_groups", tag_field="command"):
+    pass
+
+
+class ColorTransform(msgspec.Struct):
+    """Colour correction applied to every frame; the defaults change nothing."""
+
+    # Scales every channel, 0.0-1.0.
+    brightness: float = 1.0
+    # Output = input ** gamma on the 0-1 scale; > 1 darkens the midtones.
+    gamma: float = 1.0
+    # White point in Kelvin; 6500 is neutral, lower is warmer.
+    temperature: Optional[float] = None
+    # Byte order the LEDs expect, e.g. "grb" for strips wired green-first.
+    channel_order: str = "rgb"
+
+
+class SetColorTransformRequest(
+    RequestBase, tag="set.color_transform", tag_field="command"
+):
+    device: str
+    transform: ColorTransform
+    # None sets the device default, used by channels without their own transform.
+    channel: Optional[str] = None
+
+
+class GetColorTransformsRequest(
+    RequestBase, tag="get.color_transforms", tag_field="command"
+):
+    pass
+
+
+class WritePolicy(msgspec.Struct):
+    """Write suppression for a duty channel; the defaults suppress nothing."""
+
+    # Changes smaller than this many duty points are held back.
+    min_delta: int = 0
+    # Extra points required when the change reverses direction.
+    hysteresis: int = 0
+    # Minimum seconds between two writes on the channel.
+    min_interval: float = 0.0
+    # A held value is written at most this many seconds later.
+    max_delay: float = 2.0
+    # Device-wide token bucket (device default policy only); None = unlimited.
+    max_writes_per_second: Optional[float] = None
+    burst: int = 1
+
+
+class SetWritePolicyRequest(RequestBase, tag="set.write_policy", tag_field="command"):
+    device_id: int
+    policy: WritePolicy
+    # None sets the device default, used by channels without their own policy.
+    channel: Optional[str] = None
+
+
+class GetWriteStatsRequest(RequestBase, tag="get.write_stats", tag_field="command"):
+    pass
+
+
+class GetWriteResultsRequest(RequestBase, tag="get.write_results", tag_field="command"):
+    pass
+
+
+class FanCurve(msgspec.Struct):
+    """Duty of a channel as a function of a temperature reading."""
+
+    device_id: int
+    channel: str
+    source_key: str
+    # (temperature, duty) points, interpolated linearly and clamped at the ends.
+    points: List[Tuple[float, int]]
+    # Device providing source_key; None = the controlled device itself.
+    source_device_id: Optional[int] = None
+    # Temperature change (degrees) needed before the duty is re-evaluated.
+    hysteresis: float = 0.0
+    # Time constant (seconds) of the lag applied to the temperature.
+    response_time: float = 0.0
+
+
+class SetCurveRequest(RequestBase, tag="set.curve", tag_field="command"):
+    curve: FanCurve
+
+
+class ClearCurveRequest(RequestBase, tag="clear.curve", tag_field="command"):
+    device_id: int
+    channel: str
+
+
+class SpeedProfileRequest(RequestBase, tag="set.speed_profile", tag_field="command"):
+    """Run a curve in device firmware, or in the bridge where that is unsupported."""
+
+    device_id: int
+    channel: str
+    # (temperature, duty) points; firmware profiles follow the device's own
+    # liquid temperature sensor.
+    profile: List[Tuple[float, int]]
+    # Input of the bridge-side fallback curve.
+    source_key: str = "Liquid temperature"
+
+
+class GetCurvesRequest(RequestBase, tag="get.curves", tag_field="command"):
+    pass
+
+
+class VirtualSensor(msgspec.Struct):
+    """A sensor computed by the bridge and published with a device's statuses."""
+
+    device_id: int
+    # Key of the published StatusValue.
+    name: str
+    unit: str
+    # Arithmetic over readings: {key} is a key of this device, {#2:key} one of
+    # device 2. Supports + - * /, numbers and min(), max(), avg(), abs().
+    expression: str
+    # Calibration, applied first: value * scale + offset.
+    scale: float = 1.0
+    offset: float = 0.0
+    # Filters, applied in this order; None skips one.
+    median: Optional[int] = None  # Median of the last N values
+    ema: Optional[float] = None  # Exponential smoothing, time constant in s
+    slew: Optional[float] = None  # Max change per second
+
+
+class SetVirtualSensorRequest(
+    RequestBase, tag="set.virtual_sensor", tag_field="command"
+):
+    sensor: VirtualSensor
+
+
+class ClearVirtualSensorRequest(
+    RequestBase, tag="clear.virtual_sensor", tag_field="command"
+):
+    device_id: int
+    name: str
+
+
+class GetVirtualSensorsRequest(
+    RequestBase, tag="get.virtual_sensors", tag_field="command"
+):
+    pass
+
+
+class AlarmCondition(Enum):
+    ABOVE = "above"  # raised while the reading is > threshold
+    BELOW = "below"  # raised while the reading is < threshold
+
+
+class AlarmRule(msgspec.Struct):
+    """A threshold on one reading, evaluated on every sample of its device."""
+
+    name: str
+    device_id: int
+    key: str
+    condition: AlarmCondition
+    threshold: float
+    # How far back past the threshold the reading must go before the alarm clears.
+    hysteresis: float = 0.0
+    # Seconds a change must persist before the alarm raises or clears.
+    debounce: float = 0.0
+
+
+class SetAlarmRequest(RequestBase, tag="set.alarm", tag_field="command"):
+    rule: AlarmRule
+
+
+class ClearAlarmRequest(RequestBase, tag="clear.alarm", tag_field="command"):
+    name: str
+
+
+class GetAlarmsRequest(RequestBase, tag="get.alarms", tag_field="command"):
+    pass
+
+
+class GetAlarmEventsRequest(RequestBase, tag="get.alarm_events", tag_field="command"):
+    # Only events with a larger seq; pass the last seq seen.
+    after: int = 0
+    # Seconds to wait for a new event when there is none yet (0 = answer now).
+    wait: float = 0.0
+
+
+class GetMetricsRequest(RequestBase, tag="get.metrics", tag_field="command"):
+    # Start the histograms and counters over after reading them.
+    reset: bool = False
+
+
+class HistoryLimits(msgspec.Struct):
+    """Bounds of the in-memory sensor history (16 bytes per sample kept)."""
+
+    # Samples kept per (device, key); older ones are overwritten.
+    capacity: int = 3600
+    # Series tracked at most; keys first seen beyond this are not recorded.
+    max_series: int = 256
+
+
+class SetHistoryLimitsRequest(
+    RequestBase, tag="set.history_limits", tag_field="command"
+):
+    limits: HistoryLimits
+
+
+class GetHistoryRequest(RequestBase, tag="get.history", tag_field="command"):
+    device_id: int
+    # None returns every recorded key of the device.
+    keys: Optional[List[str]] = None
+    # Time range, in seconds before now.
+    since: float = 300.0
+    until: float = 0.0
+    # Bucket width in seconds; None returns the raw samples.
+    resolution: Optional[float] = None
+
+
+class EffectKind(Enum):
+    GRADIENT = "gradient"  # colors spread across the LEDs
+    ROTATE = "rotate"  # the gradient, wrapped and turning once per period
+    BREATHE = "breathe"  # the gradient fading in and out once per period
+    KEYFRAMES = "keyframes"  # keyframes blended in turn over one period
+    TEMPERATURE = "temperature"  # one color picked from colors by a reading
+
+
+class LedEffect(msgspec.Struct):
+    """Declarative LED effect rendered by the bridge."""
+
+    device: str
+    channel: str
+    kind: EffectKind
+    leds: int
+    colors: List[Rgb] = []
+    # KEYFRAMES: each keyframe is one color for all LEDs or one per LED.
+    keyframes: List[List[Rgb]] = []
+    mode: str = "super-fixed"
+    period: float = 4.0
+    # Target rate; lowered automatically while the device cannot keep up.
+    fps: float = 30.0
+    # TEMPERATURE: reading mapped from low (first color) to high (last color).
+    source_key: str = "Liquid temperature"
+    source_device_id: Optional[int] = None
+    low: float = 25.0
+    high: float = 45.0
+
+
+class SetEffectRequest(RequestBase, tag="set.effect", tag_field="command"):
+    effect: LedEffect
+
+
+class ClearEffectRequest(RequestBase, tag="clear.effect", tag_field="command"):
+    device: str
+    channel: str
+
+
+class GetEffectsRequest(RequestBase, tag="get.effects", tag_field="command"):
+    pass
+
+
+class GetLedStatsRequest(RequestBase, tag="get.led_stats", tag_field="command"):
+    pass
+
+
+class GetCapabilitiesRequest(RequestBase, tag="get.capabilities", tag_field="command"):
+    pass
+
+
+# Requests are tagged on "command" so a v2 message ({"command": ..., <fields>})
+# is validated and decoded into its concrete struct in a single pass. The same
+# structs also decode a v1 "data" payload, where the tag is simply absent.
+Request = Union[
+    GetStatusesRequest,
+    GetStatusSchemaRequest,
+    GetCapabilitiesRequest,
+    GetWriteResultsRequest,
+    GetWriteStatsRequest,
+    GetCurvesRequest,
+    GetLedStatsRequest,
+    GetEffectsRequest,
+    FixedSpeedRequest,
+    FixedSpeedsRequest,
+    SetCurveRequest,
+    ClearCurveRequest,
+    SpeedProfileRequest,
+    SetWritePolicyRequest,
+    LedRequest,
+    LedGroupRequest,
+    GetLedGroupsRequest,
+    SetEffectRequest,
+    ClearEffectRequest,
+    SetColorTransformRequest,
+    GetColorTransformsRequest,
+    GetHistoryRequest,
+    SetHistoryLimitsRequest,
+    SetVirtualSensorRequest,
+    ClearVirtualSensorRequest,
+    GetVirtualSensorsRequest,
+    SetAlarmRequest,
+    ClearAlarmRequest,
+    GetAlarmsRequest,
+    GetAlarmEventsRequest,
+    GetMetricsRequest,
+]
 
 
 class PipeRequest(msgspec.Struct):
+    """v1 envelope: the payload is nested under "data" and decoded per command."""
+
     command: str
     # Decoded per-command (each command has its own payload shape). Kept as a
     # bare Raw, not Optional[Raw]: msgspec drops the Raw arm of Optional[Raw] and
@@ -42,9 +433,17 @@ class PipeRequest(msgspec.Struct):
     data: msgspec.Raw = msgspec.Raw(b"null")
 
 
+class BareCommand(msgspec.Struct, forbid_unknown_fields=True):
+    """A message with a command and no other field."""
+
+    command: str
+
+
 class BridgeResponse(msgspec.Struct):
     status: MessageStatus
-    data: Optional[Union[List["DeviceStatus"], str]] = None
+    # Whatever the command's handler returns: status rows, columnar rows, stats,
+    # schemas, history series, a text exposition or None.
+    data: Any = None
     error: Optional[str] = None
 
 
@@ -61,6 +460,219 @@ class DeviceStatus(msgspec.Struct):
     description: str
     status: List[StatusValue]
     speed_channels: List[str] = []
+    # Seconds since the values were read from the device.
+    age: Optional[float] = None
+
+
+class WriteStatus(Enum):
+    QUEUED = "queued"
+    UNCHANGED = "unchanged"  # Value already applied, nothing was written
+    DEFERRED = "deferred"  # Held by the write policy, written within max_delay
+    SUCCESS = "success"
+    SUPERSEDED = "superseded"  # Replaced by a newer write before it started
+    TIMEOUT = "timeout"
+    ERROR = "error"
+
+
+class WriteResult(msgspec.Struct):
+    ticket: int
+    device_id: int
+    operation: str
+    status: WriteStatus
+    error: Optional[str] = None
+    # Seconds from queueing to completion.
+    latency: Optional[float] = None
+
+
+class WriteStats(msgspec.Struct):
+    device_id: int
+    channel: str
+    applied: int = 0  # Writes sent to the device (including flushes)
+    deferred: int = 0  # Requests held back by the write policy
+    flushed: int = 0  # Held values written once their delay expired
+
+
+class LedChannelStats(msgspec.Struct):
+    device_id: int
+    channel: str
+    received: int = 0  # Frames submitted with set.led
+    applied: int = 0  # Frames written to the device
+    identical: int = 0  # Dropped: same mode and colors as the current frame
+    superseded: int = 0  # Dropped: replaced by a newer frame before it started
+    failed: int = 0
+    fps: float = 0.0  # Frames applied per second, over the last 2 seconds
+
+
+class ColorTransformState(msgspec.Struct):
+    device_id: int
+    channel: Optional[str]
+    transform: ColorTransform
+
+
+class LedGroupResult(msgspec.Struct):
+    group: int
+    device_ids: List[int]
+    # False if a device missed the sync point (busy queue) and wrote late.
+    synced: bool = True
+    # Seconds between the first and the last device starting its write.
+    skew: Optional[float] = None
+    errors: List[str] = []
+    done: bool = False  # False while some device has not written yet
+
+
+class EffectState(msgspec.Struct):
+    effect: LedEffect
+    device_id: int
+    fps: float  # Current frame rate (target, or lower while backing off)
+    frames: int = 0  # Frames queued for the device (repeats excluded)
+    skipped: int = 0  # Frames skipped because the previous one was still queued
+
+
+class CurveState(msgspec.Struct):
+    curve: FanCurve
+    temperature: Optional[float] = None  # Smoothed input of the last evaluation
+    duty: Optional[int] = None  # Last duty decided by the curve
+    evaluations: int = 0
+    writes: int = 0
+    # Seconds from the sample being stored to its duty write being queued.
+    decision_latency: Optional[float] = None
+    max_decision_latency: Optional[float] = None
+
+
+class VirtualSensorState(msgspec.Struct):
+    sensor: VirtualSensor
+    value: Optional[float] = None  # Last published value
+    evaluations: int = 0
+
+
+class AlarmState(msgspec.Struct):
+    rule: AlarmRule
+    active: bool = False
+    value: Optional[float] = None  # Last reading evaluated
+    raised: int = 0  # Times the alarm was raised
+
+
+class AlarmEvent(msgspec.Struct):
+    """An alarm being raised (active) or cleared."""
+
+    seq: int
+    name: str
+    device_id: int
+    key: str
+    active: bool
+    value: float
+    time: float  # Unix time of the sample that changed the state
+
+
+class LatencySummary(msgspec.Struct):
+    """Latency distribution in seconds; percentiles are at most ~9% high."""
+
+    count: int = 0
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+
+
+class OperationMetrics(msgspec.Struct):
+    device_id: int
+    operation: str  # get_status, set_fixed_speed, set_color, connect, ...
+    queue_wait: LatencySummary  # From submission to the worker picking it up
+    driver: LatencySummary  # Running on the worker (USB/HID I/O)
+    errors: int = 0
+
+
+class CommandMetrics(msgspec.Struct):
+    command: str
+    decode: LatencySummary
+    handle: LatencySummary
+    encode: LatencySummary
+    errors: int = 0
+
+
+class DeviceMetrics(msgspec.Struct):
+    device_id: int
+    queue_depth: int = 0  # Jobs waiting now (approximate)
+    max_queue_depth: int = 0  # Most jobs seen waiting at a submission
+    timeouts: int = 0  # Waits for a device job that timed out
+    cache_fallbacks: int = 0  # Status reads answered from cache after a failure
+
+
+class BridgeMetrics(msgspec.Struct):
+    uptime: float  # Seconds since the counters (re)started
+    devices: List[DeviceMetrics]
+    operations: List[OperationMetrics]
+    commands: List[CommandMetrics]
+
+
+class HistorySeries(msgspec.Struct):
+    """One key's samples (or buckets) over a time range, oldest first."""
+
+    device_id: int
+    key: str
+    unit: str
+    # Seconds before now of each sample, or of each bucket's start.
+    ages: List[float] = []
+    # The samples, or the mean of each bucket.
+    values: List[float] = []
+    # Per-bucket extremes; None for raw samples.
+    min: Optional[List[float]] = None
+    max: Optional[List[float]] = None
+
+
+class ProfileTarget(Enum):
+    FIRMWARE = "firmware"  # Stored in the device, no further writes needed
+    BRIDGE = "bridge"  # Driver lacks profile support; run as a bridge fan curve
+
+
+class SpeedProfileResult(msgspec.Struct):
+    device_id: int
+    channel: str
+    target: ProfileTarget
+
+
+class DeviceValues(msgspec.Struct):
+    """DeviceStatus without the static fields, for clients caching capabilities."""
+
+    id: int
+    status: List[StatusValue]
+    age: Optional[float] = None
+
+
+class DeviceCapabilities(msgspec.Struct):
+    """Static per-device metadata; only changes when the inventory does."""
+
+    id: int
+    description: str
+    driver: str
+    vendor_id: Optional[int]
+    product_id: Optional[int]
+    speed_channels: List[str]
+    color_channels: List[str]
+    color_modes: List[str]
+    # True if set.speed_profile can store curves in the device firmware.
+    speed_profiles: bool = False
+    led_count: Optional[int] = None
+    mled_count: Optional[int] = None
+
+
+class DeviceSchema(msgspec.Struct):
+    """Ordered key/unit layout of a device's status, identified by schema_id."""
+
+    id: int
+    schema_id: int
+    keys: List[str]
+    units: List[str]
+
+
+class ColumnarStatus(msgspec.Struct, array_like=True):
+    """Compact status row: ``[id, schema_id, [values...]]`` in schema order."""
+
+    id: int
+    schema_id: int
+    values: List[Optional[Union[int, float]]]
+    age: Optional[float] = None
 
 
 class Mode(IntEnum):
@@ -4,56 +4,386 @@ import os
 import sys
 import threading
 import time
-from typing import Any, Callable, Dict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import msgspec
 
 from liquidctl_server.models import (
     BadRequestException,
+    BareCommand,
     BridgeResponse,
+    ClearAlarmRequest,
+    ClearCurveRequest,
+    ClearEffectRequest,
+    ClearVirtualSensorRequest,
     FixedSpeedRequest,
+    FixedSpeedsRequest,
+    GetAlarmEventsRequest,
+    GetAlarmsRequest,
+    GetCapabilitiesRequest,
+    GetColorTransformsRequest,
+    GetCurvesRequest,
+    GetEffectsRequest,
+    GetHistoryRequest,
+    GetLedGroupsRequest,
+    GetLedStatsRequest,
+    GetMetricsRequest,
+    GetStatusesRequest,
+    GetStatusSchemaRequest,
+    GetVirtualSensorsRequest,
+    GetWriteResultsRequest,
+    GetWriteStatsRequest,
+    LedFrame,
+    LedGroupRequest,
     LedRequest,
     MessageStatus,
     PipeError,
     PipeRequest,
+    Request,
+    SetAlarmRequest,
+    SetColorTransformRequest,
+    SetCurveRequest,
+    SetEffectRequest,
+    SetHistoryLimitsRequest,
+    SetVirtualSensorRequest,
+    SetWritePolicyRequest,
+    SpeedProfileRequest,
+    StatusFormat,
 )
 from liquidctl_server.pipe_server import Server
 from liquidctl_server.service import LiquidctlService
+from liquidctl_server.service.config import journal_path
+from liquidctl_server.service.journal import export_csv
 
 logger = logging.getLogger(__name__)
 
 
-def _decode_data(data: msgspec.Raw, type_, command: str):
-    if data is None or bytes(data) == b"null":
-        raise BadRequestException(f"Missing data for {command}")
-    return msgspec.json.decode(data, type=type_)
+def handle_get_statuses(service: LiquidctlService, request: GetStatusesRequest) -> Any:
+    if request.format is StatusFormat.COLUMNAR:
+        return service.get_statuses_columnar(
+            fixed_point=request.fixed_point,
+            select=request.select,
+            max_age=request.max_age,
+            timeout=request.timeout,
+        )
+    return service.get_statuses(
+        include_static=request.include_static,
+        select=request.select,
+        max_age=request.max_age,
+        timeout=request.timeout,
+    )
+
 
+def handle_get_status_schema(
+    service: LiquidctlService, request: GetStatusSchemaRequest
+) -> Any:
+    return service.get_status_schema(request.select)
 
-def handle_get_statuses(service: LiquidctlService, data: msgspec.Raw) -> Any:
-    return service.get_statuses()
 
+def handle_get_capabilities(
+    service: LiquidctlService, request: GetCapabilitiesRequest
+) -> Any:
+    return service.get_capabilities()
 
-def handle_set_fixed_speed(service: LiquidctlService, data: msgspec.Raw) -> Any:
-    request = _decode_data(data, FixedSpeedRequest, "set.fixed_speed")
+
+def handle_set_fixed_speed(
+    service: LiquidctlService, request: FixedSpeedRequest
+) -> Any:
     speed_kwargs = {
         "channel": request.speed_kwargs.channel,
         "duty": request.speed_kwargs.duty,
     }
-    return service.set_fixed_speed(request.device_id, speed_kwargs)
+    return service.set_fixed_speed(request.device_id, speed_kwargs, wait=request.wait)
+
+
+def handle_set_fixed_speeds(
+    service: LiquidctlService, request: FixedSpeedsRequest
+) -> Any:
+    # A channel listed twice takes its last duty.
+    speeds = {speed.channel: speed.duty for speed in request.speeds}
+    return service.set_fixed_speeds(request.device_id, speeds, wait=request.wait)
+
+
+def handle_set_speed_profile(
+    service: LiquidctlService, request: SpeedProfileRequest
+) -> Any:
+    return service.set_speed_profile(
+        request.device_id, request.channel, request.profile, request.source_key
+    )
+
+
+def _unpack_rgb(rgb: bytes) -> List[Tuple[int, int, int]]:
+    """Split packed RGB bytes into per-LED triples without a Python-level loop.
+
+    Drivers unpack each colour as ``r, g, b``, so triples are the cheapest form
+    they accept; iterating the bytes directly beats a memoryview here.
+    """
+    if len(rgb) % 3:
+        raise BadRequestException(f"rgb length {len(rgb)} is not a multiple of 3")
+    channels = iter(rgb)
+    return list(zip(channels, channels, channels))
+
+
+def _expand_palette(
+    palette: List[Tuple[int, int, int]], indices: Optional[bytes]
+) -> List[Tuple[int, int, int]]:
+    if indices is None:
+        raise BadRequestException("A palette frame needs indices")
+    try:
+        return list(map(palette.__getitem__, indices))
+    except IndexError:
+        raise BadRequestException(
+            f"Palette index out of range ({len(palette)} colors)"
+        ) from None
+
+
+def _frame_colors(frame: LedFrame) -> List[Tuple[int, int, int]]:
+    if frame.rgb is not None:
+        return _unpack_rgb(frame.rgb)
+    if frame.palette is not None:
+        return _expand_palette(frame.palette, frame.indices)
+    return frame.colors
+
+
+def handle_set_led(service: LiquidctlService, request: LedRequest) -> Any:
+    if request.delta is not None:
+        return service.update_color(
+            request.device,
+            request.channel,
+            request.mode,
+            request.delta,
+            wait=request.wait,
+        )
+    return service.set_color(
+        request.device,
+        request.channel,
+        request.mode,
+        _frame_colors(request),
+        wait=request.wait,
+    )
+
+
+def handle_set_led_group(service: LiquidctlService, request: LedGroupRequest) -> Any:
+    frames = [
+        (frame.device, frame.channel, frame.mode, _frame_colors(frame))
+        for frame in request.frames
+    ]
+    return service.set_color_group(frames, wait=request.wait)
+
+
+def handle_get_led_groups(
+    service: LiquidctlService, request: GetLedGroupsRequest
+) -> Any:
+    return service.get_led_groups()
+
+
+def handle_set_effect(service: LiquidctlService, request: SetEffectRequest) -> Any:
+    return service.set_effect(request.effect)
+
+
+def handle_clear_effect(service: LiquidctlService, request: ClearEffectRequest) -> Any:
+    return service.clear_effect(request.device, request.channel)
+
+
+def handle_get_effects(service: LiquidctlService, request: GetEffectsRequest) -> Any:
+    return service.get_effects()
+
+
+def handle_get_led_stats(service: LiquidctlService, request: GetLedStatsRequest) -> Any:
+    return service.get_led_stats()
+
+
+def handle_set_color_transform(
+    service: LiquidctlService, request: SetColorTransformRequest
+) -> Any:
+    return service.set_color_transform(
+        request.device, request.channel, request.transform
+    )
+
+
+def handle_get_color_transforms(
+    service: LiquidctlService, request: GetColorTransformsRequest
+) -> Any:
+    return service.get_color_transforms()
+
+
+def handle_get_history(service: LiquidctlService, request: GetHistoryRequest) -> Any:
+    return service.get_history(
+        request.device_id,
+        keys=request.keys,
+        since=request.since,
+        until=request.until,
+        resolution=request.resolution,
+    )
+
+
+def handle_set_history_limits(
+    service: LiquidctlService, request: SetHistoryLimitsRequest
+) -> Any:
+    return service.set_history_limits(request.limits)
+
+
+def handle_set_virtual_sensor(
+    service: LiquidctlService, request: SetVirtualSensorRequest
+) -> Any:
+    return service.set_virtual_sensor(request.sensor)
+
+
+def handle_clear_virtual_sensor(
+    service: LiquidctlService, request: ClearVirtualSensorRequest
+) -> Any:
+    return service.clear_virtual_sensor(request.device_id, request.name)
+
+
+def handle_get_virtual_sensors(
+    service: LiquidctlService, request: GetVirtualSensorsRequest
+) -> Any:
+    return service.get_virtual_sensors()
 
 
-def handle_set_led(service: LiquidctlService, data: msgspec.Raw) -> Any:
-    request = _decode_data(data, LedRequest, "set.led")
-    colors = [tuple(color) for color in request.colors]
-    return service.set_color(request.device, request.channel, request.mode, colors)
+def handle_set_alarm(service: LiquidctlService, request: SetAlarmRequest) -> Any:
+    return service.set_alarm(request.rule)
 
 
-COMMAND_HANDLERS: Dict[str, Callable] = {
-    "get.statuses": handle_get_statuses,
-    "set.fixed_speed": handle_set_fixed_speed,
-    "set.led": handle_set_led,
+def handle_clear_alarm(service: LiquidctlService, request: ClearAlarmRequest) -> Any:
+    return service.clear_alarm(request.name)
+
+
+def handle_get_alarms(service: LiquidctlService, request: GetAlarmsRequest) -> Any:
+    return service.get_alarms()
+
+
+def handle_get_alarm_events(
+    service: LiquidctlService, request: GetAlarmEventsRequest
+) -> Any:
+    return service.get_alarm_events(after=request.after, wait=request.wait)
+
+
+def handle_get_metrics(service: LiquidctlService, request: GetMetricsRequest) -> Any:
+    return service.get_metrics(reset=request.reset)
+
+
+def handle_set_write_policy(
+    service: LiquidctlService, request: SetWritePolicyRequest
+) -> Any:
+    return service.set_write_policy(request.device_id, request.channel, request.policy)
+
+
+def handle_get_write_stats(
+    service: LiquidctlService, request: GetWriteStatsRequest
+) -> Any:
+    return service.get_write_stats()
+
+
+def handle_get_write_results(
+    service: LiquidctlService, request: GetWriteResultsRequest
+) -> Any:
+    return service.get_write_results()
+
+
+def handle_set_curve(service: LiquidctlService, request: SetCurveRequest) -> Any:
+    return service.set_curve(request.curve)
+
+
+def handle_clear_curve(service: LiquidctlService, request: ClearCurveRequest) -> Any:
+    return service.clear_curve(request.device_id, request.channel)
+
+
+def handle_get_curves(service: LiquidctlService, request: GetCurvesRequest) -> Any:
+    return service.get_curves()
+
+
+COMMAND_HANDLERS: Dict[type, Callable] = {
+    GetStatusesRequest: handle_get_statuses,
+    GetStatusSchemaRequest: handle_get_status_schema,
+    GetCapabilitiesRequest: handle_get_capabilities,
+    FixedSpeedRequest: handle_set_fixed_speed,
+    FixedSpeedsRequest: handle_set_fixed_speeds,
+    SpeedProfileRequest: handle_set_speed_profile,
+    LedRequest: handle_set_led,
+    LedGroupRequest: handle_set_led_group,
+    GetLedGroupsRequest: handle_get_led_groups,
+    GetLedStatsRequest: handle_get_led_stats,
+    SetColorTransformRequest: handle_set_color_transform,
+    GetColorTransformsRequest: handle_get_color_transforms,
+    GetHistoryRequest: handle_get_history,
+    SetHistoryLimitsRequest: handle_set_history_limits,
+    SetVirtualSensorRequest: handle_set_virtual_sensor,
+    ClearVirtualSensorRequest: handle_clear_virtual_sensor,
+    GetVirtualSensorsRequest: handle_get_virtual_sensors,
+    SetAlarmRequest: handle_set_alarm,
+    ClearAlarmRequest: handle_clear_alarm,
+    GetAlarmsRequest: handle_get_alarms,
+    GetAlarmEventsRequest: handle_get_alarm_events,
+    GetMetricsRequest: handle_get_metrics,
+    SetEffectRequest: handle_set_effect,
+    ClearEffectRequest: handle_clear_effect,
+    GetEffectsRequest: handle_get_effects,
+    GetWriteResultsRequest: handle_get_write_results,
+    SetWritePolicyRequest: handle_set_write_policy,
+    GetWriteStatsRequest: handle_get_write_stats,
+    SetCurveRequest: handle_set_curve,
+    ClearCurveRequest: handle_clear_curve,
+    GetCurvesRequest: handle_get_curves,
 }
 
+REQUEST_TYPES: Dict[str, type] = {
+    request_type.__struct_config__.tag: request_type
+    for request_type in COMMAND_HANDLERS
+}
+
+_REQUEST_DECODER = msgspec.json.Decoder(Request)
+_ENVELOPE_DECODER = msgspec.json.Decoder(PipeRequest)
+_BARE_COMMAND_DECODER = msgspec.json.Decoder(BareCommand)
+_PAYLOAD_DECODERS: Dict[str, msgspec.json.Decoder] = {
+    command: msgspec.json.Decoder(request_type)
+    for command, request_type in REQUEST_TYPES.items()
+}
+_NULL = msgspec.Raw(b"null")
+
+
+def _decode_request(raw_msg: bytes) -> Any:
+    """Decode a request in one pass of the tagged union.
+
+    A non-null "data" makes the message a v1 envelope, whose payload is then
+    read by its command's decoder. The union rejects an envelope whose command
+    has required fields (they are inside data), so those go through
+    _decode_envelope.
+    """
+    try:
+        request = _REQUEST_DECODER.decode(raw_msg)
+    except msgspec.ValidationError as e:
+        return _decode_envelope(raw_msg, e)
+    if request.data != _NULL:
+        return _PAYLOAD_DECODERS[request.__struct_config__.tag].decode(request.data)
+    return request
+
+
+def _decode_envelope(raw_msg: bytes, error: msgspec.ValidationError) -> Any:
+    """Decode a message the union rejected as a v1 envelope, else raise error."""
+    try:
+        envelope = _ENVELOPE_DECODER.decode(raw_msg)
+    except msgspec.ValidationError:
+        raise error from None
+    decoder = _PAYLOAD_DECODERS.get(envelope.command)
+    if decoder is None:
+        raise BadRequestException(f"Unknown command: {envelope.command}") from None
+    if envelope.data != _NULL:
+        return decoder.decode(envelope.data)
+    if _is_bare_command(raw_msg):
+        raise BadRequestException(f"Missing data for {envelope.command}") from None
+    raise error  # Fields were given but do not validate
+
+
+def _is_bare_command(raw_msg: bytes) -> bool:
+    """Whether the message holds nothing but its command (a v1 without data)."""
+    try:
+        _BARE_COMMAND_DECODER.decode(raw_msg)
+    except msgspec.ValidationError:
+        return False
+    return True
+
 
 def setup_logging(log_level: str = "INFO") -> None:
     logging.basicConfig(
@@ -65,14 +395,14 @@ def setup_logging(log_level: str = "INFO") -> None:
 
 def process_request(raw_msg: bytes, service: LiquidctlService) -> bytes:
     """Decodes JSON, runs logic, and returns JSON."""
+    command = "invalid"  # Until the request decodes
+    started = time.perf_counter()
+    decoded: Optional[float] = None
     try:
-        request = msgspec.json.decode(raw_msg, type=PipeRequest)
-
-        handler = COMMAND_HANDLERS.get(request.command)
-        if not handler:
-            raise BadRequestException(f"Unknown command: {request.command}")
-
-        result = handler(service, request.data)
+        request = _decode_request(raw_msg)
+        command = request.__struct_config__.tag
+        decoded = time.perf_counter()
+        result = COMMAND_HANDLERS[type(request)](service, request)
         response = BridgeResponse(status=MessageStatus.SUCCESS, data=result)
 
     except (msgspec.DecodeError, msgspec.ValidationError) as e:
@@ -91,7 +421,16 @@ def process_request(raw_msg: bytes, service: LiquidctlService) -> bytes:
             status=MessageStatus.ERROR, error=f"Internal Error: {e}"
         )
 
-    return msgspec.json.encode(response)
+    handled = time.perf_counter()
+    encoded = msgspec.json.encode(response)
+    service.record_command(
+        command,
+        decode=(decoded or handled) - started,
+        handle=None if decoded is None else handled - decoded,
+        encode=time.perf_counter() - handled,
+        ok=response.status is MessageStatus.SUCCESS,
+    )
+    return encoded
 
 
 def run_server_loop(service: LiquidctlService, pipe: Server) -> None:
@@ -111,14 +450,52 @@ def run_server_loop(service: LiquidctlService, pipe: Server) -> None:
             time.sleep(0.05)
 
 
+def _unix_time(value: str) -> float:
+    """argparse type: an ISO 8601 time (local time unless it has an offset)."""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def export_journal(args: argparse.Namespace) -> None:
+    """Write a range of the sensor journal to CSV (stdout for "-")."""
+    path = args.journal or journal_path()
+    if path is None:
+        sys.exit("No journal: pass --journal or set LIQUIDCTL_BRIDGE_JOURNAL")
+    try:
+        if args.export_journal == "-":
+            rows = export_csv(path, sys.stdout, args.start, args.end, args.device_id)
+        else:
+            with open(args.export_journal, "w", newline="", encoding="utf-8") as out:
+                rows = export_csv(path, out, args.start, args.end, args.device_id)
+    except (OSError, ValueError) as e:
+        # A missing, unreadable or foreign journal, or an unwritable CSV path.
+        sys.exit(f"Cannot export journal: {e}")
+    print(f"Exported {rows} samples", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Liquidctl Bridge Server")
     parser.add_argument("--log-level", default="INFO", help="Logging level")
     parser.add_argument(
         "--test", default=False, action="store_true", help="Running as test"
     )
+    export = parser.add_argument_group("sensor journal export")
+    export.add_argument(
+        "--export-journal",
+        metavar="CSV",
+        help="Write the sensor journal to CSV ('-' for stdout) and exit",
+    )
+    export.add_argument(
+        "--journal", help="Journal file (default: $LIQUIDCTL_BRIDGE_JOURNAL)"
+    )
+    export.add_argument("--start", type=_unix_time, help="ISO 8601 start time")
+    export.add_argument("--end", type=_unix_time, help="ISO 8601 end time")
+    export.add_argument("--device-id", type=int, help="Only this device")
     args = parser.parse_args()
 
+    if args.export_journal:
+        export_journal(args)
+        return
+
     # Env override so the bridge can be made verbose without changing the spawn
     # args of the host plugin (set LIQUIDCTL_BRIDGE_LOG=DEBUG before launch).
     log_level = os.environ.get("LIQUIDCTL_BRIDGE_LOG") or args.log_level
@@ -140,6 +517,9 @@ def main():
             logger.info("Initializing Liquidctl devices...")
             service.initialize_all()
             service.log_device_details()
+            service.start_metrics_export(
+                clients=lambda: sum(p.alive for p in (pipe, rgb_pipe))
+            )
             logger.info(f"Bridge Server listening on \\\\.\\pipe\\{pipe_name}")
             logger.info(f"RGB Bridge Server listening on \\\\.\\pipe\\{rgb_pipe_name}")
 
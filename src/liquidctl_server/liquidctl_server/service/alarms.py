@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from liquidctl_server.models import (
+    AlarmCondition,
+    AlarmEvent,
+    AlarmRule,
+    AlarmState,
+    StatusValue,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _AlarmMonitor:
+    def __init__(self, rule: AlarmRule) -> None:
+        self.rule = rule
+        self.state = AlarmState(rule=rule)
+        # When the reading first disagreed with the current state, if it does.
+        self.changing_since: Optional[float] = None
+
+    def evaluate(self, value: float, sampled_at: float) -> bool:
+        """Take a reading; True when it changes the alarm state."""
+        rule, state = self.rule, self.state
+        state.value = value
+        # While active, the threshold moves back by the hysteresis.
+        margin = rule.hysteresis if state.active else 0.0
+        if rule.condition is AlarmCondition.ABOVE:
+            tripped = value > rule.threshold - margin
+        else:
+            tripped = value < rule.threshold + margin
+
+        if tripped == state.active:
+            self.changing_since = None
+            return False
+        if self.changing_since is None:
+            self.changing_since = sampled_at
+        if sampled_at - self.changing_since < rule.debounce:
+            return False
+        self.changing_since = None
+        state.active = tripped
+        if tripped:
+            state.raised += 1
+        return True
+
+
+class AlarmEngine:
+    """
+    Threshold alarms evaluated on every new sample, with an event log.
+
+    Only the rules of the sampled device are looked at, so a sample costs one
+    comparison per rule on it. Raising or clearing an alarm appends an event
+    to a bounded log that clients read with a cursor (``events``), optionally
+    waiting for the next one instead of polling statuses for it.
+    """
+
+    def __init__(self, log_size: int) -> None:
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._monitors: Dict[str, _AlarmMonitor] = {}
+        self._by_device: Dict[int, List[_AlarmMonitor]] = {}
+        self._events: Deque[AlarmEvent] = deque(maxlen=log_size)
+        self._seq = 0
+
+    def set_rule(self, rule: AlarmRule) -> None:
+        """Add a rule, or replace the one of that name (its state is reset)."""
+        with self._lock:
+            self._monitors[rule.name] = _AlarmMonitor(rule)
+            self._index()
+
+    def clear_rule(self, name: str) -> bool:
+        with self._lock:
+            removed = self._monitors.pop(name, None)
+            self._index()
+            return removed is not None
+
+    def alarms(self) -> List[AlarmState]:
+        with self._lock:
+            return [monitor.state for monitor in self._monitors.values()]
+
+    def source_devices(self) -> Set[int]:
+        with self._lock:
+            return set(self._by_device)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._monitors.clear()
+            self._by_device.clear()
+            self._events.clear()
+            self._changed.notify_all()
+
+    def on_sample(
+        self, device_id: int, status_values: List[StatusValue], sampled_at: float
+    ) -> None:
+        """Evaluate the rules on this device; a missing reading leaves them as is."""
+        with self._lock:
+            monitors = self._by_device.get(device_id)
+            if not monitors:
+                return
+            values = {value.key: value.value for value in status_values}
+            changed = False
+            for monitor in monitors:
+                value = values.get(monitor.rule.key)
+                if value is None or not monitor.evaluate(value, sampled_at):
+                    continue
+                self._record(monitor, value, sampled_at)
+                changed = True
+            if changed:
+                self._changed.notify_all()
+
+    def events(self, after: int, wait: float) -> List[AlarmEvent]:
+        """Logged events newer than ``after``, waiting up to ``wait`` s for one.
+
+        A cursor past the newest event (the bridge restarted since the client
+        took it) returns the whole log.
+        """
+        with self._changed:
+            if after > self._seq:
+                after = 0
+            if wait > 0:
+                self._changed.wait_for(lambda: self._seq > after, timeout=wait)
+            return [event for event in self._events if event.seq > after]
+
+    def _index(self) -> None:
+        self._by_device = {}
+        for monitor in self._monitors.values():
+            self._by_device.setdefault(monitor.rule.device_id, []).append(monitor)
+
+    def _record(self, monitor: _AlarmMonitor, value: float, sampled_at: float) -> None:
+        rule = monitor.rule
+        self._seq += 1
+        # sampled_at is monotonic; events carry wall-clock time for clients.
+        event_time = time.time() - (time.monotonic() - sampled_at)
+        self._events.append(
+            AlarmEvent(
+                seq=self._seq,
+                name=rule.name,
+                device_id=rule.device_id,
+                key=rule.key,
+                active=monitor.state.active,
+                value=value,
+                time=event_time,
+            )
+        )
+        if monitor.state.active:
+            logger.warning(
+                f"Alarm {rule.name!r} raised: {rule.key} of device #{rule.device_id} "
+                f"is {value} ({rule.condition.value} {rule.threshold})"
+            )
+        else:
+            logger.info(f"Alarm {rule.name!r} cleared: {rule.key} is {value}")
@@ -0,0 +1,244 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from liquidctl_server.models import EffectKind, EffectState, LedEffect
+
+logger = logging.getLogger(__name__)
+
+Color = Tuple[int, int, int]
+
+# Effects whose frame only changes with their input are re-rendered this often;
+# the frame pipeline drops the repeats, so steady effects cost no device writes.
+STATIC_INTERVAL: float = 1.0
+# Slowest frame interval the adaptive rate backs off to.
+MAX_INTERVAL: float = 1.0
+
+
+def _lerp(a: Color, b: Color, f: float) -> Color:
+    return (
+        round(a[0] + (b[0] - a[0]) * f),
+        round(a[1] + (b[1] - a[1]) * f),
+        round(a[2] + (b[2] - a[2]) * f),
+    )
+
+
+def _sample(stops: List[Color], x: float, cyclic: bool) -> Color:
+    """Color at position x in [0, 1) along the stops (wrapping if cyclic)."""
+    if len(stops) == 1:
+        return stops[0]
+    if cyclic:
+        pos = x * len(stops)
+        i = int(pos) % len(stops)
+        return _lerp(stops[i], stops[(i + 1) % len(stops)], pos - int(pos))
+    pos = min(max(x, 0.0), 1.0) * (len(stops) - 1)
+    i = min(int(pos), len(stops) - 2)
+    return _lerp(stops[i], stops[i + 1], pos - i)
+
+
+def _gradient(
+    stops: List[Color], leds: int, shift: float = 0.0, cyclic: bool = False
+) -> List[Color]:
+    if cyclic:
+        return [_sample(stops, (i / leds + shift) % 1.0, True) for i in range(leds)]
+    span = max(leds - 1, 1)
+    return [_sample(stops, i / span, False) for i in range(leds)]
+
+
+def _keyframe(frame: List[Color], leds: int) -> List[Color]:
+    return frame * leds if len(frame) == 1 else frame
+
+
+def render(
+    effect: LedEffect, elapsed: float, value: Optional[float] = None
+) -> Optional[List[Color]]:
+    """Frame of an effect ``elapsed`` seconds after it started (None = no input)."""
+    phase = (elapsed / effect.period) % 1.0
+    kind = effect.kind
+    if kind is EffectKind.GRADIENT:
+        return _gradient(effect.colors, effect.leds)
+    if kind is EffectKind.ROTATE:
+        return _gradient(effect.colors, effect.leds, shift=phase, cyclic=True)
+    if kind is EffectKind.BREATHE:
+        level = (1.0 - math.cos(2.0 * math.pi * phase)) / 2.0
+        return [
+            (round(r * level), round(g * level), round(b * level))
+            for r, g, b in _gradient(effect.colors, effect.leds)
+        ]
+    if kind is EffectKind.KEYFRAMES:
+        frames = effect.keyframes
+        pos = phase * len(frames)
+        i = int(pos)
+        start = _keyframe(frames[i], effect.leds)
+        end = _keyframe(frames[(i + 1) % len(frames)], effect.leds)
+        return [_lerp(a, b, pos - i) for a, b in zip(start, end)]
+    # EffectKind.TEMPERATURE
+    if value is None:
+        return None
+    x = (value - effect.low) / (effect.high - effect.low)
+    return [_sample(effect.colors, x, False)] * effect.leds
+
+
+class _Animation:
+    def __init__(self, device_id: int, effect: LedEffect, now: float) -> None:
+        self.device_id = device_id
+        self.effect = effect
+        self.started = now
+        self.next_due = now
+        self.min_interval = 1.0 / effect.fps
+        self.interval = self.min_interval
+        self.pending: Optional[Future] = None
+        # Set under the engine lock once the effect is cleared or replaced.
+        self.cancelled = False
+        self.state = EffectState(effect=effect, device_id=device_id, fps=effect.fps)
+
+    @property
+    def static(self) -> bool:
+        return self.effect.kind in (EffectKind.GRADIENT, EffectKind.TEMPERATURE)
+
+
+class AnimationEngine:
+    """
+    Renders declarative LED effects in the bridge on their own scheduler.
+
+    Each effect aims for its target FPS. When its previous frame has not been
+    written by the time the next one is due, the device cannot keep up: the
+    frame is skipped and the effect's rate backs off, then recovers slowly
+    while frames keep up (AIMD). Frames go through ``submit`` (the LED frame
+    pipeline), so they share the device queue with all other writes.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[int, str, str, List[Color]], Optional[Future]],
+        read_value: Callable[[int, str], Optional[float]],
+    ) -> None:
+        self._submit = submit
+        self._read_value = read_value
+        self._lock = threading.Lock()
+        self._animations: Dict[Tuple[int, str], _Animation] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_effect(self, device_id: int, effect: LedEffect) -> None:
+        with self._lock:
+            previous = self._animations.get((device_id, effect.channel))
+            if previous is not None:
+                previous.cancelled = True
+            self._animations[(device_id, effect.channel)] = _Animation(
+                device_id, effect, time.monotonic()
+            )
+        self._start()
+        self._wake.set()
+
+    def clear_effect(self, device_id: int, channel: str) -> bool:
+        """
+        Stop an effect. Once this returns the effect submits no more frames, so
+        a frame written after it is not overwritten by one already rendered.
+        """
+        with self._lock:
+            animation = self._animations.pop((device_id, channel), None)
+            if animation is None:
+                return False
+            animation.cancelled = True
+            return True
+
+    def effects(self) -> List[EffectState]:
+        with self._lock:
+            return [animation.state for animation in self._animations.values()]
+
+    def source_devices(self) -> Set[int]:
+        """Devices whose readings drive temperature-mapped effects."""
+        with self._lock:
+            return {
+                animation.effect.source_device_id or animation.device_id
+                for animation in self._animations.values()
+                if animation.effect.kind is EffectKind.TEMPERATURE
+            }
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def clear(self) -> None:
+        with self._lock:
+            for animation in self._animations.values():
+                animation.cancelled = True
+            self._animations.clear()
+
+    def _start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="led-animations", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [a for a in self._animations.values() if a.next_due <= now]
+            for animation in due:
+                try:
+                    self._tick(animation, now)
+                except Exception as e:
+                    logger.warning(
+                        f"Effect on device #{animation.device_id} failed: {e}"
+                    )
+                    animation.next_due = now + MAX_INTERVAL
+
+            with self._lock:
+                next_due = min(
+                    (a.next_due for a in self._animations.values()), default=None
+                )
+            timeout = (
+                None if next_due is None else max(0.0, next_due - time.monotonic())
+            )
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _tick(self, animation: _Animation, now: float) -> None:
+        state = animation.state
+        if animation.pending is not None and not animation.pending.done():
+            # The device is still busy with the previous frame: back off.
+            state.skipped += 1
+            animation.interval = min(animation.interval * 1.25, MAX_INTERVAL)
+            animation.next_due = now + animation.interval
+            state.fps = 1.0 / animation.interval
+            return
+
+        animation.interval = max(animation.min_interval, animation.interval * 0.95)
+        effect = animation.effect
+        value = None
+        if effect.kind is EffectKind.TEMPERATURE:
+            value = self._read_value(
+                effect.source_device_id or animation.device_id, effect.source_key
+            )
+        colors = render(effect, now - animation.started, value)
+        if colors is not None:
+            # Submitting under the lock orders this frame before any write made
+            # after clear_effect(); the pipeline only queues it.
+            with self._lock:
+                if animation.cancelled:
+                    return
+                future = self._submit(
+                    animation.device_id, effect.channel, effect.mode, colors
+                )
+            if future is not None:
+                state.frames += 1
+            animation.pending = future
+
+        interval = STATIC_INTERVAL if animation.static else animation.interval
+        animation.next_due += interval
+        if animation.next_due <= now:
+            animation.next_due = now + interval  # Never replay missed frames
+        state.fps = 1.0 / interval
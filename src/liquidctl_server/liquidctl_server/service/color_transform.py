@@ -0,0 +1,133 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from liquidctl_server.models import ColorTransform, ColorTransformState
+
+Color = Tuple[int, int, int]
+
+
+def white_point(kelvin: float) -> Tuple[float, float, float]:
+    """RGB gains of a black body at ``kelvin``, normalized so 6500 K is neutral.
+
+    Tanner Helland's fit of the CIE data; good enough for LED white balance.
+    """
+
+    def rgb(k: float) -> Tuple[float, float, float]:
+        t = k / 100.0
+        if t <= 66:
+            r = 255.0
+            g = 99.4708025861 * math.log(t) - 161.1195681661
+        else:
+            r = 329.698727446 * (t - 60) ** -0.1332047592
+            g = 288.1221695283 * (t - 60) ** -0.0755148492
+        if t >= 66:
+            b = 255.0
+        elif t <= 19:
+            b = 0.0
+        else:
+            b = 138.5177312231 * math.log(t - 10) - 305.0447927307
+        return tuple(min(max(c, 0.0), 255.0) for c in (r, g, b))
+
+    target, neutral = rgb(kelvin), rgb(6500.0)
+    return tuple(t / n for t, n in zip(target, neutral))
+
+
+def _lut(brightness: float, gamma: float, gain: float) -> bytes:
+    scale = 255.0 * brightness * gain
+    return bytes(
+        min(255, max(0, round(scale * (v / 255.0) ** gamma))) for v in range(256)
+    )
+
+
+class _CompiledTransform:
+    """A transform reduced to one 256-entry lookup table per channel."""
+
+    def __init__(self, transform: ColorTransform) -> None:
+        self.transform = transform
+        gains = (
+            white_point(transform.temperature)
+            if transform.temperature is not None
+            else (1.0, 1.0, 1.0)
+        )
+        self.luts = [_lut(transform.brightness, transform.gamma, g) for g in gains]
+        # Output slot i takes input channel order[i] ("grb" -> g, r, b).
+        self.order = ["rgb".index(c) for c in transform.channel_order]
+
+    def apply(self, colors: List[Color]) -> List[Color]:
+        if not colors:
+            return colors
+        # Whole-frame operations: split into per-channel byte strings, map each
+        # through its table with bytes.translate and zip back in output order.
+        channels = [
+            bytes(values).translate(lut) for values, lut in zip(zip(*colors), self.luts)
+        ]
+        return list(zip(*(channels[i] for i in self.order)))
+
+
+class ColorTransformStage:
+    """
+    Per device/channel colour correction applied to frames before the driver.
+
+    Brightness, gamma and white balance fold into one lookup table per colour
+    channel when a transform is set, so a frame costs three table lookups per
+    LED done in C, whatever the transform contains.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._transforms: Dict[Tuple[int, Optional[str]], _CompiledTransform] = {}
+
+    def set_transform(
+        self, device_id: int, channel: Optional[str], transform: ColorTransform
+    ) -> None:
+        """Set the transform of a channel, or the device default when channel is None.
+
+        The identity transform removes the entry instead.
+        """
+        with self._lock:
+            if transform == _IDENTITY:
+                self._transforms.pop((device_id, channel), None)
+            else:
+                self._transforms[(device_id, channel)] = _CompiledTransform(transform)
+
+    def apply(self, device_id: int, channel: str, colors: List[Color]) -> List[Color]:
+        compiled = self._compiled(device_id, channel)
+        return colors if compiled is None else compiled.apply(colors)
+
+    def apply_delta(
+        self, device_id: int, channel: str, changes: List[Tuple[int, int, int, int]]
+    ) -> List[Tuple[int, int, int, int]]:
+        """Transform the colours of ``[index, r, g, b]`` changes.
+
+        The transform works per LED, so changes transformed on their own land
+        exactly where the transformed full frame would have put them.
+        """
+        compiled = self._compiled(device_id, channel)
+        if compiled is None or not changes:
+            return changes
+        indices, *channels = zip(*changes)
+        colors = compiled.apply(list(zip(*channels)))
+        return [(index, *color) for index, color in zip(indices, colors)]
+
+    def transforms(self) -> List[ColorTransformState]:
+        with self._lock:
+            return [
+                ColorTransformState(
+                    device_id=device_id, channel=channel, transform=compiled.transform
+                )
+                for (device_id, channel), compiled in self._transforms.items()
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._transforms.clear()
+
+    def _compiled(self, device_id: int, channel: str) -> Optional[_CompiledTransform]:
+        compiled = self._transforms.get((device_id, channel))
+        if compiled is None:
+            compiled = self._transforms.get((device_id, None))
+        return compiled
+
+
+_IDENTITY = ColorTransform()
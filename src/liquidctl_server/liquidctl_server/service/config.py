@@ -9,6 +9,20 @@ logger = logging.getLogger(__name__)
 DEVICE_OPERATION_TIMEOUT: float = 5.0
 DEVICE_STATUS_TIMEOUT: float = 0.5
 MAX_INIT_RETRIES: int = 3
+# How long a device waits for the others of a set.led_group before writing.
+LED_GROUP_SYNC_TIMEOUT: float = 1.0
+# Seconds between background reads of devices feeding server-side fan curves.
+SAMPLE_INTERVAL: float = 1.0
+
+# Alarm events kept for get.alarm_events, and the longest a client may wait there.
+ALARM_EVENT_LOG_SIZE: int = 256
+MAX_ALARM_WAIT: float = 30.0
+
+# Upper bounds of set.history_limits: samples per key (a day at 1 Hz), series,
+# and the memory the two together may reserve (16 bytes per sample).
+MAX_HISTORY_CAPACITY: int = 86_400
+MAX_HISTORY_SERIES: int = 1024
+MAX_HISTORY_BYTES: int = 256 * 2**20
 
 # Optional device allowlist. Drop a file with this name in the plugin folder
 # containing a single regex line; only devices whose description matches
@@ -16,6 +30,16 @@ MAX_INIT_RETRIES: int = 3
 # lines starting with '#' are ignored.
 DEVICE_FILTER_FILE: str = "liquidctl_filter.txt"
 
+# Optional sensor journal: when this environment variable names a file, every
+# sample the bridge reads is appended to it (see service/journal.py).
+JOURNAL_ENV: str = "LIQUIDCTL_BRIDGE_JOURNAL"
+
+# Optional OpenMetrics export (see service/openmetrics.py): a file rewritten
+# every METRICS_FILE_INTERVAL seconds, and/or an HTTP endpoint on 127.0.0.1.
+METRICS_FILE_ENV: str = "LIQUIDCTL_BRIDGE_METRICS_FILE"
+METRICS_PORT_ENV: str = "LIQUIDCTL_BRIDGE_METRICS_PORT"
+METRICS_FILE_INTERVAL: float = 10.0
+
 
 def _is_bundled() -> bool:
     """True when running as the built bridge exe (Nuitka or PyInstaller)."""
@@ -60,3 +84,30 @@ def load_device_filter() -> Optional[Pattern[str]]:
     except re.error as err:
         logger.error("Invalid device filter regex %r: %s", pattern, err)
         return None
+
+
+def journal_path() -> Optional[str]:
+    """Path of the sensor journal, or None when journaling is off."""
+    return os.environ.get(JOURNAL_ENV) or None
+
+
+def metrics_file_path() -> Optional[str]:
+    """Path of the OpenMetrics file, or None when the file export is off."""
+    return os.environ.get(METRICS_FILE_ENV) or None
+
+
+def metrics_port() -> Optional[int]:
+    """Local port of the OpenMetrics endpoint, or None when it is off."""
+    value = os.environ.get(METRICS_PORT_ENV)
+    if not value:
+        return None
+    try:
+        port = int(value)
+    except ValueError:
+        port = -1
+    if not 0 <= port <= 65535:
+        logger.error(
+            "Invalid %s %r, metrics endpoint disabled", METRICS_PORT_ENV, value
+        )
+        return None
+    return port
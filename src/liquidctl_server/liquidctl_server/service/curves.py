@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+from liquidctl_server.models import CurveState, FanCurve, StatusValue
+
+CurveKey = Tuple[int, str]
+
+
+def interpolate(points: List[Tuple[float, int]], temperature: float) -> int:
+    """Duty for a temperature on a piecewise-linear curve, clamped at both ends."""
+    if temperature <= points[0][0]:
+        return points[0][1]
+    for (t0, d0), (t1, d1) in zip(points, points[1:]):
+        if temperature <= t1:
+            return round(d0 + (d1 - d0) * (temperature - t0) / (t1 - t0))
+    return points[-1][1]
+
+
+class _CurveController:
+    def __init__(self, curve: FanCurve) -> None:
+        self.curve = curve
+        self.points = sorted(curve.points)
+        self.state = CurveState(curve=curve)
+        self.smoothed_at = 0.0
+        self.decided_temperature: float = float("nan")
+
+    def evaluate(self, temperature: float, sampled_at: float) -> int:
+        """Duty for a new source sample, after smoothing and hysteresis."""
+        state = self.state
+        if state.temperature is None or self.curve.response_time <= 0:
+            state.temperature = temperature
+        else:
+            # First-order lag with time constant response_time.
+            dt = max(0.0, sampled_at - self.smoothed_at)
+            alpha = dt / (self.curve.response_time + dt) if dt else 0.0
+            state.temperature += alpha * (temperature - state.temperature)
+        self.smoothed_at = sampled_at
+
+        if (
+            state.duty is not None
+            and abs(state.temperature - self.decided_temperature)
+            < self.curve.hysteresis
+        ):
+            return state.duty
+        self.decided_temperature = state.temperature
+        return interpolate(self.points, state.temperature)
+
+
+class CurveEngine:
+    """
+    Closed-loop fan curves evaluated in the bridge on every new sample.
+
+    Each curve maps a temperature key of a source device to a duty on a
+    target channel. Decisions are sent through ``write`` (the normal queued,
+    policy-filtered duty path), so control keeps running while clients stall.
+    """
+
+    def __init__(self, write: Callable[[int, str, int], None]) -> None:
+        self._write = write
+        self._lock = threading.Lock()
+        self._controllers: Dict[CurveKey, _CurveController] = {}
+
+    def set_curve(self, curve: FanCurve) -> None:
+        with self._lock:
+            self._controllers[(curve.device_id, curve.channel)] = _CurveController(
+                curve
+            )
+
+    def clear_curve(self, device_id: int, channel: str) -> bool:
+        with self._lock:
+            return self._controllers.pop((device_id, channel), None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._controllers.clear()
+
+    def curves(self) -> List[CurveState]:
+        with self._lock:
+            return [controller.state for controller in self._controllers.values()]
+
+    def source_devices(self) -> Set[int]:
+        with self._lock:
+            return {
+                c.curve.source_device_id or c.curve.device_id
+                for c in self._controllers.values()
+            }
+
+    def on_sample(
+        self, device_id: int, status_values: List[StatusValue], sampled_at: float
+    ) -> None:
+        """Evaluate every curve fed by this device's new sample."""
+        values = {value.key: value.value for value in status_values}
+        decisions: List[Tuple[_CurveController, int]] = []
+        with self._lock:
+            for controller in self._controllers.values():
+                curve = controller.curve
+                if (curve.source_device_id or curve.device_id) != device_id:
+                    continue
+                temperature = values.get(curve.source_key)
+                if temperature is None:
+                    continue
+                duty = controller.evaluate(temperature, sampled_at)
+                controller.state.evaluations += 1
+                if duty != controller.state.duty:
+                    controller.state.duty = duty
+                    decisions.append((controller, duty))
+
+        # Outside the lock: the write goes through the service's duty path.
+        for controller, duty in decisions:
+            self._write(controller.curve.device_id, controller.curve.channel, duty)
+            latency = time.monotonic() - sampled_at
+            with self._lock:
+                state = controller.state
+                state.writes += 1
+                state.decision_latency = latency
+                state.max_decision_latency = max(
+                    state.max_decision_latency or 0.0, latency
+                )
@@ -0,0 +1,80 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from liquidctl.driver.base import BaseDriver
+
+# Distinct match strings remembered; clients use a handful, so this only
+# bounds the memory a misbehaving client can make the memo take.
+MAX_MEMO_ENTRIES: int = 256
+
+
+class DeviceIndex:
+    """
+    Resolves LED ``device`` match strings to device ids.
+
+    Built once per inventory; a match string is resolved the slow way the first
+    time it is seen and served from a memo afterwards, so the LED hot path
+    costs one dict lookup. Besides a case-insensitive description substring,
+    a match can be a selector:
+
+    - ``id:2`` - the device id
+    - ``driver:SmartDevice2`` - the liquidctl driver class
+    - ``usb:1e71:2007`` - USB vendor and product id (hex)
+    - ``channel:led1`` - a device with that lighting channel
+
+    Several matching devices resolve to the lowest id.
+    """
+
+    def __init__(self, devices: Dict[int, BaseDriver]) -> None:
+        self._memo: Dict[str, Optional[int]] = {}
+        self._entries: List[Tuple[int, str]] = [
+            (device_id, lc_device.description.lower())
+            for device_id, lc_device in sorted(devices.items())
+        ]
+        self._ids: Dict[str, int] = {str(device_id): device_id for device_id in devices}
+        self._by_driver: Dict[str, int] = {}
+        self._by_usb: Dict[str, int] = {}
+        self._by_channel: Dict[str, int] = {}
+        for device_id, lc_device in sorted(devices.items()):
+            self._by_driver.setdefault(type(lc_device).__name__.lower(), device_id)
+            usb_id = _usb_id(lc_device)
+            if usb_id is not None:
+                self._by_usb.setdefault(usb_id, device_id)
+            for channel in getattr(lc_device, "_color_channels", None) or []:
+                self._by_channel.setdefault(str(channel).lower(), device_id)
+
+        self._selectors: Dict[str, Callable[[str], Optional[int]]] = {
+            "id": self._ids.get,
+            "driver": self._by_driver.get,
+            "usb": self._by_usb.get,
+            "channel": self._by_channel.get,
+        }
+
+    def resolve(self, device_match: str) -> Optional[int]:
+        try:
+            return self._memo[device_match]
+        except KeyError:
+            pass
+        device_id = self._lookup(device_match)
+        if len(self._memo) >= MAX_MEMO_ENTRIES:
+            self._memo.clear()
+        self._memo[device_match] = device_id
+        return device_id
+
+    def _lookup(self, device_match: str) -> Optional[int]:
+        key, sep, value = device_match.partition(":")
+        selector = self._selectors.get(key.strip().lower()) if sep else None
+        if selector is not None:
+            return selector(value.strip().lower())
+        needle = device_match.lower()
+        for device_id, description in self._entries:
+            if needle in description:
+                return device_id
+        return None
+
+
+def _usb_id(lc_device: BaseDriver) -> Optional[str]:
+    vendor_id = getattr(lc_device, "vendor_id", None)
+    product_id = getattr(lc_device, "product_id", None)
+    if not isinstance(vendor_id, int) or not isinstance(product_id, int):
+        return None
+    return f"{vendor_id:04x}:{product_id:04x}"
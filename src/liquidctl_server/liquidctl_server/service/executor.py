@@ -1,42 +1,80 @@
 import queue
 import sys
+import time
+from collections import deque
 from concurrent.futures import Future, ThreadPoolExecutor
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# Called with (device_id, job name, queue wait, run time, succeeded) per job.
+JobObserver = Callable[[int, str, float, float, bool], None]
 
 
 class _DeviceJob:
     """A job to be executed on a specific device."""
 
-    def __init__(self, future: Future, fn: Callable, **kwargs: Any) -> None:
+    def __init__(self, future: Future, fn: Callable, /, **kwargs: Any) -> None:
         self.future = future
         self.fn = fn
         self.kwargs = kwargs
+        self.queued_at = time.perf_counter()
+        # Set by the executor when it records job timings.
+        self.device_id = 0
+        self.observe: Optional[JobObserver] = None
 
     def run(self) -> None:
-        """Execute the job and set the result on the future."""
+        """Execute the job and set its result or exception on the future.
+
+        A failing job never raises here: the worker must outlive it, or every
+        later job of the device would hang.
+        """
         if not self.future.set_running_or_notify_cancel():
             return
+        started = time.perf_counter()
         try:
             result = self.fn(**self.kwargs)
         except Exception as exc:
+            self._observe(started, ok=False)
             self.future.set_exception(exc)
-            raise
         else:
+            self._observe(started, ok=True)
             self.future.set_result(result)
 
+    def _observe(self, started: float, ok: bool) -> None:
+        if self.observe is not None:
+            self.observe(
+                self.device_id,
+                getattr(self.fn, "__name__", "job"),
+                started - self.queued_at,
+                time.perf_counter() - started,
+                ok,
+            )
+
+
+# Queued behind an idle job so that a blocked worker wakes up to run it.
+_WAKE = object()
+
 
-def _queue_worker(dev_queue: queue.SimpleQueue) -> None:
-    """Worker that processes jobs from a device queue sequentially."""
-    try:
-        while True:
-            device_job: Optional[_DeviceJob] = dev_queue.get()
-            if device_job is None:
-                return  # Shutdown signal
-            device_job.run()
+def _queue_worker(
+    dev_queue: queue.SimpleQueue, idle_jobs: Optional[Deque[_DeviceJob]] = None
+) -> None:
+    """Worker that processes jobs from a device queue sequentially.
+
+    Idle jobs only run while the main queue is empty, so they never delay
+    regular device work.
+    """
+    while True:
+        device_job: Optional[_DeviceJob] = dev_queue.get()
+        if device_job is None:
+            return  # Shutdown signal
+        try:
+            if device_job is not _WAKE:
+                device_job.run()
             del device_job
-    except Exception as exc:
-        sys.stderr.write(f"Exception in device worker: {exc}\n")
-        raise
+            while idle_jobs and dev_queue.empty():
+                idle_jobs.popleft().run()
+        except Exception as exc:
+            # Only the job observer can get here; keep serving the device.
+            sys.stderr.write(f"Exception in device worker: {exc}\n")
 
 
 class DeviceExecutor:
@@ -49,9 +87,12 @@ class DeviceExecutor:
     per-device communication synchronous.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, observe: Optional[JobObserver] = None) -> None:
         self._device_queues: Dict[int, queue.SimpleQueue] = {}
+        self._idle_jobs: Dict[int, Deque[_DeviceJob]] = {}
+        self._max_depths: Dict[int, int] = {}
         self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._observe = observe
 
     def set_number_of_devices(self, number_of_devices: int) -> None:
         """Initialize queues and workers for the given number of devices."""
@@ -61,21 +102,57 @@ class DeviceExecutor:
         self._thread_pool = ThreadPoolExecutor(max_workers=number_of_devices)
         for dev_id in range(1, number_of_devices + 1):
             dev_queue: queue.SimpleQueue = queue.SimpleQueue()
+            idle_jobs: Deque[_DeviceJob] = deque()
             self._device_queues[dev_id] = dev_queue
-            self._thread_pool.submit(_queue_worker, dev_queue)
+            self._idle_jobs[dev_id] = idle_jobs
+            self._thread_pool.submit(_queue_worker, dev_queue, idle_jobs)
 
-    def submit(self, device_id: int, fn: Callable, **kwargs: Any) -> Future:
-        """Submit a job to the device's queue and return a Future."""
+    def submit(self, device_id: int, fn: Callable, /, **kwargs: Any) -> Future:
+        """Submit a job to the device's queue and return a Future.
+
+        ``device_id`` and ``fn`` are positional-only so jobs can themselves
+        take a ``device_id`` keyword.
+        """
         future: Future = Future()
-        device_job = _DeviceJob(future, fn, **kwargs)
-        self._device_queues[device_id].put(device_job)
+        device_job = self._job(device_id, future, fn, kwargs)
+        dev_queue = self._device_queues[device_id]
+        dev_queue.put(device_job)
+        depth = dev_queue.qsize()
+        if depth > self._max_depths.get(device_id, 0):
+            self._max_depths[device_id] = depth
+        return future
+
+    def submit_idle(self, device_id: int, fn: Callable, /, **kwargs: Any) -> Future:
+        """Submit a low-priority job that runs once the device queue is empty."""
+        future: Future = Future()
+        self._idle_jobs[device_id].append(self._job(device_id, future, fn, kwargs))
+        self._device_queues[device_id].put(_WAKE)
         return future
 
+    def _job(
+        self, device_id: int, future: Future, fn: Callable, kwargs: Dict[str, Any]
+    ) -> _DeviceJob:
+        device_job = _DeviceJob(future, fn, **kwargs)
+        device_job.device_id = device_id
+        device_job.observe = self._observe
+        return device_job
+
     def device_queue_empty(self, device_id: int) -> bool:
         """Check if a device's job queue is empty."""
         dev_queue = self._device_queues.get(device_id)
         return dev_queue.empty() if dev_queue else True
 
+    def queue_depths(self) -> Dict[int, Tuple[int, int]]:
+        """Per device: jobs waiting now (wake-ups included) and the most seen."""
+        return {
+            device_id: (dev_queue.qsize(), self._max_depths.get(device_id, 0))
+            for device_id, dev_queue in self._device_queues.items()
+        }
+
+    def reset_max_depths(self) -> None:
+        """Start the per-device high-water marks of queue_depths() over."""
+        self._max_depths.clear()
+
     def shutdown(self) -> None:
         """Shutdown all workers and clear queues."""
         for dev_queue in self._device_queues.values():
@@ -86,3 +163,5 @@ class DeviceExecutor:
             self._thread_pool = None
 
         self._device_queues.clear()
+        self._idle_jobs.clear()
+        self._max_depths.clear()
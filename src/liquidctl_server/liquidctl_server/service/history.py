@@ -0,0 +1,168 @@
+import logging
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from liquidctl_server.models import HistoryLimits, HistorySeries, StatusValue
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[int, str]
+
+
+class _Series:
+    """Fixed-size ring of (sampled_at, value) pairs for one device key."""
+
+    def __init__(self, unit: str, capacity: int) -> None:
+        self.unit = unit
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.head = 0  # Next slot to write
+        self.count = 0
+
+    def append(self, sampled_at: float, value: float) -> None:
+        self.times[self.head] = sampled_at
+        self.values[self.head] = value
+        self.head = (self.head + 1) % len(self.times)
+        if self.count < len(self.times):
+            self.count += 1
+
+    def ordered(self) -> Tuple[array, array]:
+        """Copies of the samples, oldest first (two slice copies, no per-item work)."""
+        start = (self.head - self.count) % len(self.times)
+        if start + self.count <= len(self.times):
+            end = start + self.count
+            return self.times[start:end], self.values[start:end]
+        return (
+            self.times[start:] + self.times[: self.head],
+            self.values[start:] + self.values[: self.head],
+        )
+
+
+class HistoryStore:
+    """
+    Recent numeric samples per (device, key), in bounded array-backed rings.
+
+    Fed from the service's sample listeners, so it records every reading a
+    client poll or the background sampler takes. Memory is bounded by
+    ``capacity * max_series * 16`` bytes; both limits can be changed at runtime
+    (which drops the recorded history).
+    """
+
+    def __init__(self, limits: HistoryLimits) -> None:
+        self._lock = threading.Lock()
+        self._limits = limits
+        self._series: Dict[SeriesKey, _Series] = {}
+        self._full_logged = False
+
+    def set_limits(self, limits: HistoryLimits) -> None:
+        with self._lock:
+            self._limits = limits
+            self._series.clear()
+            self._full_logged = False
+
+    def on_sample(
+        self, device_id: int, status_values: List[StatusValue], sampled_at: float
+    ) -> None:
+        """Append a device sample; non-numeric values are skipped."""
+        with self._lock:
+            for status_value in status_values:
+                value = status_value.value
+                if value is None:
+                    continue
+                series = self._series.get((device_id, status_value.key))
+                if series is None:
+                    series = self._new_series(device_id, status_value)
+                    if series is None:
+                        continue
+                series.append(sampled_at, value)
+
+    def history(
+        self,
+        device_id: int,
+        keys: Optional[List[str]],
+        since: float,
+        until: float,
+        resolution: Optional[float],
+    ) -> List[HistorySeries]:
+        """Samples of a device between ``since`` and ``until`` seconds ago.
+
+        With ``resolution``, samples are grouped into buckets that many seconds
+        wide, starting ``since`` seconds ago, and each non-empty bucket reports
+        its mean, min and max.
+        """
+        now = time.monotonic()
+        with self._lock:
+            selected = [
+                (key, series.unit, series.ordered())
+                for (series_device, key), series in self._series.items()
+                if series_device == device_id and (keys is None or key in keys)
+            ]
+
+        # Aggregation runs on the copies, outside the lock.
+        return [
+            self._query(
+                device_id, key, unit, times, values, now, since, until, resolution
+            )
+            for key, unit, (times, values) in selected
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._full_logged = False
+
+    def _new_series(
+        self, device_id: int, status_value: StatusValue
+    ) -> Optional[_Series]:
+        if len(self._series) >= self._limits.max_series:
+            if not self._full_logged:
+                logger.warning(
+                    f"History holds {self._limits.max_series} series; "
+                    f"not recording {status_value.key!r} of device #{device_id}"
+                )
+                self._full_logged = True
+            return None
+        series = _Series(status_value.unit, self._limits.capacity)
+        self._series[(device_id, status_value.key)] = series
+        return series
+
+    @staticmethod
+    def _query(
+        device_id: int,
+        key: str,
+        unit: str,
+        times: array,
+        values: array,
+        now: float,
+        since: float,
+        until: float,
+        resolution: Optional[float],
+    ) -> HistorySeries:
+        start_time = now - since
+        first = bisect_left(times, start_time)
+        last = bisect_right(times, now - until, first)
+        result = HistorySeries(device_id=device_id, key=key, unit=unit)
+        if resolution is None:
+            result.ages = [now - t for t in times[first:last]]
+            result.values = values[first:last].tolist()
+            return result
+
+        result.min, result.max = [], []
+        i = first
+        while i < last:
+            # Each step consumes one non-empty bucket: empty ones cost nothing.
+            bucket = math.floor((times[i] - start_time) / resolution)
+            bucket_start = start_time + bucket * resolution
+            # At least one sample, should rounding put times[i] past the edge.
+            j = max(i + 1, bisect_left(times, bucket_start + resolution, i, last))
+            chunk = values[i:j]
+            result.ages.append(now - bucket_start)
+            result.values.append(sum(chunk) / len(chunk))
+            result.min.append(min(chunk))
+            result.max.append(max(chunk))
+            i = j
+        return result
@@ -0,0 +1,445 @@
+import csv
+import heapq
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from queue import Empty, SimpleQueue
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from liquidctl_server.models import StatusValue
+
+logger = logging.getLogger(__name__)
+
+# A journal is a file header followed by self-contained chunks, each holding
+# every sample of a time span: per series, millisecond timestamps as
+# delta-of-delta varints and values XOR-ed with the previous value, the whole
+# payload deflated. A sidecar ``.idx`` file lists (first, last, offset) per
+# chunk so readers find a time range without touching the data.
+FILE_MAGIC = b"LCJ1"
+CHUNK_MAGIC = b"CHNK"
+_CHUNK_HEADER = struct.Struct("<4sIddII")  # magic, size, first, last, samples, crc
+_INDEX_ENTRY = struct.Struct("<ddQ")  # first, last, offset
+_FLOAT = struct.Struct("<d")
+_BITS = struct.Struct("<Q")
+
+# A chunk is written once it spans this many seconds or holds this many
+# samples; a crash loses at most the chunk being filled.
+CHUNK_SECONDS: float = 60.0
+CHUNK_SAMPLES: int = 16384
+
+# (unix time, device id, key, value, unit)
+JournalSample = Tuple[float, int, str, float, str]
+_ChunkInfo = Tuple[float, float, int]  # first, last, offset
+
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else ((-n) << 1) - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def _put_str(out: bytearray, text: str) -> None:
+    raw = text.encode()
+    _put_varint(out, len(raw))
+    out += raw
+
+
+def _get_str(data: bytes, pos: int) -> Tuple[str, int]:
+    size, pos = _get_varint(data, pos)
+    return data[pos : pos + size].decode(), pos + size
+
+
+def _encode_series(
+    out: bytearray,
+    device_id: int,
+    key: str,
+    unit: str,
+    times: List[int],
+    values: List[float],
+) -> None:
+    _put_varint(out, device_id)
+    _put_str(out, key)
+    _put_str(out, unit)
+    _put_varint(out, len(times))
+
+    previous_time = times[0]
+    previous_delta = 0
+    _put_varint(out, previous_time)
+    for ms in times[1:]:
+        delta = ms - previous_time
+        _put_varint(out, _zigzag(delta - previous_delta))
+        previous_time, previous_delta = ms, delta
+
+    previous_bits = _BITS.unpack(_FLOAT.pack(values[0]))[0]
+    out += _FLOAT.pack(values[0])
+    for value in values[1:]:
+        bits = _BITS.unpack(_FLOAT.pack(value))[0]
+        xor = bits ^ previous_bits
+        previous_bits = bits
+        if not xor:
+            out.append(0)
+            continue
+        # Only the bytes between the leading and trailing zero bytes are kept.
+        trailing = ((xor & -xor).bit_length() - 1) // 8
+        leading = (64 - xor.bit_length()) // 8
+        size = 8 - leading - trailing
+        out.append(trailing << 4 | size)
+        out += (xor >> (8 * trailing)).to_bytes(size, "little")
+
+
+def _decode_series(
+    data: bytes, pos: int
+) -> Tuple[int, str, str, List[float], List[float], int]:
+    device_id, pos = _get_varint(data, pos)
+    key, pos = _get_str(data, pos)
+    unit, pos = _get_str(data, pos)
+    count, pos = _get_varint(data, pos)
+
+    ms, pos = _get_varint(data, pos)
+    times = [ms / 1000]
+    delta = 0
+    for _ in range(count - 1):
+        dod, pos = _get_varint(data, pos)
+        delta += _unzigzag(dod)
+        ms += delta
+        times.append(ms / 1000)
+
+    bits = _BITS.unpack_from(data, pos)[0]
+    pos += 8
+    values = [_FLOAT.unpack(_BITS.pack(bits))[0]]
+    for _ in range(count - 1):
+        control = data[pos]
+        pos += 1
+        if control:
+            size = control & 0x0F
+            xor = int.from_bytes(data[pos : pos + size], "little")
+            bits ^= xor << (8 * (control >> 4))
+            pos += size
+        values.append(_FLOAT.unpack(_BITS.pack(bits))[0])
+    return device_id, key, unit, times, values, pos
+
+
+class _Series:
+    def __init__(self, unit: str) -> None:
+        self.unit = unit
+        self.times: List[int] = []
+        self.values: List[float] = []
+
+
+class SensorJournal:
+    """
+    Append-only on-disk log of every sensor sample.
+
+    ``on_sample`` (a service sample listener) only copies the values onto a
+    queue; a writer thread batches them into chunks and appends them, so disk
+    I/O never runs on a device worker or the pipe thread.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._queue: SimpleQueue = SimpleQueue()
+        self._series: Dict[Tuple[int, str], _Series] = {}
+        self._samples = 0
+        self._chunk_started: Optional[float] = None
+        self._data, self._index = _open_for_append(path)
+        self._thread = threading.Thread(
+            target=self._run, name="sensor-journal", daemon=True
+        )
+        self._thread.start()
+
+    def on_sample(
+        self, device_id: int, status_values: List[StatusValue], sampled_at: float
+    ) -> None:
+        # The rows are reused by the next sample, so the values are copied here.
+        wall_time = time.time() - (time.monotonic() - sampled_at)
+        self._queue.put(
+            (
+                device_id,
+                wall_time,
+                [
+                    (v.key, v.unit, v.value)
+                    for v in status_values
+                    if v.value is not None
+                ],
+            )
+        )
+
+    def close(self) -> None:
+        """Write out the chunk being filled and close the files."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._data.close()
+        self._index.close()
+
+    def _run(self) -> None:
+        while True:
+            timeout = None
+            if self._chunk_started is not None:
+                timeout = max(
+                    0.0, self._chunk_started + CHUNK_SECONDS - time.monotonic()
+                )
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                self._flush()
+                continue
+            if item is None:
+                self._flush()
+                return
+            self._add(*item)
+            if self._samples >= CHUNK_SAMPLES:
+                self._flush()
+
+    def _add(
+        self, device_id: int, wall_time: float, values: List[Tuple[str, str, float]]
+    ) -> None:
+        ms = round(wall_time * 1000)
+        for key, unit, value in values:
+            series = self._series.get((device_id, key))
+            if series is None or series.unit != unit:
+                if series is not None:
+                    self._flush()  # A unit change starts a new chunk
+                series = self._series[(device_id, key)] = _Series(unit)
+            series.times.append(ms)
+            series.values.append(value)
+            self._samples += 1
+        if self._samples and self._chunk_started is None:
+            self._chunk_started = time.monotonic()
+
+    def _flush(self) -> None:
+        self._chunk_started = None
+        if not self._samples:
+            return
+        payload = bytearray()
+        _put_varint(payload, len(self._series))
+        first, last = float("inf"), float("-inf")
+        for (device_id, key), series in self._series.items():
+            _encode_series(
+                payload, device_id, key, series.unit, series.times, series.values
+            )
+            first = min(first, series.times[0] / 1000)
+            last = max(last, series.times[-1] / 1000)
+        compressed = zlib.compress(payload)
+        samples = self._samples
+        self._series.clear()
+        self._samples = 0
+
+        try:
+            offset = self._data.tell()
+            self._data.write(
+                _CHUNK_HEADER.pack(
+                    CHUNK_MAGIC,
+                    len(compressed),
+                    first,
+                    last,
+                    samples,
+                    zlib.crc32(compressed),
+                )
+            )
+            self._data.write(compressed)
+            self._data.flush()
+            self._index.write(_INDEX_ENTRY.pack(first, last, offset))
+            self._index.flush()
+        except OSError as e:
+            logger.error(f"Sensor journal write to {self.path} failed: {e}")
+
+
+def _open_for_append(path: str):
+    """Open a journal and its index, cutting off a chunk left half-written."""
+    chunks, valid_end = _read_chunks(path)
+    data = open(path, "r+b" if os.path.exists(path) else "w+b")
+    if valid_end == 0:
+        data.truncate(0)
+        data.write(FILE_MAGIC)
+        valid_end = len(FILE_MAGIC)
+    data.truncate(valid_end)
+    data.seek(valid_end)
+
+    # Rebuild the index when it does not match the chunks found.
+    index = open(path + ".idx", "wb")
+    index.write(b"".join(_INDEX_ENTRY.pack(*chunk) for chunk in chunks))
+    index.flush()
+    return data, index
+
+
+def _read_chunks(path: str) -> Tuple[List[_ChunkInfo], int]:
+    """Valid chunks of a journal and the offset just past the last one."""
+    if not os.path.exists(path) or os.path.getsize(path) < len(FILE_MAGIC):
+        return [], 0
+    with (
+        open(path, "rb") as data,
+        mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        if mm[: len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError(f"{path} is not a sensor journal")
+        chunks = _indexed_chunks(path, len(mm))
+        offset = len(FILE_MAGIC)
+        if chunks:
+            first, last, offset = chunks[-1]
+            size = _chunk_size(mm, offset)
+            if size is None:
+                chunks.pop()
+            else:
+                offset += size
+        # Chunks written after the index was last updated.
+        while True:
+            size = _chunk_size(mm, offset)
+            if size is None:
+                return chunks, offset
+            header = _CHUNK_HEADER.unpack_from(mm, offset)
+            chunks.append((header[2], header[3], offset))
+            offset += size
+
+
+def _indexed_chunks(path: str, data_size: int) -> List[_ChunkInfo]:
+    try:
+        with open(path + ".idx", "rb") as index:
+            raw = index.read()
+    except OSError:
+        return []
+    raw = raw[: len(raw) - len(raw) % _INDEX_ENTRY.size]
+    return [entry for entry in _INDEX_ENTRY.iter_unpack(raw) if entry[2] < data_size]
+
+
+def _chunk_size(mm: mmap.mmap, offset: int) -> Optional[int]:
+    """Size of the complete, intact chunk at offset, or None."""
+    if offset + _CHUNK_HEADER.size > len(mm):
+        return None
+    magic, size, _, _, _, crc = _CHUNK_HEADER.unpack_from(mm, offset)
+    end = offset + _CHUNK_HEADER.size + size
+    if magic != CHUNK_MAGIC or end > len(mm):
+        return None
+    if zlib.crc32(mm[offset + _CHUNK_HEADER.size : end]) != crc:
+        return None
+    return end - offset
+
+
+class JournalReader:
+    """Memory-mapped range reads over a journal, one chunk in memory at a time."""
+
+    def __init__(self, path: str) -> None:
+        self._chunks, self._end = _read_chunks(path)
+        self._file = open(path, "rb")
+        self._mm = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._end
+            else None
+        )
+        # Chunks are written in time order; bisect on their last sample.
+        self._lasts = [last for _, last, _ in self._chunks]
+
+    def __enter__(self) -> "JournalReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def samples(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        device_id: Optional[int] = None,
+    ) -> Iterator[JournalSample]:
+        """Samples between two unix times (inclusive), in time order."""
+        first_chunk = 0 if start is None else bisect_left(self._lasts, start)
+        for first, _, offset in self._chunks[first_chunk:]:
+            if end is not None and first > end:
+                break
+            yield from self._chunk_samples(offset, start, end, device_id)
+
+    def _chunk_samples(
+        self,
+        offset: int,
+        start: Optional[float],
+        end: Optional[float],
+        device_id: Optional[int],
+    ) -> Iterator[JournalSample]:
+        size = _CHUNK_HEADER.unpack_from(self._mm, offset)[1]
+        body = offset + _CHUNK_HEADER.size
+        payload = zlib.decompress(self._mm[body : body + size])
+        count, pos = _get_varint(payload, 0)
+        series = []
+        for _ in range(count):
+            series_device, key, unit, times, values, pos = _decode_series(payload, pos)
+            if device_id is not None and series_device != device_id:
+                continue
+            series.append(
+                _series_samples(series_device, key, unit, times, values, start, end)
+            )
+        yield from heapq.merge(*series)
+
+
+def _series_samples(
+    device_id: int,
+    key: str,
+    unit: str,
+    times: List[float],
+    values: List[float],
+    start: Optional[float],
+    end: Optional[float],
+) -> Iterator[JournalSample]:
+    first = 0 if start is None else bisect_left(times, start)
+    last = len(times) if end is None else bisect_right(times, end)
+    for t, value in zip(times[first:last], values[first:last]):
+        yield t, device_id, key, value, unit
+
+
+def export_csv(
+    path: str,
+    out: TextIO,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    device_id: Optional[int] = None,
+) -> int:
+    """Stream a journal range to CSV; returns the number of rows written."""
+    writer = csv.writer(out)
+    writer.writerow(["time", "device_id", "key", "value", "unit"])
+    rows = 0
+    with JournalReader(path) as reader:
+        for wall_time, sample_device, key, value, unit in reader.samples(
+            start, end, device_id
+        ):
+            stamp = datetime.fromtimestamp(wall_time, timezone.utc)
+            writer.writerow(
+                [
+                    stamp.isoformat(timespec="milliseconds"),
+                    sample_device,
+                    key,
+                    value,
+                    unit,
+                ]
+            )
+            rows += 1
+    return rows
@@ -0,0 +1,248 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from liquidctl_server.models import BadRequestException, LedChannelStats, LedGroupResult
+from liquidctl_server.service.executor import DeviceExecutor
+
+MAX_GROUP_RESULTS: int = 64
+
+# Achieved FPS is the number of frames applied over the last FPS_WINDOW seconds.
+FPS_WINDOW: float = 2.0
+
+Frame = Tuple[str, List[Tuple[int, int, int]]]
+# (channel, mode, colors) written by one device of a frame group.
+GroupFrame = Tuple[str, str, List[Tuple[int, int, int]]]
+
+
+class FrameGroup:
+    """Frames of several devices released together by a barrier."""
+
+    def __init__(self, group: int, device_ids: List[int], sync_timeout: float) -> None:
+        self.barrier = threading.Barrier(len(device_ids), timeout=sync_timeout)
+        self.futures: Dict[int, Future] = {}
+        self.starts: Dict[int, float] = {}
+        self.result = LedGroupResult(group=group, device_ids=device_ids)
+
+    def update(self) -> LedGroupResult:
+        result = self.result
+        result.synced = not self.barrier.broken
+        if len(self.starts) > 1:
+            result.skew = max(self.starts.values()) - min(self.starts.values())
+        result.errors = [
+            f"device #{device_id}: {future.exception()}"
+            for device_id, future in self.futures.items()
+            if future.done() and future.exception() is not None
+        ]
+        result.done = all(future.done() for future in self.futures.values())
+        return result
+
+
+class _LedChannel:
+    def __init__(self, device_id: int, channel: str) -> None:
+        self.channel = channel
+        self.latest: Optional[Frame] = None  # Last frame accepted for the device
+        self.queued: Optional[Future] = None
+        self.applied_at: Deque[float] = deque(maxlen=512)
+        self.stats = LedChannelStats(device_id=device_id, channel=channel)
+
+
+class LedFramePipeline:
+    """
+    Keeps LED frames from piling up in a device queue.
+
+    A frame equal to the last one accepted for the channel (same mode and
+    colors) is dropped, and a new frame cancels the channel's previous one if
+    that has not started yet, so a slow device always shows the newest frame
+    instead of replaying a backlog. The last accepted frame of each channel is
+    also the base that delta frames are applied to.
+    """
+
+    def __init__(self, executor: DeviceExecutor) -> None:
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._channels: Dict[Tuple[int, str], _LedChannel] = {}
+        # Groups are queued atomically so every device sees them in one order;
+        # otherwise two groups could each hold a device the other waits for.
+        self._group_lock = threading.Lock()
+        self._next_group = 1
+        self._groups: Deque[FrameGroup] = deque(maxlen=MAX_GROUP_RESULTS)
+
+    def submit(
+        self,
+        device_id: int,
+        channel: str,
+        mode: str,
+        colors: List[Tuple[int, int, int]],
+        set_color: Callable,
+    ) -> Optional[Future]:
+        """Queue a frame; None if it repeats the current one."""
+        with self._lock:
+            state = self._state(device_id, channel)
+            future, previous = self._queue(device_id, state, (mode, colors), set_color)
+        return self._supersede(state, future, previous)
+
+    def submit_delta(
+        self,
+        device_id: int,
+        channel: str,
+        mode: str,
+        changes: List[Tuple[int, int, int, int]],
+        set_color: Callable,
+    ) -> Optional[Future]:
+        """Queue the current frame of the channel with ``[index, r, g, b]`` changes."""
+        with self._lock:
+            state = self._state(device_id, channel)
+            if state.latest is None:
+                raise BadRequestException(
+                    f"No current frame on channel {channel} to apply changes to"
+                )
+            colors = list(state.latest[1])
+            for index, r, g, b in changes:
+                if not 0 <= index < len(colors):
+                    raise BadRequestException(
+                        f"LED index {index} out of range ({len(colors)} LEDs)"
+                    )
+                colors[index] = (r, g, b)
+            future, previous = self._queue(device_id, state, (mode, colors), set_color)
+        return self._supersede(state, future, previous)
+
+    def submit_group(
+        self,
+        frames: Dict[int, Tuple[Callable, List[GroupFrame]]],
+        sync_timeout: float,
+    ) -> FrameGroup:
+        """Queue one job per device that writes its frames once all have started.
+
+        Each device's job waits at a barrier until every device of the group
+        has reached it, so the writes start together instead of whenever each
+        queue gets to them. A device that is not there within ``sync_timeout``
+        breaks the barrier and the others write without it.
+
+        Group frames become their channels' latest frame when queued, like
+        single frames, and supersede the channels' unstarted single frames.
+        They are never dropped or superseded themselves: every device of the
+        group has to reach the barrier.
+        """
+        superseded: List[Tuple[_LedChannel, Future]] = []
+        with self._group_lock:
+            group = FrameGroup(self._next_group, list(frames), sync_timeout)
+            self._next_group += 1
+            with self._lock:
+                for device_id, (set_color, device_frames) in frames.items():
+                    queued: List[Tuple[_LedChannel, Frame]] = []
+                    for channel, mode, colors in device_frames:
+                        state = self._state(device_id, channel)
+                        state.stats.received += 1
+                        frame = (mode, colors)
+                        state.latest = frame
+                        if state.queued is not None:
+                            superseded.append((state, state.queued))
+                            state.queued = None
+                        queued.append((state, frame))
+                    group.futures[device_id] = self._executor.submit(
+                        device_id,
+                        self._apply_group,
+                        device_id=device_id,
+                        group=group,
+                        set_color=set_color,
+                        frames=queued,
+                    )
+            self._groups.append(group)
+        for state, previous in superseded:
+            self._supersede(state, None, previous)
+        return group
+
+    def group_results(self) -> List[LedGroupResult]:
+        """Sync outcome and skew of the most recent frame groups."""
+        with self._group_lock:
+            return [group.update() for group in self._groups]
+
+    def _apply_group(
+        self,
+        device_id: int,
+        group: FrameGroup,
+        set_color: Callable,
+        frames: List[Tuple[_LedChannel, Frame]],
+    ) -> None:
+        """Executor job: wait for the rest of the group, then write."""
+        try:
+            group.barrier.wait()
+        except threading.BrokenBarrierError:
+            pass  # Another device is late or failed; write anyway
+        group.starts[device_id] = time.monotonic()
+        error: Optional[Exception] = None
+        for state, frame in frames:
+            try:
+                self._apply(state, frame, set_color)
+            except Exception as e:
+                # Still write the device's other channels; the group reports it.
+                error = error or e
+        if error is not None:
+            raise error
+
+    def _queue(
+        self, device_id: int, state: _LedChannel, frame: Frame, set_color: Callable
+    ) -> Tuple[Optional[Future], Optional[Future]]:
+        """Submit a frame under the lock; returns it and the frame it replaces."""
+        state.stats.received += 1
+        if frame == state.latest:
+            state.stats.identical += 1
+            return None, None
+        previous = state.queued
+        future = self._executor.submit(
+            device_id, self._apply, state=state, frame=frame, set_color=set_color
+        )
+        state.latest = frame
+        state.queued = future
+        return future, previous
+
+    def _supersede(
+        self,
+        state: _LedChannel,
+        future: Optional[Future],
+        previous: Optional[Future],
+    ) -> Optional[Future]:
+        # Outside the lock: cancelling runs the done-callbacks synchronously.
+        if previous is not None and previous.cancel():
+            with self._lock:
+                state.stats.superseded += 1
+        return future
+
+    def _state(self, device_id: int, channel: str) -> _LedChannel:
+        state = self._channels.get((device_id, channel))
+        if state is None:
+            state = _LedChannel(device_id, channel)
+            self._channels[(device_id, channel)] = state
+        return state
+
+    def stats(self) -> List[LedChannelStats]:
+        now = time.monotonic()
+        with self._lock:
+            for state in self._channels.values():
+                recent = sum(1 for at in state.applied_at if now - at <= FPS_WINDOW)
+                state.stats.fps = recent / FPS_WINDOW
+            return [state.stats for state in self._channels.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._channels.clear()
+        with self._group_lock:
+            self._groups.clear()
+
+    def _apply(self, state: _LedChannel, frame: Frame, set_color: Callable) -> None:
+        """Executor job: write the frame and account for it."""
+        mode, colors = frame
+        try:
+            set_color(channel=state.channel, mode=mode, colors=colors)
+        except Exception:
+            with self._lock:
+                state.stats.failed += 1
+                if state.latest is frame:
+                    state.latest = None  # Let the same frame be retried
+            raise  # Fails this frame's future only; the device worker carries on
+        with self._lock:
+            state.stats.applied += 1
+            state.applied_at.append(time.monotonic())
@@ -1,9 +1,17 @@
 import logging
+import re
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import wait as wait_futures
 from concurrent.futures import TimeoutError as FuturesTimeoutError
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Pattern, Set, Tuple, Union
 
 import liquidctl
 from liquidctl.driver.base import BaseDriver
+from liquidctl.error import NotSupportedByDevice, NotSupportedByDriver
 from liquidctl.driver.commander_pro import CommanderPro
 from liquidctl.driver.hydro_platinum import HydroPlatinum
 from liquidctl.driver.smart_device import SmartDevice, SmartDevice2
@@ -34,21 +42,100 @@ except ImportError:
     HydroPro = None
 
 from liquidctl_server.models import (
+    AlarmEvent,
+    AlarmRule,
+    AlarmState,
     BadRequestException,
+    BridgeMetrics,
+    ColorTransform,
+    ColorTransformState,
+    ColumnarStatus,
+    CurveState,
+    DeviceCapabilities,
+    DeviceSchema,
     DeviceStatus,
+    DeviceValues,
+    EffectKind,
+    EffectState,
+    FanCurve,
+    HistoryLimits,
+    HistorySeries,
+    LedChannelStats,
+    LedEffect,
+    LedGroupResult,
     LiquidctlException,
+    ProfileTarget,
+    SpeedProfileResult,
+    StatusSelector,
     StatusValue,
+    VirtualSensor,
+    VirtualSensorState,
+    WritePolicy,
+    WriteResult,
+    WriteStats,
+    WriteStatus,
 )
+from liquidctl_server.service.alarms import AlarmEngine
+from liquidctl_server.service.animations import AnimationEngine
+from liquidctl_server.service.color_transform import ColorTransformStage
 from liquidctl_server.service.config import (
+    ALARM_EVENT_LOG_SIZE,
     DEVICE_OPERATION_TIMEOUT,
     DEVICE_STATUS_TIMEOUT,
+    LED_GROUP_SYNC_TIMEOUT,
+    MAX_ALARM_WAIT,
+    MAX_HISTORY_BYTES,
+    MAX_HISTORY_CAPACITY,
+    MAX_HISTORY_SERIES,
     MAX_INIT_RETRIES,
+    METRICS_FILE_INTERVAL,
+    SAMPLE_INTERVAL,
+    journal_path,
     load_device_filter,
+    metrics_file_path,
+    metrics_port,
 )
+from liquidctl_server.service.curves import CurveEngine
+from liquidctl_server.service.device_index import DeviceIndex
 from liquidctl_server.service.executor import DeviceExecutor
+from liquidctl_server.service.history import HistoryStore
+from liquidctl_server.service.journal import SensorJournal
+from liquidctl_server.service.led_frames import GroupFrame, LedFramePipeline
+from liquidctl_server.service.metrics import MetricsRecorder
+from liquidctl_server.service.openmetrics import (
+    MetricsFileWriter,
+    MetricsHttpServer,
+    OpenMetricsExporter,
+)
+from liquidctl_server.service.sampler import StatusSampler
+from liquidctl_server.service.status_table import StatusTable
+from liquidctl_server.service.virtual_sensors import VirtualSensorEngine
+from liquidctl_server.service.write_policy import WritePolicyEngine
+from liquidctl_server.service.writes import WriteTracker
 
 logger = logging.getLogger(__name__)
 
+# Duty status keys -> speed channel names, mirroring Utils.ExtractChannelName in
+# the FanControl plugin (that is how clients derive the channel they write to).
+_DUTY_CHANNEL_PATTERNS: List[Tuple[Pattern[str], str]] = [
+    (re.compile(r"^fan\s*duty$", re.IGNORECASE), "fan"),
+    (re.compile(r"^pump\s*duty$", re.IGNORECASE), "pump"),
+    (re.compile(r"^pump\s*fan\s*duty$", re.IGNORECASE), "pump-fan"),
+    (re.compile(r"^external\s*fan\s*duty$", re.IGNORECASE), "external-fans"),
+    (re.compile(r"^water\s*block\s*duty$", re.IGNORECASE), "waterblock-fan"),
+    (re.compile(r"^fan\s*(\d+)\s*duty$", re.IGNORECASE), "fan{0}"),
+    (re.compile(r"^fan\s*duty\s*(\d+)$", re.IGNORECASE), "fan{0}"),
+]
+
+
+def _duty_channel(status_key: str) -> Optional[str]:
+    """Speed channel a duty status key reports on, if it is one."""
+    for pattern, channel in _DUTY_CHANNEL_PATTERNS:
+        match = pattern.match(status_key)
+        if match:
+            return channel.format(*match.groups())
+    return None
+
 
 class LiquidctlService:
     """Service for managing liquidctl devices with thread-safe operations."""
@@ -56,9 +143,56 @@ class LiquidctlService:
     def __init__(self) -> None:
         self.devices: Dict[int, BaseDriver] = {}
         self.device_status_cache: Dict[int, List[StatusValue]] = {}
+        self.device_status_time: Dict[int, float] = {}
+        # Rows reused across reads; device_status_cache normally points at them.
+        self._status_tables: Dict[int, StatusTable] = {}
         self.speed_channels: Dict[int, List[str]] = {}
         self.previous_duty: Dict[str, Union[str, int, None]] = {}
-        self._executor: DeviceExecutor = DeviceExecutor()
+        self._schema_ids: Dict[Tuple[Tuple[str, str], ...], int] = {}
+        self._capabilities: Optional[List[DeviceCapabilities]] = None
+        # Built on first use; reset to None whenever the inventory changes.
+        self._device_index: Optional[DeviceIndex] = None
+        # Devices whose driver rejected a firmware speed profile at runtime.
+        self._profile_rejected: Set[int] = set()
+        self._refreshes: Dict[int, Future] = {}
+        self._refresh_lock = threading.Lock()
+        self._metrics = MetricsRecorder(
+            queue_depths=lambda: self._executor.queue_depths(),
+            reset_queue_depths=lambda: self._executor.reset_max_depths(),
+        )
+        self._executor: DeviceExecutor = DeviceExecutor(
+            observe=self._metrics.observe_job
+        )
+        self._writes = WriteTracker(timeout=DEVICE_OPERATION_TIMEOUT)
+        self._led_frames = LedFramePipeline(self._executor)
+        self._color_transforms = ColorTransformStage()
+        self._animations = AnimationEngine(
+            submit=self._submit_effect_frame, read_value=self._cached_value
+        )
+        self._write_policy = WritePolicyEngine(flush=self._flush_held_duty)
+        self._curves = CurveEngine(write=self._write_curve_duty)
+        self._history = HistoryStore(HistoryLimits())
+        self._virtual_sensors = VirtualSensorEngine(read_value=self._cached_value)
+        self._alarms = AlarmEngine(ALARM_EVENT_LOG_SIZE)
+        # Called with (device_id, status_values, sampled_at) for every new sample.
+        # The list is updated in place by the next sample: copy what you keep.
+        self._sample_listeners: List[
+            Callable[[int, List[StatusValue], float], None]
+        ] = [self._curves.on_sample, self._alarms.on_sample, self._history.on_sample]
+        self._journal = self._open_journal()
+        if self._journal is not None:
+            self._sample_listeners.append(self._journal.on_sample)
+        self._sampler = StatusSampler(
+            SAMPLE_INTERVAL, demand=self._sampled_devices, sample=self._sample_device
+        )
+        self._exporter = OpenMetricsExporter(
+            self._metrics,
+            queue_depths=lambda: self._executor.queue_depths(),
+            write_stats=self.get_write_stats,
+            led_stats=self.get_led_stats,
+            sensors=self._sensor_readings,
+        )
+        self._metrics_outputs: List[Union[MetricsFileWriter, MetricsHttpServer]] = []
 
     def __enter__(self) -> "LiquidctlService":
         return self
@@ -90,6 +224,9 @@ class LiquidctlService:
 
     def _find_devices(self) -> None:
         """Find all liquidctl devices and connect to them."""
+        self._capabilities = None
+        self._device_index = None
+        self._profile_rejected.clear()
         try:
             found_devices: List[BaseDriver] = list(liquidctl.find_liquidctl_devices())
         except ValueError:
@@ -124,6 +261,7 @@ class LiquidctlService:
                     f"Failed to connect device #{device_id} ({lc_device.description}): {e}"
                 )
 
+        self._device_index = None
         device_names = [d.description for d in self.devices.values()]
         logger.info(f"Devices initialized: {device_names}")
 
@@ -144,41 +282,206 @@ class LiquidctlService:
             else:
                 raise LiquidctlException(f"Device connection error: {err}") from err
 
-    def get_statuses(self) -> List[DeviceStatus]:
-        """Get status for all devices."""
+    def get_statuses(
+        self,
+        include_static: bool = True,
+        select: Optional[StatusSelector] = None,
+        max_age: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> Union[List[DeviceStatus], List[DeviceValues]]:
+        """Get status for all (or the selected) devices.
+
+        Devices excluded by ``select`` are not read over HID at all; key/unit
+        filters also skip devices whose cached layout has nothing selected.
+        With ``max_age``, cached values at most that many seconds old are served
+        without a read (see _get_fresh_enough_device_status).
+        """
         if not self.devices:
             return []
 
         statuses: List[DeviceStatus] = []
         for device_id, lc_device in self.devices.items():
-            status = self._get_current_or_cached_device_status(device_id, lc_device)
-            if status is not None:
-                statuses.append(status)
-
+            if select is not None and not self._is_selected(device_id, select):
+                continue
+            if max_age is None:
+                status = self._get_current_or_cached_device_status(
+                    device_id, lc_device, timeout=timeout
+                )
+            else:
+                status = self._get_fresh_enough_device_status(
+                    device_id, lc_device, max_age, timeout
+                )
+            if status is None:
+                continue
+            if select is not None and select.filters_values():
+                status.status = [v for v in status.status if select.wants_value(v)]
+            statuses.append(status)
+
+        if not include_static:
+            return [DeviceValues(id=s.id, status=s.status, age=s.age) for s in statuses]
         return statuses
 
-    def _get_current_or_cached_device_status(
+    def _is_selected(self, device_id: int, select: StatusSelector) -> bool:
+        if not select.wants_device(device_id):
+            return False
+        cached = self.device_status_cache.get(device_id)
+        if cached is None or not select.filters_values():
+            return True
+        return any(select.wants_value(value) for value in cached)
+
+    def get_capabilities(self) -> List[DeviceCapabilities]:
+        """Static metadata of every device, cached until the inventory changes."""
+        if self._capabilities is None:
+            self._capabilities = [
+                self._get_capabilities(device_id, lc_device)
+                for device_id, lc_device in self.devices.items()
+            ]
+        return self._capabilities
+
+    def _get_capabilities(
         self, device_id: int, lc_device: BaseDriver
+    ) -> DeviceCapabilities:
+        return DeviceCapabilities(
+            id=device_id,
+            description=lc_device.description,
+            driver=type(lc_device).__name__,
+            vendor_id=getattr(lc_device, "vendor_id", None),
+            product_id=getattr(lc_device, "product_id", None),
+            speed_channels=self.speed_channels.get(device_id, []),
+            color_channels=list(getattr(lc_device, "_color_channels", None) or []),
+            color_modes=self._get_color_modes(lc_device),
+            speed_profiles=self._firmware_profiles(device_id, lc_device),
+            led_count=getattr(lc_device, "_led_count", None),
+            mled_count=getattr(lc_device, "_mled_count", None),
+        )
+
+    def get_status_schema(
+        self, select: Optional[StatusSelector] = None
+    ) -> List[DeviceSchema]:
+        """Key/unit layout of every device, for decoding columnar statuses."""
+        return [
+            DeviceSchema(
+                id=status.id,
+                schema_id=self._schema_id(status.status),
+                keys=[value.key for value in status.status],
+                units=[value.unit for value in status.status],
+            )
+            for status in self.get_statuses(select=select)
+        ]
+
+    def get_statuses_columnar(
+        self,
+        fixed_point: Optional[int] = None,
+        select: Optional[StatusSelector] = None,
+        max_age: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> List[ColumnarStatus]:
+        """Get status for all devices as bare value arrays tagged with a schema id."""
+        scale = 10**fixed_point if fixed_point is not None else None
+        columnar: List[ColumnarStatus] = []
+        for status in self.get_statuses(
+            select=select, max_age=max_age, timeout=timeout
+        ):
+            values = [value.value for value in status.status]
+            if scale is not None:
+                values = [None if v is None else round(v * scale) for v in values]
+            columnar.append(
+                ColumnarStatus(
+                    id=status.id,
+                    schema_id=self._schema_id(status.status),
+                    values=values,
+                    age=status.age,
+                )
+            )
+        return columnar
+
+    def _schema_id(self, status_values: List[StatusValue]) -> int:
+        """Stable id of a key/unit layout (content hash, so it survives restarts)."""
+        layout = tuple((value.key, value.unit) for value in status_values)
+        schema_id = self._schema_ids.get(layout)
+        if schema_id is None:
+            schema_id = zlib.crc32(
+                "\x1e".join(f"{key}\x1f{unit}" for key, unit in layout).encode()
+            )
+            self._schema_ids[layout] = schema_id
+        return schema_id
+
+    def _get_current_or_cached_device_status(
+        self, device_id: int, lc_device: BaseDriver, timeout: Optional[float] = None
     ) -> Optional[DeviceStatus]:
         """Get status for a single device, falling back to cache on timeout."""
+        if timeout is None:
+            timeout = DEVICE_STATUS_TIMEOUT
         status_job = self._executor.submit(device_id, lc_device.get_status)
         try:
-            raw_status = status_job.result(timeout=DEVICE_STATUS_TIMEOUT)
-            status_values = self._stringify_status(raw_status)
-            self.device_status_cache[device_id] = status_values
+            raw_status = status_job.result(timeout=timeout)
+            status_values = self._store_reading(device_id, raw_status)
 
             return self._build_device_status(device_id, lc_device, status_values)
 
         except FuturesTimeoutError:
+            self._metrics.count_timeout(device_id)
             return self._handle_status_timeout(device_id, lc_device)
 
         except Exception as e:
             logger.warning(f"Error getting status for device #{device_id}: {e}")
+            self._metrics.count_cache_fallback(device_id)
             return self._build_status_from_cache(device_id, lc_device)
 
         finally:
             status_job.cancel()
 
+    def _get_fresh_enough_device_status(
+        self,
+        device_id: int,
+        lc_device: BaseDriver,
+        max_age: float,
+        timeout: Optional[float] = None,
+    ) -> Optional[DeviceStatus]:
+        """Serve the cache if it is at most max_age old, else revalidate it.
+
+        A stale cache starts (or joins) a background refresh and waits for it
+        only up to ``timeout``; if the refresh is slower the stale values are
+        served and the refresh keeps running to update the cache.
+        """
+        age = self._sample_age(device_id)
+        if age is not None and age <= max_age:
+            return self._build_status_from_cache(device_id, lc_device)
+
+        if timeout is None:
+            timeout = DEVICE_STATUS_TIMEOUT
+        refresh = self._refresh(device_id)
+        try:
+            refresh.result(timeout=timeout)
+        except FuturesTimeoutError:
+            logger.debug(f"Serving stale status for device #{device_id}")
+            self._metrics.count_timeout(device_id)
+            self._metrics.count_cache_fallback(device_id)
+        except Exception as e:
+            logger.warning(f"Error refreshing status for device #{device_id}: {e}")
+            self._metrics.count_cache_fallback(device_id)
+
+        return self._build_status_from_cache(device_id, lc_device)
+
+    def _refresh(
+        self, device_id: int, idle: bool = False, unstarted: bool = False
+    ) -> Future:
+        """Start a cache-updating status read, or join the one in flight.
+
+        An ``idle`` read runs only once the device has no other queued work.
+        With ``unstarted`` a read that is already running is not joined: it
+        may have read the device before a write that has just finished.
+        """
+        with self._refresh_lock:
+            refresh = self._refreshes.get(device_id)
+            if refresh is None or refresh.done() or (unstarted and refresh.running()):
+                submit = self._executor.submit_idle if idle else self._executor.submit
+                refresh = submit(
+                    device_id, self._long_async_status_request, device_id=device_id
+                )
+                self._refreshes[device_id] = refresh
+            return refresh
+
     def _handle_status_timeout(
         self, device_id: int, lc_device: BaseDriver
     ) -> Optional[DeviceStatus]:
@@ -187,32 +490,144 @@ class LiquidctlService:
 
         if self._executor.device_queue_empty(device_id):
             async_job = self._executor.submit(
-                device_id,
-                lambda dev_id=device_id: self._long_async_status_request(dev_id),
+                device_id, self._long_async_status_request, device_id=device_id
             )
 
             if cached is not None:
+                self._metrics.count_cache_fallback(device_id)
                 return cached
 
             try:
                 return async_job.result(timeout=DEVICE_OPERATION_TIMEOUT)
             except FuturesTimeoutError:
                 logger.error(f"Status request timed out for device #{device_id}")
+                self._metrics.count_timeout(device_id)
                 return None
             finally:
                 async_job.cancel()
 
+        if cached is not None:
+            self._metrics.count_cache_fallback(device_id)
         return cached
 
     def _long_async_status_request(self, device_id: int) -> Optional[DeviceStatus]:
         """Long-running async status request that updates the cache."""
         lc_device = self.devices[device_id]
         raw_status = lc_device.get_status()
-        status_values = self._stringify_status(raw_status)
-        self.device_status_cache[device_id] = status_values
+        status_values = self._store_reading(device_id, raw_status)
 
         return self._build_device_status(device_id, lc_device, status_values)
 
+    def _status_table(self, device_id: int) -> StatusTable:
+        table = self._status_tables.get(device_id)
+        if table is None:
+            table = self._status_tables.setdefault(device_id, StatusTable())
+        return table
+
+    def _store_reading(
+        self,
+        device_id: int,
+        raw_status: Optional[List[Tuple[str, Union[str, int, float], str]]],
+    ) -> List[StatusValue]:
+        """Write a driver reading into the device's status table and store it."""
+        table = self._status_table(device_id)
+        with table.lock:
+            status_values, sampled_at = self._publish(
+                device_id, table.update(raw_status)
+            )
+        self._notify_sample(device_id, status_values, sampled_at)
+        return status_values
+
+    def _publish(
+        self, device_id: int, status_values: List[StatusValue]
+    ) -> Tuple[List[StatusValue], float]:
+        """Add the virtual sensors and cache the rows (under the table lock)."""
+        sampled_at = time.monotonic()
+        status_values = self._virtual_sensors.apply(
+            device_id, status_values, sampled_at
+        )
+        self.device_status_cache[device_id] = status_values
+        self.device_status_time[device_id] = sampled_at
+        return status_values, sampled_at
+
+    def _notify_sample(
+        self, device_id: int, status_values: List[StatusValue], sampled_at: float
+    ) -> None:
+        for listener in self._sample_listeners:
+            try:
+                listener(device_id, status_values, sampled_at)
+            except Exception as e:
+                logger.warning(f"Sample listener failed for device #{device_id}: {e}")
+
+    @staticmethod
+    def _open_journal() -> Optional[SensorJournal]:
+        path = journal_path()
+        if path is None:
+            return None
+        try:
+            journal = SensorJournal(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Sensor journal disabled, cannot open {path}: {e}")
+            return None
+        logger.info(f"Journaling sensor samples to {path}")
+        return journal
+
+    def start_metrics_export(self, clients: Callable[[], int]) -> None:
+        """Start the OpenMetrics file and/or endpoint, if configured."""
+        self._exporter.clients = clients
+        path = metrics_file_path()
+        if path is not None:
+            self._metrics_outputs.append(
+                MetricsFileWriter(self._exporter, path, METRICS_FILE_INTERVAL)
+            )
+            logger.info(f"Writing OpenMetrics to {path}")
+        port = metrics_port()
+        if port is not None:
+            try:
+                server = MetricsHttpServer(self._exporter, port)
+            except OSError as e:
+                logger.error(f"Metrics endpoint disabled, cannot listen on {port}: {e}")
+            else:
+                self._metrics_outputs.append(server)
+                logger.info(
+                    f"Serving OpenMetrics on http://127.0.0.1:{server.port}/metrics"
+                )
+
+    def _sensor_readings(self) -> List[Tuple[int, str, float, List[StatusValue]]]:
+        """Latest sample of every device, for the metrics export."""
+        return [
+            (
+                device_id,
+                self.devices[device_id].description,
+                self.device_status_time.get(device_id, 0.0),
+                self._status_table(device_id).snapshot(status_values),
+            )
+            for device_id, status_values in list(self.device_status_cache.items())
+            if device_id in self.devices
+        ]
+
+    def _sampled_devices(self) -> List[int]:
+        """Devices the background sampler keeps fresh."""
+        sources = (
+            self._curves.source_devices()
+            | self._animations.source_devices()
+            | self._alarms.source_devices()
+        )
+        return [device_id for device_id in sources if device_id in self.devices]
+
+    def _sample_device(self, device_id: int) -> None:
+        """Queue a background read unless a client poll already got a recent one."""
+        age = self._sample_age(device_id)
+        if age is None or age >= self._sampler.interval / 2:
+            self._refresh(device_id)
+
+    def _sample_age(self, device_id: int) -> Optional[float]:
+        """Seconds since the cached sample of a device was taken, if any."""
+        sampled_at = self.device_status_time.get(device_id)
+        if sampled_at is None:
+            return None
+        return time.monotonic() - sampled_at
+
     def _build_status_from_cache(
         self, device_id: int, lc_device: BaseDriver
     ) -> Optional[DeviceStatus]:
@@ -226,17 +641,25 @@ class LiquidctlService:
     def _build_device_status(
         self, device_id: int, lc_device: BaseDriver, status_values: List[StatusValue]
     ) -> DeviceStatus:
+        # The cached rows keep changing in place; a response gets a copy.
         return DeviceStatus(
             id=device_id,
             description=lc_device.description,
-            status=status_values,
+            status=self._status_table(device_id).snapshot(status_values),
             speed_channels=self.speed_channels.get(device_id, []),
+            age=self._sample_age(device_id),
         )
 
     def set_fixed_speed(
-        self, device_id: int, speed_kwargs: Dict[str, Union[str, int]]
-    ) -> None:
-        """Set fixed speed for a device channel."""
+        self,
+        device_id: int,
+        speed_kwargs: Dict[str, Union[str, int]],
+        wait: bool = True,
+    ) -> Optional[WriteResult]:
+        """Set fixed speed for a device channel.
+
+        With ``wait=False`` the write is only queued and a ticket is returned.
+        """
         if device_id not in self.devices:
             raise BadRequestException(f"Device with id:{device_id} not found")
 
@@ -244,8 +667,14 @@ class LiquidctlService:
         duty = speed_kwargs.get("duty")
         cache_key = f"{device_id}_{channel}"
 
-        if self.previous_duty.get(cache_key) == duty:
-            return
+        skipped = self._admit_duty(device_id, channel, duty)
+        if skipped is not None:
+            if wait:
+                return None
+            return self._writes.settled(device_id, "set.fixed_speed", skipped)
+
+        if not wait:
+            return self._queue_fixed_speed(device_id, channel, duty)
 
         try:
             lc_device = self.devices[device_id]
@@ -253,12 +682,367 @@ class LiquidctlService:
                 device_id, lc_device.set_fixed_speed, **speed_kwargs
             )
             speed_job.result(timeout=DEVICE_OPERATION_TIMEOUT)
-            self.previous_duty[cache_key] = duty
+            self._apply_written_duty(device_id, cache_key, channel, duty)
 
         except FuturesTimeoutError:
             logger.error(f"Timeout setting speed for device #{device_id}")
+            self._metrics.count_timeout(device_id)
         except Exception as e:
             logger.error(f"Error setting fixed speed for device #{device_id}: {e}")
+        return None
+
+    def set_fixed_speeds(
+        self, device_id: int, speeds: Dict[str, int], wait: bool = True
+    ) -> Optional[WriteResult]:
+        """Set several channels of a device in one executor job.
+
+        Each channel goes through the same dedupe and write policy as
+        set_fixed_speed; the admitted ones are written back to back in a single
+        queue slot.
+        """
+        lc_device = self.devices.get(device_id)
+        if lc_device is None:
+            raise BadRequestException(f"Device with id:{device_id} not found")
+
+        admitted: Dict[str, int] = {}
+        deferred = False
+        for channel, duty in speeds.items():
+            skipped = self._admit_duty(device_id, channel, duty)
+            if skipped is None:
+                admitted[channel] = duty
+            elif skipped is WriteStatus.DEFERRED:
+                deferred = True
+
+        if not admitted:
+            if wait:
+                return None
+            status = WriteStatus.DEFERRED if deferred else WriteStatus.UNCHANGED
+            return self._writes.settled(device_id, "set.fixed_speeds", status)
+
+        speeds_job = self._executor.submit(
+            device_id,
+            self._write_fixed_speeds,
+            device_id=device_id,
+            lc_device=lc_device,
+            speeds=admitted,
+        )
+        if not wait:
+            # Only a batch over the same channels fully replaces a queued one.
+            coalesce_key = f"{device_id}_" + ",".join(sorted(admitted))
+            return self._writes.track(
+                device_id, "set.fixed_speeds", coalesce_key, speeds_job
+            )
+
+        try:
+            speeds_job.result(timeout=DEVICE_OPERATION_TIMEOUT)
+        except FuturesTimeoutError:
+            logger.error(f"Timeout setting speeds for device #{device_id}")
+            self._metrics.count_timeout(device_id)
+        except Exception as e:
+            logger.error(f"Error setting fixed speeds for device #{device_id}: {e}")
+        return None
+
+    def _write_fixed_speeds(
+        self, device_id: int, lc_device: BaseDriver, speeds: Dict[str, int]
+    ) -> None:
+        """Executor job: write every channel, then report the ones that failed."""
+        errors: List[str] = []
+        for channel, duty in speeds.items():
+            try:
+                lc_device.set_fixed_speed(channel=channel, duty=duty)
+            except Exception as e:
+                errors.append(f"{channel}: {e}")
+                continue
+            self._apply_written_duty(device_id, f"{device_id}_{channel}", channel, duty)
+        if errors:
+            raise LiquidctlException("; ".join(errors))
+
+    def _admit_duty(
+        self, device_id: int, channel: str, duty: int
+    ) -> Optional[WriteStatus]:
+        """None if the duty is to be written, else why it is not (see WriteStatus)."""
+        if self.previous_duty.get(f"{device_id}_{channel}") == duty:
+            self._write_policy.release(device_id, channel)
+            return WriteStatus.UNCHANGED
+        if not self._write_policy.admit(device_id, channel, duty):
+            return WriteStatus.DEFERRED
+        return None
+
+    def _queue_fixed_speed(
+        self, device_id: int, channel: str, duty: int, ticket: bool = True
+    ) -> Optional[WriteResult]:
+        """Queue a fixed-speed write without waiting and return its ticket.
+
+        Writes the bridge makes on its own pass ``ticket=False``: they still
+        coalesce with the client's but stay out of get.write_results.
+        """
+        cache_key = f"{device_id}_{channel}"
+        speed_job = self._executor.submit(
+            device_id,
+            self.devices[device_id].set_fixed_speed,
+            channel=channel,
+            duty=duty,
+        )
+
+        def on_success() -> None:
+            self._apply_written_duty(device_id, cache_key, channel, duty)
+
+        if not ticket:
+            self._writes.track_internal(cache_key, speed_job, on_success=on_success)
+            return None
+        return self._writes.track(
+            device_id, "set.fixed_speed", cache_key, speed_job, on_success=on_success
+        )
+
+    def _flush_held_duty(self, device_id: int, channel: str, duty: int) -> None:
+        """Write a duty the policy held back once its delay has expired."""
+        if device_id in self.devices:
+            self._queue_fixed_speed(device_id, channel, duty, ticket=False)
+
+    def set_write_policy(
+        self, device_id: int, channel: Optional[str], policy: WritePolicy
+    ) -> None:
+        """Configure write suppression for a channel or a whole device."""
+        if device_id not in self.devices:
+            raise BadRequestException(f"Device with id:{device_id} not found")
+        if policy.min_delta < 0 or policy.hysteresis < 0:
+            raise BadRequestException("min_delta and hysteresis must be >= 0")
+        if policy.min_interval < 0 or policy.max_delay < 0:
+            raise BadRequestException("min_interval and max_delay must be >= 0")
+        if policy.burst < 1:
+            raise BadRequestException("burst must be >= 1")
+        rate = policy.max_writes_per_second
+        if rate is not None and not rate > 0:
+            raise BadRequestException("max_writes_per_second must be > 0")
+        self._write_policy.set_policy(device_id, channel, policy)
+
+    def set_curve(self, curve: FanCurve) -> None:
+        """Install (or replace) a fan curve and start sampling its source."""
+        source_device_id = curve.source_device_id
+        if source_device_id is None:
+            source_device_id = curve.device_id
+        for device_id in (curve.device_id, source_device_id):
+            if device_id not in self.devices:
+                raise BadRequestException(f"Device with id:{device_id} not found")
+        if not curve.points:
+            raise BadRequestException("Curve needs at least one point")
+        self._curves.set_curve(curve)
+        self._sampler.start()
+
+    def clear_curve(self, device_id: int, channel: str) -> None:
+        """Remove a fan curve; the channel keeps its last duty."""
+        if not self._curves.clear_curve(device_id, channel):
+            raise BadRequestException(
+                f"No curve set for channel {channel} of device #{device_id}"
+            )
+
+    def get_curves(self) -> List[CurveState]:
+        """Installed curves with their last decision and its latency."""
+        return self._curves.curves()
+
+    def set_speed_profile(
+        self,
+        device_id: int,
+        channel: str,
+        profile: List[Tuple[float, int]],
+        source_key: str = "Liquid temperature",
+    ) -> SpeedProfileResult:
+        """Store a speed profile in the device, or run it as a bridge curve.
+
+        Firmware profiles need no further writes; drivers without profile
+        support get an equivalent curve evaluated on ``source_key``.
+        """
+        lc_device = self.devices.get(device_id)
+        if lc_device is None:
+            raise BadRequestException(f"Device with id:{device_id} not found")
+        if not profile:
+            raise BadRequestException("Profile needs at least one point")
+
+        if self._firmware_profiles(device_id, lc_device):
+            profile_job = self._executor.submit(
+                device_id, lc_device.set_speed_profile, channel=channel, profile=profile
+            )
+            try:
+                profile_job.result(timeout=DEVICE_OPERATION_TIMEOUT)
+            except FuturesTimeoutError as err:
+                self._metrics.count_timeout(device_id)
+                raise LiquidctlException(
+                    f"Timeout setting speed profile for device #{device_id}"
+                ) from err
+            except (NotSupportedByDevice, NotSupportedByDriver, NotImplementedError):
+                # Many drivers override set_speed_profile only to refuse it.
+                self._profile_rejected.add(device_id)
+                self._capabilities = None
+                logger.info(
+                    f"Device #{device_id} rejected a {channel} profile, "
+                    "running it in the bridge"
+                )
+            except Exception as err:
+                raise LiquidctlException(
+                    f"Error setting {channel} speed profile for device "
+                    f"#{device_id}: {err}"
+                ) from err
+            else:
+                # The firmware owns the channel now: drop bridge-side state so
+                # neither a curve nor the duty dedupe interferes with it.
+                self._curves.clear_curve(device_id, channel)
+                self._write_policy.release(device_id, channel)
+                self.previous_duty.pop(f"{device_id}_{channel}", None)
+                return SpeedProfileResult(device_id, channel, ProfileTarget.FIRMWARE)
+
+        self.set_curve(
+            FanCurve(
+                device_id=device_id,
+                channel=channel,
+                source_key=source_key,
+                points=profile,
+            )
+        )
+        return SpeedProfileResult(device_id, channel, ProfileTarget.BRIDGE)
+
+    def _write_curve_duty(self, device_id: int, channel: str, duty: int) -> None:
+        """Queue a curve decision through the write policy, without a ticket."""
+        if (
+            device_id in self.devices
+            and self._admit_duty(device_id, channel, duty) is None
+        ):
+            self._queue_fixed_speed(device_id, channel, duty, ticket=False)
+
+    def get_write_stats(self) -> List[WriteStats]:
+        """Applied/deferred/flushed write counters per device channel."""
+        return self._write_policy.stats()
+
+    def _apply_written_duty(
+        self, device_id: int, cache_key: str, channel: str, duty: int
+    ) -> None:
+        """Reflect a successful write in the cache until a read confirms it.
+
+        The matching duty values are marked pending and a low-priority status
+        read is queued behind any regular device work to confirm them.
+        """
+        self.previous_duty[cache_key] = duty
+        with self._status_table(device_id).lock:
+            cached = self.device_status_cache.get(device_id)
+            if not cached:
+                return
+            updated = [
+                StatusValue(
+                    key=value.key, value=float(duty), unit=value.unit, pending=True
+                )
+                if value.unit == "%" and _duty_channel(value.key) == channel
+                else value
+                for value in cached
+            ]
+            if not any(value.pending for value in updated):
+                return
+            self.device_status_cache[device_id] = updated
+        self._refresh(device_id, idle=True, unstarted=True)
+
+    def get_history(
+        self,
+        device_id: int,
+        keys: Optional[List[str]] = None,
+        since: float = 300.0,
+        until: float = 0.0,
+        resolution: Optional[float] = None,
+    ) -> List[HistorySeries]:
+        """Recorded samples of a device, raw or downsampled into buckets."""
+        if device_id not in self.devices:
+            raise BadRequestException(f"Device with id:{device_id} not found")
+        if not 0 <= until < since:
+            raise BadRequestException("History range needs 0 <= until < since")
+        if resolution is not None and resolution <= 0:
+            raise BadRequestException("resolution must be > 0")
+        return self._history.history(device_id, keys, since, until, resolution)
+
+    def set_history_limits(self, limits: HistoryLimits) -> None:
+        """Resize the sensor history; the samples recorded so far are dropped."""
+        if limits.capacity < 1 or limits.max_series < 0:
+            raise BadRequestException("History needs capacity >= 1, max_series >= 0")
+        if limits.capacity > MAX_HISTORY_CAPACITY:
+            raise BadRequestException(f"capacity must be <= {MAX_HISTORY_CAPACITY}")
+        if limits.max_series > MAX_HISTORY_SERIES:
+            raise BadRequestException(f"max_series must be <= {MAX_HISTORY_SERIES}")
+        if limits.capacity * limits.max_series * 16 > MAX_HISTORY_BYTES:
+            raise BadRequestException(
+                f"History limits exceed {MAX_HISTORY_BYTES // 2**20} MB "
+                "(capacity x max_series x 16 bytes)"
+            )
+        self._history.set_limits(limits)
+
+    def set_virtual_sensor(self, sensor: VirtualSensor) -> None:
+        """Declare (or replace) a derived sensor published with a device's status."""
+        if sensor.device_id not in self.devices:
+            raise BadRequestException(f"Device with id:{sensor.device_id} not found")
+        if not sensor.name:
+            raise BadRequestException("Virtual sensor needs a name")
+        table = self._status_tables.get(sensor.device_id)
+        if table is not None and any(row.key == sensor.name for row in table.rows):
+            raise BadRequestException(
+                f"Device #{sensor.device_id} already reports {sensor.name!r}"
+            )
+        if sensor.median is not None and sensor.median < 1:
+            raise BadRequestException("median must be >= 1")
+        if sensor.ema is not None and sensor.ema < 0:
+            raise BadRequestException("ema must be >= 0")
+        if sensor.slew is not None and sensor.slew <= 0:
+            raise BadRequestException("slew must be > 0")
+        try:
+            self._virtual_sensors.set_sensor(sensor)
+        except ValueError as e:
+            raise BadRequestException(str(e)) from None
+
+    def clear_virtual_sensor(self, device_id: int, name: str) -> None:
+        if not self._virtual_sensors.clear_sensor(device_id, name):
+            raise BadRequestException(
+                f"No virtual sensor {name!r} on device #{device_id}"
+            )
+
+    def get_virtual_sensors(self) -> List[VirtualSensorState]:
+        return self._virtual_sensors.sensors()
+
+    def set_alarm(self, rule: AlarmRule) -> None:
+        """Add or replace a threshold alarm on a device reading."""
+        if rule.device_id not in self.devices:
+            raise BadRequestException(f"Device with id:{rule.device_id} not found")
+        if not rule.name:
+            raise BadRequestException("Alarm needs a name")
+        if rule.hysteresis < 0 or rule.debounce < 0:
+            raise BadRequestException("hysteresis and debounce must be >= 0")
+        self._alarms.set_rule(rule)
+        self._sampler.start()
+
+    def clear_alarm(self, name: str) -> None:
+        if not self._alarms.clear_rule(name):
+            raise BadRequestException(f"No alarm named {name!r}")
+
+    def get_alarms(self) -> List[AlarmState]:
+        return self._alarms.alarms()
+
+    def get_alarm_events(self, after: int = 0, wait: float = 0.0) -> List[AlarmEvent]:
+        """Alarm events newer than the ``after`` cursor, waiting up to ``wait`` s."""
+        if after < 0 or wait < 0:
+            raise BadRequestException("after and wait must be >= 0")
+        return self._alarms.events(after, min(wait, MAX_ALARM_WAIT))
+
+    def get_metrics(self, reset: bool = False) -> BridgeMetrics:
+        """Latency percentiles and counters per device operation and command."""
+        return self._metrics.metrics(reset)
+
+    def record_command(
+        self,
+        command: str,
+        decode: float,
+        handle: Optional[float],
+        encode: float,
+        ok: bool,
+    ) -> None:
+        """Record the decode/handle/encode times of one pipe request."""
+        self._metrics.observe_command(command, decode, handle, encode, ok)
+
+    def get_write_results(self) -> List[WriteResult]:
+        """Finished write tickets since the last call, then those still pending."""
+        return self._writes.results()
 
     def log_device_details(self) -> None:
         """Dump everything useful about each device for RGB/debug troubleshooting."""
@@ -292,12 +1076,10 @@ class LiquidctlService:
         logger.info("=== End device inventory ===")
 
     def _resolve_device_id(self, device_match: str) -> Optional[int]:
-        """Find a device id whose description contains device_match (case-insensitive)."""
-        needle = device_match.lower()
-        for device_id, lc_device in self.devices.items():
-            if needle in lc_device.description.lower():
-                return device_id
-        return None
+        """Device id for a description substring or selector (see DeviceIndex)."""
+        if self._device_index is None:
+            self._device_index = DeviceIndex(self.devices)
+        return self._device_index.resolve(device_match)
 
     def set_color(
         self,
@@ -305,8 +1087,12 @@ class LiquidctlService:
         channel: str,
         mode: str,
         colors: List[Tuple[int, int, int]],
-    ) -> None:
-        """Set per-LED colors for a device channel via the serialized queue."""
+        wait: bool = True,
+    ) -> Optional[WriteResult]:
+        """Set per-LED colors for a device channel via the serialized queue.
+
+        With ``wait=False`` the frame is only queued and a ticket is returned.
+        """
         logger.info(
             "set_color RX: device_match=%r channel=%r mode=%r ncolors=%d first=%s last=%s",
             device_match,
@@ -317,6 +1103,78 @@ class LiquidctlService:
             colors[-1] if colors else None,
         )
 
+        device_id, lc_device = self._resolve_led_device(device_match)
+        self._animations.clear_effect(device_id, channel)
+        color_job = self._led_frames.submit(
+            device_id,
+            channel,
+            mode,
+            self._color_transforms.apply(device_id, channel, colors),
+            lc_device.set_color,
+        )
+        return self._await_frame(device_id, channel, mode, len(colors), color_job, wait)
+
+    def update_color(
+        self,
+        device_match: str,
+        channel: str,
+        mode: str,
+        changes: List[Tuple[int, int, int, int]],
+        wait: bool = True,
+    ) -> Optional[WriteResult]:
+        """Apply ``[index, r, g, b]`` changes to the current frame of a channel."""
+        logger.debug(
+            "update_color RX: device_match=%r channel=%r mode=%r nchanges=%d",
+            device_match,
+            channel,
+            mode,
+            len(changes),
+        )
+        device_id, lc_device = self._resolve_led_device(device_match)
+        self._animations.clear_effect(device_id, channel)
+        color_job = self._led_frames.submit_delta(
+            device_id,
+            channel,
+            mode,
+            self._color_transforms.apply_delta(device_id, channel, changes),
+            lc_device.set_color,
+        )
+        return self._await_frame(
+            device_id, channel, mode, len(changes), color_job, wait
+        )
+
+    def set_color_group(
+        self,
+        frames: List[Tuple[str, str, str, List[Tuple[int, int, int]]]],
+        wait: bool = True,
+    ) -> LedGroupResult:
+        """Write ``(device_match, channel, mode, colors)`` frames in sync.
+
+        Every device involved gets one job; the jobs start writing together
+        (see LedFramePipeline.submit_group). The result reports the start skew
+        across devices; with ``wait=False`` it is returned before the writes and
+        the final one is available from get_led_groups.
+        """
+        if not frames:
+            raise BadRequestException("A frame group needs at least one frame")
+        by_device: Dict[int, Tuple[Callable, List[GroupFrame]]] = {}
+        for device_match, channel, mode, colors in frames:
+            device_id, lc_device = self._resolve_led_device(device_match)
+            self._animations.clear_effect(device_id, channel)
+            colors = self._color_transforms.apply(device_id, channel, colors)
+            by_device.setdefault(device_id, (lc_device.set_color, []))[1].append(
+                (channel, mode, colors)
+            )
+
+        group = self._led_frames.submit_group(by_device, LED_GROUP_SYNC_TIMEOUT)
+        if wait:
+            wait_futures(group.futures.values(), timeout=DEVICE_OPERATION_TIMEOUT)
+        return group.update()
+
+    def get_led_groups(self) -> List[LedGroupResult]:
+        return self._led_frames.group_results()
+
+    def _resolve_led_device(self, device_match: str) -> Tuple[int, BaseDriver]:
         device_id = self._resolve_device_id(device_match)
         if device_id is None:
             known = [d.description for d in self.devices.values()]
@@ -326,18 +1184,33 @@ class LiquidctlService:
             raise BadRequestException(f"No device matching '{device_match}'")
 
         lc_device = self.devices[device_id]
-        logger.info(
+        logger.debug(
             "set_color: resolved device #%d -> %s", device_id, lc_device.description
         )
+        return device_id, lc_device
 
-        try:
-            color_job = self._executor.submit(
-                device_id,
-                lc_device.set_color,
-                channel=channel,
-                mode=mode,
-                colors=colors,
+    def _await_frame(
+        self,
+        device_id: int,
+        channel: str,
+        mode: str,
+        ncolors: int,
+        color_job: Optional[Future],
+        wait: bool,
+    ) -> Optional[WriteResult]:
+        """Wait for a queued frame, or return its ticket with ``wait=False``."""
+        if color_job is None:
+            logger.debug("set_color: identical frame for channel=%r dropped", channel)
+            if wait:
+                return None
+            return self._writes.settled(device_id, "set.led", WriteStatus.UNCHANGED)
+
+        if not wait:
+            return self._writes.track(
+                device_id, "set.led", f"{device_id}_{channel}_led", color_job
             )
+
+        try:
             color_job.result(timeout=DEVICE_OPERATION_TIMEOUT)
             logger.info(
                 "set_color: applied channel=%r mode=%r on device #%d",
@@ -346,17 +1219,103 @@ class LiquidctlService:
                 device_id,
             )
 
+        except CancelledError:
+            logger.debug("set_color: frame for channel=%r superseded", channel)
         except FuturesTimeoutError:
             logger.error(f"Timeout setting color for device #{device_id}")
+            self._metrics.count_timeout(device_id)
         except Exception as e:
             logger.exception(
                 "set_color FAILED on device #%d (channel=%r mode=%r ncolors=%d): %s",
                 device_id,
                 channel,
                 mode,
-                len(colors),
+                ncolors,
                 e,
             )
+        return None
+
+    def set_effect(self, effect: LedEffect) -> None:
+        """Start rendering an effect in the bridge; replaces the channel's effect."""
+        if effect.leds < 1 or effect.fps <= 0 or effect.period <= 0:
+            raise BadRequestException("Effect needs leds >= 1, fps > 0 and period > 0")
+        if effect.kind is EffectKind.KEYFRAMES:
+            if not effect.keyframes or any(
+                len(frame) not in (1, effect.leds) for frame in effect.keyframes
+            ):
+                raise BadRequestException(
+                    "Keyframes need one color or one color per LED each"
+                )
+        elif not effect.colors:
+            raise BadRequestException(f"A {effect.kind.value} effect needs colors")
+        if effect.kind is EffectKind.TEMPERATURE and effect.high <= effect.low:
+            raise BadRequestException("Effect needs high > low")
+
+        device_id, _ = self._resolve_led_device(effect.device)
+        self._animations.set_effect(device_id, effect)
+        if effect.kind is EffectKind.TEMPERATURE:
+            self._sampler.start()
+
+    def clear_effect(self, device_match: str, channel: str) -> None:
+        """Stop a bridge-rendered effect; the LEDs keep their last frame."""
+        device_id, _ = self._resolve_led_device(device_match)
+        if not self._animations.clear_effect(device_id, channel):
+            raise BadRequestException(
+                f"No effect running on channel {channel} of device #{device_id}"
+            )
+
+    def get_effects(self) -> List[EffectState]:
+        return self._animations.effects()
+
+    def _submit_effect_frame(
+        self,
+        device_id: int,
+        channel: str,
+        mode: str,
+        colors: List[Tuple[int, int, int]],
+    ) -> Optional[Future]:
+        lc_device = self.devices.get(device_id)
+        if lc_device is None:
+            return None
+        return self._led_frames.submit(
+            device_id,
+            channel,
+            mode,
+            self._color_transforms.apply(device_id, channel, colors),
+            lc_device.set_color,
+        )
+
+    def _cached_value(self, device_id: int, key: str) -> Optional[float]:
+        for value in self.device_status_cache.get(device_id, ()):
+            if value.key == key:
+                return value.value
+        return None
+
+    def set_color_transform(
+        self, device_match: str, channel: Optional[str], transform: ColorTransform
+    ) -> None:
+        """Correct the colours of every later frame sent to a channel or device."""
+        if not 0.0 <= transform.brightness <= 1.0:
+            raise BadRequestException("brightness must be between 0 and 1")
+        if transform.gamma <= 0:
+            raise BadRequestException("gamma must be > 0")
+        if transform.temperature is not None and not (
+            1000 <= transform.temperature <= 40000
+        ):
+            raise BadRequestException("temperature must be between 1000 and 40000 K")
+        if sorted(transform.channel_order) != ["b", "g", "r"]:
+            raise BadRequestException(
+                f"channel_order must be a permutation of 'rgb', got {transform.channel_order!r}"
+            )
+        device_id, _ = self._resolve_led_device(device_match)
+        self._color_transforms.set_transform(device_id, channel, transform)
+
+    def get_color_transforms(self) -> List[ColorTransformState]:
+        return self._color_transforms.transforms()
+
+    def get_led_stats(self) -> List[LedChannelStats]:
+        """Frame counters and achieved FPS per LED channel."""
+        return self._led_frames.stats()
 
     def disconnect_all(self) -> None:
         """Disconnect all devices."""
@@ -369,12 +1328,57 @@ class LiquidctlService:
 
     def shutdown(self) -> None:
         """Disconnect all devices and cleanup resources."""
+        for output in self._metrics_outputs:
+            output.close()
+        self._metrics_outputs.clear()
+        self._sampler.stop()
+        self._animations.stop()
+        self._animations.clear()
+        self._curves.clear()
+        self._history.clear()
+        self._virtual_sensors.clear()
+        self._alarms.clear()
+        if self._journal is not None:
+            self._journal.close()
+            self._sample_listeners.remove(self._journal.on_sample)
+            self._journal = None
         self.disconnect_all()
         self._executor.shutdown()
         self.devices.clear()
         self.device_status_cache.clear()
+        self.device_status_time.clear()
+        self._status_tables.clear()
+        self._refreshes.clear()
+        self._writes.clear()
+        self._led_frames.clear()
+        self._color_transforms.clear()
+        self._write_policy.clear()
         self.speed_channels.clear()
         self.previous_duty.clear()
+        self._schema_ids.clear()
+        self._capabilities = None
+        self._device_index = None
+        self._profile_rejected.clear()
+
+    def _firmware_profiles(self, device_id: int, lc_device: BaseDriver) -> bool:
+        return device_id not in self._profile_rejected and (
+            self._supports_speed_profile(lc_device)
+        )
+
+    @staticmethod
+    def _supports_speed_profile(lc_device: BaseDriver) -> bool:
+        """Whether the driver may store a speed profile in the device.
+
+        Some drivers only refuse at call time; set_speed_profile remembers those.
+        """
+        # Kraken X (2nd gen) decides per firmware version.
+        supports = getattr(lc_device, "supports_cooling_profiles", None)
+        if supports is not None:
+            return bool(supports)
+        if isinstance(lc_device, (SmartDevice2, SmartDevice)):
+            return False  # Overridden only to raise NotSupportedByDevice
+        method = getattr(type(lc_device), "set_speed_profile", None)
+        return method is not None and method is not BaseDriver.set_speed_profile
 
     @staticmethod
     def _get_speed_channels(lc_device: BaseDriver) -> List[str]:
@@ -402,22 +1406,10 @@ class LiquidctlService:
         return []
 
     @staticmethod
-    def _stringify_status(
-        statuses: Union[List[Tuple[str, Union[str, int, float], str]], None],
-    ) -> List[StatusValue]:
-        """Convert raw liquidctl status to StatusValue list."""
-        if statuses is None:
-            return []
-
-        result: List[StatusValue] = []
-        for status in statuses:
-            try:
-                value = float(status[1])
-            except (ValueError, TypeError):
-                value = None
-
-            result.append(
-                StatusValue(key=str(status[0]), value=value, unit=str(status[2]))
-            )
-
-        return result
+    def _get_color_modes(lc_device: BaseDriver) -> List[str]:
+        """Colour modes, declared per class by some drivers and per module by others."""
+        modes = getattr(lc_device, "_COLOR_MODES", None)
+        if modes is None:
+            driver_module = sys.modules.get(type(lc_device).__module__)
+            modes = getattr(driver_module, "_COLOR_MODES", None)
+        return list(modes or [])
@@ -0,0 +1,261 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict, List, Optional, Tuple
+
+from liquidctl_server.models import (
+    BridgeMetrics,
+    CommandMetrics,
+    DeviceMetrics,
+    LatencySummary,
+    OperationMetrics,
+)
+
+# Bucket upper bounds from 1 us to ~100 s, 8 per doubling: a percentile is
+# reported as its bucket's bound, so it is at most ~9% high.
+BUCKET_BOUNDS: List[float] = [1e-6 * 2 ** (n / 8) for n in range(214)]
+
+# ("operation", device_id, name) or ("command", name).
+SeriesKey = Tuple[Any, ...]
+
+# Executor jobs that wrap a driver call, by the driver operation they time.
+OPERATION_NAMES: Dict[str, str] = {
+    "_long_async_status_request": "get_status",
+    # One job writes every channel of a batch: timed as its own operation.
+    "_write_fixed_speeds": "set_fixed_speeds",
+    "_apply": "set_color",
+    "_apply_group": "set_color",
+}
+
+
+class LatencyHistogram:
+    """Log-bucketed latencies: O(log buckets) to record, fixed memory."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples."""
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else math.inf
+                return min(bound, self.max)
+        return self.max
+
+    def copy(self) -> "LatencyHistogram":
+        histogram = LatencyHistogram()
+        histogram.counts = self.counts.copy()
+        histogram.count, histogram.total, histogram.max = (
+            self.count,
+            self.total,
+            self.max,
+        )
+        return histogram
+
+    def summary(self) -> LatencySummary:
+        if not self.count:
+            return LatencySummary()
+        return LatencySummary(
+            count=self.count,
+            mean=self.total / self.count,
+            p50=self.percentile(0.50),
+            p95=self.percentile(0.95),
+            p99=self.percentile(0.99),
+            max=self.max,
+        )
+
+
+class _Operation:
+    def __init__(self) -> None:
+        self.queue_wait = LatencyHistogram()
+        self.driver = LatencyHistogram()
+        self.errors = 0
+
+    @property
+    def phases(self) -> Dict[str, LatencyHistogram]:
+        return {"queue": self.queue_wait, "driver": self.driver}
+
+
+class _Command:
+    def __init__(self) -> None:
+        self.decode = LatencyHistogram()
+        self.handle = LatencyHistogram()
+        self.encode = LatencyHistogram()
+        self.errors = 0
+
+    @property
+    def phases(self) -> Dict[str, LatencyHistogram]:
+        return {"decode": self.decode, "handle": self.handle, "encode": self.encode}
+
+
+class MetricsRecorder:
+    """
+    Latency histograms and counters of device operations and commands.
+
+    Device jobs report their queue wait and driver time from the executor's
+    worker threads, and the server reports decode/handle/encode times of each
+    command. Recording takes one short lock and allocates nothing once an
+    operation or command has been seen.
+    """
+
+    def __init__(
+        self,
+        queue_depths: Callable[[], Dict[int, Tuple[int, int]]],
+        reset_queue_depths: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._queue_depths = queue_depths
+        self._reset_queue_depths = reset_queue_depths
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        # Bumped by every reset, so exporters know to drop what they cached.
+        self.generation = 0
+        self._operations: DefaultDict[Tuple[int, str], _Operation] = defaultdict(
+            _Operation
+        )
+        self._commands: DefaultDict[str, _Command] = defaultdict(_Command)
+        self._timeouts: DefaultDict[int, int] = defaultdict(int)
+        self._cache_fallbacks: DefaultDict[int, int] = defaultdict(int)
+
+    def observe_job(
+        self, device_id: int, fn_name: str, queue_wait: float, driver: float, ok: bool
+    ) -> None:
+        operation_name = OPERATION_NAMES.get(fn_name, fn_name)
+        with self._lock:
+            operation = self._operations[(device_id, operation_name)]
+            operation.queue_wait.record(queue_wait)
+            operation.driver.record(driver)
+            if not ok:
+                operation.errors += 1
+
+    def observe_command(
+        self,
+        command: str,
+        decode: float,
+        handle: Optional[float],
+        encode: float,
+        ok: bool,
+    ) -> None:
+        """Times of one request; ``handle`` is None when it did not decode."""
+        with self._lock:
+            timings = self._commands[command]
+            timings.decode.record(decode)
+            if handle is not None:
+                timings.handle.record(handle)
+            timings.encode.record(encode)
+            if not ok:
+                timings.errors += 1
+
+    def count_timeout(self, device_id: int) -> None:
+        with self._lock:
+            self._timeouts[device_id] += 1
+
+    def count_cache_fallback(self, device_id: int) -> None:
+        with self._lock:
+            self._cache_fallbacks[device_id] += 1
+
+    def changed_series(
+        self, seen: Dict[SeriesKey, int]
+    ) -> List[Tuple[SeriesKey, int, Dict[str, LatencyHistogram], int]]:
+        """Copies of the series recorded into since ``seen`` (key -> count).
+
+        Each entry is (key, count, histograms by phase, errors); only the
+        changed series are copied, so an idle bridge costs an exporter nothing.
+        """
+        with self._lock:
+            series = [
+                (("operation", device_id, name), operation)
+                for (device_id, name), operation in self._operations.items()
+            ] + [
+                (("command", name), command) for name, command in self._commands.items()
+            ]
+            changed = []
+            for key, timings in series:
+                phases = timings.phases
+                count = next(iter(phases.values())).count
+                if seen.get(key) != count:
+                    changed.append(
+                        (
+                            key,
+                            count,
+                            {phase: h.copy() for phase, h in phases.items()},
+                            timings.errors,
+                        )
+                    )
+            return changed
+
+    def device_counters(self) -> Dict[int, Tuple[int, int]]:
+        """Timeouts and cache fallbacks per device."""
+        with self._lock:
+            return {
+                device_id: (
+                    self._timeouts.get(device_id, 0),
+                    self._cache_fallbacks.get(device_id, 0),
+                )
+                for device_id in self._timeouts.keys() | self._cache_fallbacks.keys()
+            }
+
+    def metrics(self, reset: bool = False) -> BridgeMetrics:
+        depths = self._queue_depths()
+        with self._lock:
+            result = BridgeMetrics(
+                uptime=time.monotonic() - self._started,
+                devices=[
+                    DeviceMetrics(
+                        device_id=device_id,
+                        queue_depth=depths.get(device_id, (0, 0))[0],
+                        max_queue_depth=depths.get(device_id, (0, 0))[1],
+                        timeouts=self._timeouts.get(device_id, 0),
+                        cache_fallbacks=self._cache_fallbacks.get(device_id, 0),
+                    )
+                    for device_id in sorted(
+                        depths.keys()
+                        | self._timeouts.keys()
+                        | self._cache_fallbacks.keys()
+                    )
+                ],
+                operations=[
+                    OperationMetrics(
+                        device_id=device_id,
+                        operation=name,
+                        queue_wait=operation.queue_wait.summary(),
+                        driver=operation.driver.summary(),
+                        errors=operation.errors,
+                    )
+                    for (device_id, name), operation in sorted(self._operations.items())
+                ],
+                commands=[
+                    CommandMetrics(
+                        command=name,
+                        decode=command.decode.summary(),
+                        handle=command.handle.summary(),
+                        encode=command.encode.summary(),
+                        errors=command.errors,
+                    )
+                    for name, command in sorted(self._commands.items())
+                ],
+            )
+            if reset:
+                self.generation += 1
+                self._started = time.monotonic()
+                self._operations.clear()
+                self._commands.clear()
+                self._timeouts.clear()
+                self._cache_fallbacks.clear()
+        if reset and self._reset_queue_depths is not None:
+            self._reset_queue_depths()  # The max_queue_depth high-water marks
+        return result
@@ -0,0 +1,358 @@
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from liquidctl_server.models import LedChannelStats, StatusValue, WriteStats
+from liquidctl_server.service.metrics import (
+    BUCKET_BOUNDS,
+    LatencyHistogram,
+    MetricsRecorder,
+    SeriesKey,
+)
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = "liquidctl_bridge"
+
+# Exported histogram buckets: every 8th recorded bound (1 us, 2 us, 4 us, ...),
+# so the cumulative counts stay exact while a series keeps ~30 lines.
+_EXPORTED_BOUNDS: List[Tuple[int, str]] = [
+    (index, repr(BUCKET_BOUNDS[index])) for index in range(0, len(BUCKET_BOUNDS), 8)
+]
+
+# (device_id, description, sampled_at, rows) for every device with a sample.
+SensorSource = Callable[[], Iterable[Tuple[int, str, float, List[StatusValue]]]]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_float(value: float) -> str:
+    """A sample value: repr() except for the spellings OpenMetrics requires."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _labels(**labels: object) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _family(name: str, kind: str, help_text: str, samples: Iterable[str]) -> str:
+    return f"# TYPE {name} {kind}\n# HELP {name} {help_text}\n" + "".join(samples)
+
+
+def _histogram_lines(name: str, labels: str, histogram: LatencyHistogram) -> str:
+    lines = []
+    counts = histogram.counts
+    cumulative = 0
+    last = 0
+    for index, bound in _EXPORTED_BOUNDS:
+        cumulative += sum(counts[last : index + 1])
+        last = index + 1
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}\n')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}\n')
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}\n")
+    lines.append(f"{name}_sum{{{labels}}} {_format_float(histogram.total)}\n")
+    return "".join(lines)
+
+
+class OpenMetricsExporter:
+    """
+    Renders bridge metrics and current sensor values as OpenMetrics text.
+
+    Rendering is incremental: the text of each latency series is cached and
+    rebuilt only when it recorded something new, and a device's sensor lines
+    only when it has a new sample. Inputs are copied under the owners' short
+    locks, so device workers never wait on a render; renders run on the
+    exporter's own threads (file writer, HTTP handler).
+    """
+
+    def __init__(
+        self,
+        metrics: MetricsRecorder,
+        queue_depths: Callable[[], Dict[int, Tuple[int, int]]],
+        write_stats: Callable[[], List[WriteStats]],
+        led_stats: Callable[[], List[LedChannelStats]],
+        sensors: SensorSource,
+    ) -> None:
+        self._metrics = metrics
+        self._queue_depths = queue_depths
+        self._write_stats = write_stats
+        self._led_stats = led_stats
+        self._sensors = sensors
+        self.clients: Callable[[], int] = lambda: 0
+        self._lock = threading.Lock()
+        self._generation = -1
+        self._seen: Dict[SeriesKey, int] = {}
+        # Rendered text per series: operation/command latencies and errors.
+        self._latency_text: Dict[SeriesKey, str] = {}
+        self._error_text: Dict[SeriesKey, str] = {}
+        # Per device: (rows, sampled_at) the text was rendered from, and it.
+        self._sensor_text: Dict[int, Tuple[List[StatusValue], float, str]] = {}
+
+    def render(self) -> bytes:
+        with self._lock:
+            self._update_latencies()
+            families = [
+                _family(
+                    f"{PREFIX}_operation_seconds",
+                    "histogram",
+                    "Device job latency by phase: queue wait or driver time.",
+                    (
+                        text
+                        for key, text in sorted(self._latency_text.items())
+                        if key[0] == "operation"
+                    ),
+                ),
+                _family(
+                    f"{PREFIX}_operation_errors",
+                    "counter",
+                    "Device jobs that raised.",
+                    (
+                        text
+                        for key, text in sorted(self._error_text.items())
+                        if key[0] == "operation"
+                    ),
+                ),
+                _family(
+                    f"{PREFIX}_command_seconds",
+                    "histogram",
+                    "Pipe command latency by phase: decode, handle or encode.",
+                    (
+                        text
+                        for key, text in sorted(self._latency_text.items())
+                        if key[0] == "command"
+                    ),
+                ),
+                _family(
+                    f"{PREFIX}_command_errors",
+                    "counter",
+                    "Pipe commands answered with an error.",
+                    (
+                        text
+                        for key, text in sorted(self._error_text.items())
+                        if key[0] == "command"
+                    ),
+                ),
+                *self._device_families(),
+                *self._write_families(),
+                *self._led_families(),
+                _family(
+                    f"{PREFIX}_clients",
+                    "gauge",
+                    "Connected pipe clients.",
+                    [f"{PREFIX}_clients {self.clients()}\n"],
+                ),
+                _family(
+                    f"{PREFIX}_sensor",
+                    "gauge",
+                    "Latest sensor reading (virtual sensors included).",
+                    self._sensor_lines(),
+                ),
+            ]
+        return ("".join(families) + "# EOF\n").encode()
+
+    def _update_latencies(self) -> None:
+        if self._metrics.generation != self._generation:
+            self._generation = self._metrics.generation
+            self._seen.clear()
+            self._latency_text.clear()
+            self._error_text.clear()
+        for key, count, phases, errors in self._metrics.changed_series(self._seen):
+            self._seen[key] = count
+            if key[0] == "operation":
+                _, device_id, operation = key
+                name = f"{PREFIX}_operation"
+                labels = _labels(device=device_id, operation=operation)
+            else:
+                name = f"{PREFIX}_command"
+                labels = _labels(command=key[1])
+            self._latency_text[key] = "".join(
+                _histogram_lines(
+                    f"{name}_seconds", f'{labels},phase="{phase}"', histogram
+                )
+                for phase, histogram in phases.items()
+            )
+            self._error_text[key] = f"{name}_errors_total{{{labels}}} {errors}\n"
+
+    def _device_families(self) -> List[str]:
+        depths = self._queue_depths()
+        counters = self._metrics.device_counters()
+        devices = sorted(depths.keys() | counters.keys())
+        return [
+            _family(
+                f"{PREFIX}_queue_depth",
+                "gauge",
+                "Jobs waiting in the device queue.",
+                [
+                    f'{PREFIX}_queue_depth{{device="{d}"}} {depths[d][0]}\n'
+                    for d in devices
+                    if d in depths
+                ],
+            ),
+            _family(
+                f"{PREFIX}_queue_depth_max",
+                "gauge",
+                "Most jobs seen waiting in the device queue.",
+                [
+                    f'{PREFIX}_queue_depth_max{{device="{d}"}} {depths[d][1]}\n'
+                    for d in devices
+                    if d in depths
+                ],
+            ),
+            _family(
+                f"{PREFIX}_timeouts",
+                "counter",
+                "Waits for a device job that timed out.",
+                [
+                    f'{PREFIX}_timeouts_total{{device="{d}"}} '
+                    f"{counters.get(d, (0, 0))[0]}\n"
+                    for d in devices
+                ],
+            ),
+            _family(
+                f"{PREFIX}_cache_fallbacks",
+                "counter",
+                "Status reads answered from cache after a failed or late read.",
+                [
+                    f'{PREFIX}_cache_fallbacks_total{{device="{d}"}} '
+                    f"{counters.get(d, (0, 0))[1]}\n"
+                    for d in devices
+                ],
+            ),
+        ]
+
+    def _write_families(self) -> List[str]:
+        lines = []
+        for stats in self._write_stats():
+            for outcome in ("applied", "deferred", "flushed"):
+                labels = _labels(
+                    device=stats.device_id, channel=stats.channel, outcome=outcome
+                )
+                lines.append(
+                    f"{PREFIX}_writes_total{{{labels}}} {getattr(stats, outcome)}\n"
+                )
+        return [
+            _family(
+                f"{PREFIX}_writes",
+                "counter",
+                "Duty writes by write-policy outcome.",
+                lines,
+            )
+        ]
+
+    def _led_families(self) -> List[str]:
+        frames, fps = [], []
+        for stats in self._led_stats():
+            channel = _labels(device=stats.device_id, channel=stats.channel)
+            for outcome in ("received", "applied", "identical", "superseded", "failed"):
+                frames.append(
+                    f'{PREFIX}_led_frames_total{{{channel},outcome="{outcome}"}} '
+                    f"{getattr(stats, outcome)}\n"
+                )
+            fps.append(f"{PREFIX}_led_fps{{{channel}}} {_format_float(stats.fps)}\n")
+        return [
+            _family(
+                f"{PREFIX}_led_frames", "counter", "LED frames by outcome.", frames
+            ),
+            _family(
+                f"{PREFIX}_led_fps", "gauge", "LED frames applied per second.", fps
+            ),
+        ]
+
+    def _sensor_lines(self) -> List[str]:
+        texts = []
+        rendered: Dict[int, Tuple[List[StatusValue], float, str]] = {}
+        for device_id, description, sampled_at, rows in self._sensors():
+            cached = self._sensor_text.get(device_id)
+            if cached is None or cached[1] != sampled_at or cached[0] != rows:
+                text = "".join(
+                    f"{PREFIX}_sensor{{"
+                    f"{_labels(device=device_id, description=description, key=row.key, unit=row.unit)}"
+                    f"}} {_format_float(row.value)}\n"
+                    for row in rows
+                    if row.value is not None
+                )
+                cached = (rows, sampled_at, text)
+            rendered[device_id] = cached
+            texts.append(cached[2])
+        # Devices gone since the last render drop out with their text.
+        self._sensor_text = rendered
+        return texts
+
+
+class MetricsFileWriter:
+    """Rewrites an OpenMetrics file every ``interval`` seconds, atomically."""
+
+    def __init__(
+        self, exporter: OpenMetricsExporter, path: str, interval: float
+    ) -> None:
+        self._exporter = exporter
+        self._path = path
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-file", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self._interval + 1.0)
+
+    def write(self) -> None:
+        # Readers see the old file or the new one, never a partial write.
+        temporary = f"{self._path}.tmp"
+        with open(temporary, "wb") as out:
+            out.write(self._exporter.render())
+        os.replace(temporary, self._path)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Cannot write metrics to {self._path}: {e}")
+            if self._stop.wait(self._interval):
+                return
+
+
+class MetricsHttpServer:
+    """Serves ``GET /metrics`` on a localhost port from its own threads."""
+
+    def __init__(self, exporter: OpenMetricsExporter, port: int) -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                logger.debug(f"metrics endpoint: {format % args}")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self.port: int = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=1.0)
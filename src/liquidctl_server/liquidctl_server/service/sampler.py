@@ -0,0 +1,56 @@
+import logging
+import threading
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StatusSampler:
+    """
+    Background thread that keeps the status cache of in-demand devices fresh.
+
+    Each tick asks ``demand`` which devices somebody needs (curve sources,
+    ...) and calls ``sample`` for them. ``sample`` only queues a read on the
+    device's executor, so a slow device never holds up the others, and the
+    loop keeps running when no client is polling.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        demand: Callable[[], Iterable[int]],
+        sample: Callable[[int], None],
+    ) -> None:
+        self.interval = interval
+        self._demand = demand
+        self._sample = sample
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="status-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for device_id in list(self._demand()):
+                try:
+                    self._sample(device_id)
+                except Exception as e:
+                    logger.warning(f"Sampling device #{device_id} failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,74 @@
+import sys
+import threading
+from typing import Iterable, List, Optional, Tuple, Union
+
+from liquidctl_server.models import StatusValue
+
+RawStatus = Tuple[str, Union[str, int, float], str]
+
+# Shallow struct copy: cheaper than rebuilding the row from its fields.
+_copy_row = StatusValue.__copy__
+
+
+def _number(value: Union[str, int, float]) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class StatusTable:
+    """
+    The cached status rows of one device, updated in place from driver tuples.
+
+    Drivers report the same keys and units in the same order on every read, so
+    the rows (with interned key and unit strings) are built once per layout and
+    each later read only overwrites their values: a background read, and the
+    sample listeners fed by it, allocate no new objects beyond the floats
+    themselves. A read whose keys or units differ rebuilds the rows.
+
+    The row list is shared: every sample of the device returns the same list,
+    so a consumer that keeps values past the sample has to copy them. Writers
+    of a device's published rows hold ``lock``; ``snapshot`` copies them
+    under it, so a response never mixes two samples. Client responses are
+    therefore not allocation-free: each one copies the rows it returns.
+    """
+
+    def __init__(self) -> None:
+        # Client polls and background reads of one device may finish together.
+        # Reentrant: the service holds it across update() and its own writes.
+        self.lock = threading.RLock()
+        self.rows: List[StatusValue] = []
+
+    def update(self, statuses: Optional[Iterable[RawStatus]]) -> List[StatusValue]:
+        """Store a fresh driver reading and return the rows."""
+        if statuses is None:
+            statuses = ()
+        if not isinstance(statuses, (list, tuple)):
+            statuses = list(statuses)
+
+        with self.lock:
+            rows = self.rows
+            if len(statuses) != len(rows):
+                return self._rebuild(statuses)
+            for row, (key, value, unit) in zip(rows, statuses):
+                if row.key != key or row.unit != unit:
+                    return self._rebuild(statuses)
+                row.value = _number(value)
+            return rows
+
+    def snapshot(self, rows: List[StatusValue]) -> List[StatusValue]:
+        """Copies of ``rows``: this table's, or a published list built on them."""
+        with self.lock:
+            return list(map(_copy_row, rows))
+
+    def _rebuild(self, statuses: Iterable[RawStatus]) -> List[StatusValue]:
+        self.rows = [
+            StatusValue(
+                key=sys.intern(str(key)),
+                value=_number(value),
+                unit=sys.intern(str(unit)),
+            )
+            for key, value, unit in statuses
+        ]
+        return self.rows
@@ -0,0 +1,220 @@
+import ast
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from liquidctl_server.models import StatusValue, VirtualSensor, VirtualSensorState
+
+# (device id, key); device id None is the sensor's own device.
+Reference = Tuple[Optional[int], str]
+
+_REFERENCE = re.compile(r"\{(?:#(\d+):)?([^{}]+)\}")
+_FUNCTIONS = {
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "avg": lambda *values: sum(values) / len(values),
+}
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.UAdd,
+    ast.USub,
+)
+
+
+def compile_expression(
+    expression: str,
+) -> Tuple[Callable[..., float], List[Reference]]:
+    """Compile a sensor expression into a function of its references' values.
+
+    Raises ValueError for anything beyond arithmetic on numbers, references and
+    the few allowed functions.
+    """
+    references: List[Reference] = []
+
+    def placeholder(match: "re.Match[str]") -> str:
+        device_id = int(match.group(1)) if match.group(1) else None
+        references.append((device_id, match.group(2)))
+        return f"_v{len(references) - 1}"
+
+    source = _REFERENCE.sub(placeholder, expression)
+    if not references:
+        raise ValueError(f"Expression {expression!r} reads no sensor")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression {expression!r}: {e.msg}") from None
+
+    arguments = {f"_v{n}" for n in range(len(references))}
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(
+                f"Expression {expression!r} may not use {type(node).__name__}"
+            )
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise ValueError(f"Expression {expression!r} may only use numbers")
+        if isinstance(node, ast.Name) and node.id not in arguments | _FUNCTIONS.keys():
+            raise ValueError(f"Unknown name {node.id!r} in {expression!r}")
+        if isinstance(node, ast.Call) and (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in _FUNCTIONS
+            or node.keywords
+        ):
+            raise ValueError(f"Only {sorted(_FUNCTIONS)} may be called")
+
+    # The tree was checked above: only arithmetic and the allowed functions.
+    function = eval(
+        f"lambda {', '.join(sorted(arguments, key=lambda a: int(a[2:])))}: {source}",
+        {"__builtins__": {}, **_FUNCTIONS},
+    )
+    return function, references
+
+
+class _Sensor:
+    """A compiled virtual sensor, its filter state and its published row."""
+
+    def __init__(self, sensor: VirtualSensor) -> None:
+        self.sensor = sensor
+        self.function, self.references = compile_expression(sensor.expression)
+        self.state = VirtualSensorState(sensor=sensor)
+        self.row = StatusValue(key=sensor.name, value=None, unit=sensor.unit)
+        self.window: Deque[float] = deque()
+        self.ordered: List[float] = []
+        # Last filter output and its time; kept across samples with no value,
+        # so a missing reading does not restart the filters.
+        self.filtered: Optional[float] = None
+        self.filtered_at: Optional[float] = None
+
+    def evaluate(self, inputs: List[Optional[float]], sampled_at: float) -> None:
+        """Publish the value for a new sample; O(1) for a fixed median window."""
+        self.state.evaluations += 1
+        value = None
+        if None not in inputs:
+            try:
+                value = float(self.function(*inputs))
+            except (ArithmeticError, ValueError, TypeError):
+                value = None
+        if value is None:
+            self.row.value = self.state.value = None
+            return
+
+        sensor = self.sensor
+        value = value * sensor.scale + sensor.offset
+        if sensor.median is not None:
+            value = self._median(value, sensor.median)
+        previous = self.filtered
+        if previous is not None:
+            dt = max(0.0, sampled_at - self.filtered_at)
+            if sensor.ema:
+                # First-order lag, as for fan curves.
+                value = previous + dt / (sensor.ema + dt) * (value - previous)
+            if sensor.slew is not None:
+                step = sensor.slew * dt
+                value = min(max(value, previous - step), previous + step)
+        self.filtered, self.filtered_at = value, sampled_at
+        self.row.value = self.state.value = value
+
+    def _median(self, value: float, size: int) -> float:
+        if len(self.window) == size:
+            oldest = self.window.popleft()
+            del self.ordered[bisect_left(self.ordered, oldest)]
+        self.window.append(value)
+        insort(self.ordered, value)
+        middle = len(self.ordered) // 2
+        if len(self.ordered) % 2:
+            return self.ordered[middle]
+        return (self.ordered[middle - 1] + self.ordered[middle]) / 2
+
+
+class VirtualSensorEngine:
+    """
+    Sensors derived from readings, published as extra StatusValues.
+
+    ``apply`` runs on every stored sample of a device and appends the device's
+    virtual sensors to its rows, after calibration and filtering. Sensors are
+    evaluated in declaration order, so one may read another declared before it.
+    Readings of other devices come from their last cached sample.
+    """
+
+    def __init__(self, read_value: Callable[[int, str], Optional[float]]) -> None:
+        self._read_value = read_value
+        self._lock = threading.Lock()
+        self._sensors: Dict[int, Dict[str, _Sensor]] = {}
+        # Per device: the raw rows last seen, their key positions in the
+        # published list, and that list (rebuilt when either changes).
+        self._layouts: Dict[
+            int, Tuple[List[StatusValue], Dict[str, int], List[StatusValue]]
+        ] = {}
+
+    def set_sensor(self, sensor: VirtualSensor) -> None:
+        """Declare (or replace) a sensor; raises ValueError for a bad expression."""
+        compiled = _Sensor(sensor)
+        own_keys = {
+            key
+            for ref_device, key in compiled.references
+            if ref_device in (None, sensor.device_id)
+        }
+        if sensor.name in own_keys:
+            raise ValueError(f"Virtual sensor {sensor.name!r} reads itself")
+        with self._lock:
+            self._sensors.setdefault(sensor.device_id, {})[sensor.name] = compiled
+            self._layouts.pop(sensor.device_id, None)
+
+    def clear_sensor(self, device_id: int, name: str) -> bool:
+        with self._lock:
+            removed = self._sensors.get(device_id, {}).pop(name, None)
+            self._layouts.pop(device_id, None)
+            return removed is not None
+
+    def sensors(self) -> List[VirtualSensorState]:
+        with self._lock:
+            return [
+                sensor.state
+                for device_sensors in self._sensors.values()
+                for sensor in device_sensors.values()
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sensors.clear()
+            self._layouts.clear()
+
+    def apply(
+        self, device_id: int, rows: List[StatusValue], sampled_at: float
+    ) -> List[StatusValue]:
+        """Rows of a new sample followed by the device's virtual sensors."""
+        with self._lock:
+            device_sensors = self._sensors.get(device_id)
+            if not device_sensors:
+                return rows
+            layout = self._layouts.get(device_id)
+            if layout is None or layout[0] is not rows:
+                published = rows + [sensor.row for sensor in device_sensors.values()]
+                positions = {row.key: n for n, row in enumerate(published)}
+                layout = self._layouts[device_id] = (rows, positions, published)
+            _, positions, published = layout
+
+            for sensor in device_sensors.values():
+                inputs = []
+                for ref_device, key in sensor.references:
+                    if ref_device is None or ref_device == device_id:
+                        position = positions.get(key)
+                        inputs.append(
+                            None if position is None else published[position].value
+                        )
+                    else:
+                        inputs.append(self._read_value(ref_device, key))
+                sensor.evaluate(inputs, sampled_at)
+            return published
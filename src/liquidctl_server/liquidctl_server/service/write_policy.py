@@ -0,0 +1,215 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from liquidctl_server.models import WritePolicy, WriteStats
+
+ChannelKey = Tuple[int, str]
+
+
+class _TokenBucket:
+    """Per-device HID write budget: ``rate`` tokens/s, at most ``burst`` saved."""
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def force(self, now: float) -> None:
+        """Spend a token even if none is left; the debt delays later writes."""
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class _ChannelState:
+    def __init__(self, device_id: int, channel: str) -> None:
+        self.last_duty: Optional[int] = None
+        self.direction = 0
+        self.last_write = 0.0
+        self.held_duty: Optional[int] = None
+        self.held_since = 0.0
+        self.flush_at = 0.0
+        self.timer: Optional[threading.Timer] = None
+        self.stats = WriteStats(device_id=device_id, channel=channel)
+
+
+class WritePolicyEngine:
+    """
+    Decides which duty writes reach the device.
+
+    A write is held back when it is smaller than ``min_delta`` (plus
+    ``hysteresis`` when it reverses direction), comes sooner than
+    ``min_interval`` after the previous one, or the device's token bucket is
+    empty. The newest held value is always flushed within ``max_delay``, so
+    the device converges on the last requested duty.
+    """
+
+    def __init__(self, flush: Callable[[int, str, int], None]) -> None:
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._policies: Dict[Tuple[int, Optional[str]], WritePolicy] = {}
+        self._channels: Dict[ChannelKey, _ChannelState] = {}
+        self._buckets: Dict[int, _TokenBucket] = {}
+
+    def set_policy(
+        self, device_id: int, channel: Optional[str], policy: WritePolicy
+    ) -> None:
+        """Set the policy of a channel, or the device default when channel is None."""
+        with self._lock:
+            self._policies[(device_id, channel)] = policy
+            if channel is None:
+                self._buckets.pop(device_id, None)
+
+    def admit(self, device_id: int, channel: str, duty: int) -> bool:
+        """True if the write goes out now; otherwise it is held and flushed later."""
+        now = time.monotonic()
+        with self._lock:
+            policy = self._policy(device_id, channel)
+            state = self._state(device_id, channel)
+            delay = self._hold_delay(device_id, policy, state, duty, now)
+            if delay is None:
+                self._record(state, duty, now)
+                return True
+
+            state.stats.deferred += 1
+            if state.held_duty is None:
+                state.held_since = now
+            state.held_duty = duty
+            deadline = state.held_since + policy.max_delay - now
+            self._schedule(
+                device_id, channel, state, now, max(0.0, min(delay, deadline))
+            )
+            return False
+
+    def release(self, device_id: int, channel: str) -> None:
+        """Drop a held value (the device already has the requested duty)."""
+        with self._lock:
+            state = self._channels.get((device_id, channel))
+            if state is not None:
+                self._clear_hold(state)
+
+    def stats(self) -> List[WriteStats]:
+        with self._lock:
+            return [state.stats for state in self._channels.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            for state in self._channels.values():
+                self._clear_hold(state)
+            self._channels.clear()
+            self._buckets.clear()
+            self._policies.clear()
+
+    def _hold_delay(
+        self,
+        device_id: int,
+        policy: WritePolicy,
+        state: _ChannelState,
+        duty: int,
+        now: float,
+    ) -> Optional[float]:
+        """Seconds until the write may go out, or None to write it now."""
+        if state.last_duty is not None:
+            delta = duty - state.last_duty
+            required = policy.min_delta
+            if state.direction and delta and (delta > 0) != (state.direction > 0):
+                required += policy.hysteresis
+            if abs(delta) < required:
+                return policy.max_delay
+            elapsed = now - state.last_write
+            if elapsed < policy.min_interval:
+                return policy.min_interval - elapsed
+
+        bucket = self._bucket(device_id, now)
+        if bucket is not None and not bucket.take(now):
+            return bucket.wait_time(now)
+        return None
+
+    def _schedule(
+        self,
+        device_id: int,
+        channel: str,
+        state: _ChannelState,
+        now: float,
+        delay: float,
+    ) -> None:
+        if state.timer is not None:
+            if state.flush_at <= now + delay:
+                return  # The pending flush picks up the newest held value
+            state.timer.cancel()
+        state.flush_at = now + delay
+        state.timer = threading.Timer(delay, self._flush_held, (device_id, channel))
+        state.timer.daemon = True
+        state.timer.start()
+
+    def _flush_held(self, device_id: int, channel: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._channels.get((device_id, channel))
+            if state is None or state.held_duty is None:
+                return
+            duty = state.held_duty
+            state.timer = None
+            bucket = self._bucket(device_id, now)
+            if bucket is not None:
+                bucket.force(now)
+            self._record(state, duty, now)
+            state.stats.flushed += 1
+        self._flush(device_id, channel, duty)
+
+    def _record(self, state: _ChannelState, duty: int, now: float) -> None:
+        if state.last_duty is not None and duty != state.last_duty:
+            state.direction = 1 if duty > state.last_duty else -1
+        state.last_duty = duty
+        state.last_write = now
+        state.stats.applied += 1
+        self._clear_hold(state)
+
+    @staticmethod
+    def _clear_hold(state: _ChannelState) -> None:
+        state.held_duty = None
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+
+    def _policy(self, device_id: int, channel: str) -> WritePolicy:
+        policy = self._policies.get((device_id, channel))
+        if policy is None:
+            policy = self._policies.get((device_id, None), _DEFAULT_POLICY)
+        return policy
+
+    def _state(self, device_id: int, channel: str) -> _ChannelState:
+        state = self._channels.get((device_id, channel))
+        if state is None:
+            state = _ChannelState(device_id, channel)
+            self._channels[(device_id, channel)] = state
+        return state
+
+    def _bucket(self, device_id: int, now: float) -> Optional[_TokenBucket]:
+        policy = self._policies.get((device_id, None), _DEFAULT_POLICY)
+        if policy.max_writes_per_second is None:
+            return None
+        bucket = self._buckets.get(device_id)
+        if bucket is None:
+            bucket = _TokenBucket(policy.max_writes_per_second, policy.burst, now)
+            self._buckets[device_id] = bucket
+        return bucket
+
+
+_DEFAULT_POLICY = WritePolicy()
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional
+
+from liquidctl_server.models import WriteResult, WriteStatus
+
+MAX_FINISHED_RESULTS: int = 256
+
+
+class _PendingWrite:
+    """A queued device write and the result reported for its ticket."""
+
+    def __init__(
+        self,
+        result: Optional[WriteResult],
+        future: Future,
+        coalesce_key: str,
+        on_success: Optional[Callable[[], None]],
+    ) -> None:
+        self.result = result
+        self.future = future
+        self.coalesce_key = coalesce_key
+        self.on_success = on_success
+        self.queued_at = time.monotonic()
+
+
+class WriteTracker:
+    """
+    Tickets for writes acknowledged before they run.
+
+    A write queued while an older one for the same coalesce key has not started
+    yet cancels that older job (its ticket reports SUPERSEDED), so only the
+    latest value reaches the device. Finished results are kept in a bounded
+    buffer until a client collects them; a write still pending after
+    ``timeout`` is reported as TIMEOUT when they are collected.
+
+    Writes the bridge makes on its own (curves, held duties) coalesce the same
+    way through ``track_internal`` but get no ticket and report no result.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._next_ticket = 1
+        self._pending: Dict[int, _PendingWrite] = {}
+        self._latest: Dict[str, _PendingWrite] = {}
+        self._finished: Deque[WriteResult] = deque(maxlen=MAX_FINISHED_RESULTS)
+
+    def track(
+        self,
+        device_id: int,
+        operation: str,
+        coalesce_key: str,
+        future: Future,
+        on_success: Optional[Callable[[], None]] = None,
+    ) -> WriteResult:
+        """Issue a ticket for a queued write and supersede the older one."""
+        with self._lock:
+            result = WriteResult(
+                ticket=self._take_ticket(),
+                device_id=device_id,
+                operation=operation,
+                status=WriteStatus.QUEUED,
+            )
+            write = _PendingWrite(result, future, coalesce_key, on_success)
+            self._pending[result.ticket] = write
+            previous = self._replace_latest(write)
+        self._start(write, previous)
+        return result
+
+    def track_internal(
+        self,
+        coalesce_key: str,
+        future: Future,
+        on_success: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Coalesce a write the bridge made itself, without issuing a ticket."""
+        write = _PendingWrite(None, future, coalesce_key, on_success)
+        with self._lock:
+            previous = self._replace_latest(write)
+        self._start(write, previous)
+
+    def _replace_latest(self, write: _PendingWrite) -> Optional[_PendingWrite]:
+        previous = self._latest.get(write.coalesce_key)
+        self._latest[write.coalesce_key] = write
+        return previous
+
+    def _start(self, write: _PendingWrite, previous: Optional[_PendingWrite]) -> None:
+        # Outside the lock: cancelling runs the done-callback synchronously.
+        if previous is not None:
+            previous.future.cancel()
+        write.future.add_done_callback(lambda _: self._complete(write))
+
+    def settled(
+        self, device_id: int, operation: str, status: WriteStatus
+    ) -> WriteResult:
+        """Ticket for a write decided without a device job (unchanged, deferred)."""
+        with self._lock:
+            result = WriteResult(
+                ticket=self._take_ticket(),
+                device_id=device_id,
+                operation=operation,
+                status=status,
+            )
+            self._finished.append(result)
+        return result
+
+    def results(self) -> List[WriteResult]:
+        """Drain finished results and list the writes still pending."""
+        now = time.monotonic()
+        with self._lock:
+            for ticket, write in list(self._pending.items()):
+                if now - write.queued_at > self._timeout:
+                    write.result.status = WriteStatus.TIMEOUT
+                    write.result.latency = now - write.queued_at
+                    self._finish(ticket)
+            finished = list(self._finished)
+            self._finished.clear()
+            pending = [write.result for write in self._pending.values()]
+        return finished + pending
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._latest.clear()
+            self._finished.clear()
+
+    def _complete(self, write: _PendingWrite) -> None:
+        future = write.future
+        if not future.cancelled() and future.exception() is None:
+            if write.on_success is not None:
+                write.on_success()
+
+        with self._lock:
+            if write.result is None:
+                if self._latest.get(write.coalesce_key) is write:
+                    del self._latest[write.coalesce_key]
+                return
+            if write.result.ticket not in self._pending:
+                return  # Already reported as timed out
+            if future.cancelled():
+                write.result.status = WriteStatus.SUPERSEDED
+            elif future.exception() is not None:
+                write.result.status = WriteStatus.ERROR
+                write.result.error = str(future.exception())
+            else:
+                write.result.status = WriteStatus.SUCCESS
+            write.result.latency = time.monotonic() - write.queued_at
+            self._finish(write.result.ticket)
+
+    def _finish(self, ticket: int) -> None:
+        write = self._pending.pop(ticket)
+        if self._latest.get(write.coalesce_key) is write:
+            del self._latest[write.coalesce_key]
+        self._finished.append(write.result)
+
+    def _take_ticket(self) -> int:
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
@@ -0,0 +1,477 @@
+"""Micro-benchmarks for the bridge hot paths. No hardware or pipe required.
+
+Run with ``uv run python -m tests.manual.bench [name ...]``.
+"""
+
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import msgspec
+
+from liquidctl_server.models import (
+    BridgeResponse,
+    ColorTransform,
+    ColumnarStatus,
+    DeviceStatus,
+    FixedSpeedRequest,
+    HistoryLimits,
+    LedRequest,
+    MessageStatus,
+    PipeRequest,
+    StatusValue,
+    VirtualSensor,
+)
+from liquidctl_server.server import _decode_request, _expand_palette, _unpack_rgb
+from liquidctl_server.service.color_transform import ColorTransformStage, white_point
+from liquidctl_server.service.device_index import DeviceIndex
+from liquidctl_server.service.history import HistoryStore
+from liquidctl_server.service.journal import JournalReader, SensorJournal
+from liquidctl_server.service.led_frames import LedFramePipeline
+from liquidctl_server.service.metrics import MetricsRecorder
+from liquidctl_server.service.openmetrics import OpenMetricsExporter
+from liquidctl_server.service.status_table import StatusTable
+from liquidctl_server.service.virtual_sensors import VirtualSensorEngine
+
+FIXED_SPEED_V1 = (
+    b'{"command":"set.fixed_speed",'
+    b'"data":{"device_id":1,"speed_kwargs":{"channel":"pump","duty":80}}}'
+)
+FIXED_SPEED_V2 = (
+    b'{"command":"set.fixed_speed","device_id":1,'
+    b'"speed_kwargs":{"channel":"pump","duty":80}}'
+)
+
+
+def _report(label: str, fn: Callable[[], object], number: int = 200_000) -> None:
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    print(f"{label:<48} {best / number * 1e9:8.0f} ns/op")
+
+
+def _legacy_two_pass_decode(raw_msg: bytes) -> FixedSpeedRequest:
+    """The pre-v2 decode path: envelope first, then the payload again."""
+    request = msgspec.json.decode(raw_msg, type=PipeRequest)
+    if bytes(request.data) == b"null":
+        raise ValueError("missing data")
+    return msgspec.json.decode(request.data, type=FixedSpeedRequest)
+
+
+def bench_decode() -> None:
+    _report(
+        "decode: legacy envelope + payload",
+        lambda: _legacy_two_pass_decode(FIXED_SPEED_V1),
+    )
+    _report(
+        "decode: v1 envelope (compat path)", lambda: _decode_request(FIXED_SPEED_V1)
+    )
+    _report("decode: v2 inline fields", lambda: _decode_request(FIXED_SPEED_V2))
+
+
+def _rig(devices: int = 4, sensors: int = 24) -> List[DeviceStatus]:
+    """A synthetic multi-hub rig: every device reports the same sensor set."""
+    status = [
+        StatusValue(key=f"Fan {i + 1} speed", value=1200.0 + i, unit="rpm")
+        for i in range(sensors)
+    ]
+    return [
+        DeviceStatus(id=i + 1, description=f"NZXT Smart Device V2 #{i}", status=status)
+        for i in range(devices)
+    ]
+
+
+def bench_status_encoding() -> None:
+    rig = _rig()
+    rows = msgspec.json.encode(BridgeResponse(status=MessageStatus.SUCCESS, data=rig))
+    columnar_rows = [
+        ColumnarStatus(id=d.id, schema_id=0, values=[v.value for v in d.status])
+        for d in rig
+    ]
+    fixed_rows = [
+        ColumnarStatus(id=d.id, schema_id=0, values=[round(v.value) for v in d.status])
+        for d in rig
+    ]
+    columnar = msgspec.json.encode(
+        BridgeResponse(status=MessageStatus.SUCCESS, data=columnar_rows)
+    )
+    fixed = msgspec.json.encode(
+        BridgeResponse(status=MessageStatus.SUCCESS, data=fixed_rows)
+    )
+    print(f"{'payload: rows':<48} {len(rows):8d} bytes")
+    print(f"{'payload: columnar':<48} {len(columnar):8d} bytes")
+    print(f"{'payload: columnar, fixed_point=0':<48} {len(fixed):8d} bytes")
+    _report("parse: rows", lambda: msgspec.json.decode(rows), number=20_000)
+    _report("parse: columnar", lambda: msgspec.json.decode(columnar), number=20_000)
+
+
+def _stringify(statuses: list) -> List[StatusValue]:
+    """The pre-table conversion: new structs and strings on every read."""
+    result = []
+    for status in statuses:
+        try:
+            value = float(status[1])
+        except (ValueError, TypeError):
+            value = None
+        result.append(StatusValue(key=str(status[0]), value=value, unit=str(status[2])))
+    return result
+
+
+def _allocated_blocks(fn: Callable[[], object], number: int = 1000) -> float:
+    """Memory blocks allocated per call and still alive right after it."""
+    fn()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [fn() for _ in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del kept
+    stats = after.compare_to(before, "filename")
+    return sum(stat.count_diff for stat in stats) / number
+
+
+def bench_status_poll() -> None:
+    # One hub read per call: 24 sensors, values drifting between reads.
+    readings = itertools.cycle(
+        [
+            [(f"Fan {i + 1} speed", 1200 + i + n, "rpm") for i in range(24)]
+            for n in range(16)
+        ]
+    )
+    table = StatusTable()
+
+    def respond():
+        # A client poll: the read, then the copy its response carries.
+        return table.snapshot(table.update(next(readings)))
+
+    _report("poll: 24 sensors, new StatusValues", lambda: _stringify(next(readings)))
+    _report("poll: 24 sensors, status table", lambda: table.update(next(readings)))
+    _report("poll: 24 sensors, table + response copy", respond)
+    # Every call's result is kept alive, so this counts objects a poll creates.
+    for label, fn in (
+        ("new StatusValues", lambda: _stringify(next(readings))),
+        ("status table", lambda: table.update(next(readings))),
+        ("table + response copy", respond),
+    ):
+        print(
+            f"{f'poll: 24 sensors, {label}':<48} "
+            f"{_allocated_blocks(fn):8.1f} blocks/poll"
+        )
+
+
+def bench_history() -> None:
+    store = HistoryStore(HistoryLimits())
+    sample = _rig(devices=1)[0].status
+    now = time.monotonic()
+    # A full hour of 1 Hz samples for 24 sensors.
+    for age in range(3600, 0, -1):
+        store.on_sample(1, sample, now - age)
+    _report(
+        "history: record one 24-sensor sample",
+        lambda: store.on_sample(1, sample, time.monotonic()),
+        number=20_000,
+    )
+    _report(
+        "history: 1 key, 1 h raw (3600 points)",
+        lambda: store.history(1, ["Fan 1 speed"], 3600, 0, None),
+        number=1_000,
+    )
+    _report(
+        "history: 1 key, 1 h in 1 min buckets",
+        lambda: store.history(1, ["Fan 1 speed"], 3600, 0, 60),
+        number=1_000,
+    )
+    _report(
+        "history: 24 keys, 1 h in 1 min buckets",
+        lambda: store.history(1, None, 3600, 0, 60),
+        number=100,
+    )
+
+
+def bench_virtual_sensors() -> None:
+    engine = VirtualSensorEngine(read_value=lambda device_id, key: 25.0)
+    for n in range(4):
+        engine.set_sensor(
+            VirtualSensor(
+                device_id=1,
+                name=f"Fan pair {n} speed",
+                unit="rpm",
+                expression=f"max({{Fan {n + 1} speed}}, {{Fan {n + 2} speed}}) - {{#2:Idle}}",
+                median=5,
+                ema=3.0,
+                slew=2.0,
+            )
+        )
+    sample = _rig(devices=1)[0].status
+    clock = iter(range(10**9))
+    _report(
+        "virtual sensors: 4 filtered sensors on a 24-sensor sample",
+        lambda: engine.apply(1, sample, float(next(clock))),
+        number=20_000,
+    )
+
+
+def bench_journal() -> None:
+    # An hour of 1 Hz reads from a hub: 8 fan speeds, 8 duties, 8 temperatures.
+    rng = random.Random(1)
+    samples = 3600
+    rows = [
+        [
+            StatusValue(
+                key=f"Fan {i} speed",
+                value=float(1200 + rng.randrange(-20, 21)),
+                unit="rpm",
+            )
+            for i in range(8)
+        ]
+        + [StatusValue(key=f"Fan {i} duty", value=40.0, unit="%") for i in range(8)]
+        + [
+            StatusValue(
+                key=f"Temperature {i}", value=round(30 + rng.random(), 1), unit="°C"
+            )
+            for i in range(8)
+        ]
+        for _ in range(samples)
+    ]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "sensors.journal")
+        journal = SensorJournal(path)
+        now = time.monotonic()
+        start = time.perf_counter()
+        for n, row in enumerate(rows):
+            journal.on_sample(1, row, now - samples + n)
+        queued = time.perf_counter() - start
+        journal.close()
+        written = time.perf_counter() - start
+        values = samples * 24
+        size = os.path.getsize(path)
+        print(f"{'journal: 1 h, 24 sensors':<48} {size:8d} bytes")
+        print(f"{'journal: bytes per value (raw: 16)':<48} {size / values:8.2f}")
+        print(
+            f"{'journal: on_sample (hot path)':<48} {queued / samples * 1e9:8.0f} ns/op"
+        )
+        print(
+            f"{'journal: encode + write per value':<48} {written / values * 1e9:8.0f} ns/op"
+        )
+        start = time.perf_counter()
+        with JournalReader(path) as reader:
+            count = sum(1 for _ in reader.samples())
+        read = time.perf_counter() - start
+        assert count == values
+        print(f"{'journal: read back per value':<48} {read / values * 1e9:8.0f} ns/op")
+
+
+def _led_payloads(leds: int = 120) -> Dict[str, bytes]:
+    """One set.led frame for a long ARGB strip in each frame encoding."""
+    palette = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+    indices = bytes(i % len(palette) for i in range(leds))
+    colors = [palette[i] for i in indices]
+    frame = {"command": "set.led", "device": "Smart Device", "channel": "led1"}
+    frame["mode"] = "super-fixed"
+    # msgspec encodes bytes fields as base64, as a client would send them.
+    packed = bytes(c for color in colors for c in color)
+    # A moving highlight: 3 LEDs change between consecutive frames.
+    delta = [(i, 255, 255, 255) for i in range(3)]
+    return {
+        "triples": msgspec.json.encode({**frame, "colors": colors}),
+        "rgb": msgspec.json.encode({**frame, "rgb": packed}),
+        "palette": msgspec.json.encode(
+            {**frame, "palette": palette, "indices": indices}
+        ),
+        "delta": msgspec.json.encode({**frame, "delta": delta}),
+    }
+
+
+def _legacy_led_decode(raw_msg: bytes) -> object:
+    """The pre-rgb path: List[List[int]] rebuilt as tuples in handle_set_led."""
+    colors = msgspec.json.decode(raw_msg)["colors"]
+    return [tuple(color) for color in colors]
+
+
+def bench_led_frames() -> None:
+    payloads = _led_payloads()
+    decoder = msgspec.json.Decoder(LedRequest)
+    for name, payload in payloads.items():
+        print(f"{'payload: 120 LEDs, ' + name:<48} {len(payload):8d} bytes")
+
+    pipeline = LedFramePipeline(_QueueOnly())
+    pipeline.submit(
+        1, "led1", "super-fixed", decoder.decode(payloads["triples"]).colors, _noop
+    )
+    # Alternate two highlights so no frame is dropped as identical.
+    deltas = itertools.cycle(
+        [payloads["delta"], payloads["delta"].replace(b"255,255,255", b"0,0,0")]
+    )
+
+    def apply_delta() -> object:
+        request = decoder.decode(next(deltas))
+        return pipeline.submit_delta(1, "led1", "super-fixed", request.delta, _noop)
+
+    _report(
+        "frame: legacy lists + tuple rebuild",
+        lambda: _legacy_led_decode(payloads["triples"]),
+        number=20_000,
+    )
+    _report(
+        "frame: typed triples",
+        lambda: decoder.decode(payloads["triples"]).colors,
+        number=20_000,
+    )
+    _report(
+        "frame: packed rgb",
+        lambda: _unpack_rgb(decoder.decode(payloads["rgb"]).rgb),
+        number=20_000,
+    )
+    _report(
+        "frame: palette",
+        lambda: _expand_palette(*_palette_fields(decoder.decode(payloads["palette"]))),
+        number=20_000,
+    )
+    _report("frame: delta onto current frame", apply_delta, number=20_000)
+
+
+def _per_led_transform(colors: List[tuple], transform: ColorTransform) -> List[tuple]:
+    """The straightforward transform: float maths for every LED and channel."""
+    gains = white_point(transform.temperature)
+    order = ["rgb".index(c) for c in transform.channel_order]
+    out = []
+    for color in colors:
+        corrected = [
+            min(
+                255,
+                round(255 * transform.brightness * gain * (v / 255) ** transform.gamma),
+            )
+            for v, gain in zip(color, gains)
+        ]
+        out.append(tuple(corrected[i] for i in order))
+    return out
+
+
+def bench_color_transform() -> None:
+    transform = ColorTransform(
+        brightness=0.8, gamma=2.2, temperature=4000, channel_order="grb"
+    )
+    stage = ColorTransformStage()
+    stage.set_transform(1, "led1", transform)
+    for leds in (120, 1200):
+        colors = [(i % 256, (i * 7) % 256, (i * 13) % 256) for i in range(leds)]
+        assert stage.apply(1, "led1", colors) == _per_led_transform(colors, transform)
+        for label, fn in (
+            ("per-LED float maths", lambda: _per_led_transform(colors, transform)),
+            ("lookup tables", lambda: stage.apply(1, "led1", colors)),
+        ):
+            number = 200_000 // leds
+            best = min(timeit.repeat(fn, number=number, repeat=5))
+            print(
+                f"{f'transform: {leds} LEDs, {label}':<48} "
+                f"{leds * number / best / 1e6:8.2f} M LEDs/s"
+            )
+
+
+class _Device:
+    def __init__(self, description: str) -> None:
+        self.description = description
+
+
+def bench_device_resolution() -> None:
+    devices = {
+        device_id: _Device(f"Vendor Hub {device_id} (rev {device_id % 3})")
+        for device_id in range(1, 9)
+    }
+
+    def linear_scan(device_match: str) -> object:
+        """The pre-index lookup: lowercase and scan every description."""
+        needle = device_match.lower()
+        for device_id, device in devices.items():
+            if needle in device.description.lower():
+                return device_id
+        return None
+
+    index = DeviceIndex(devices)
+    _report("resolve: linear scan, last of 8", lambda: linear_scan("Hub 8"))
+    _report("resolve: index, last of 8", lambda: index.resolve("Hub 8"))
+
+
+def bench_metrics() -> None:
+    recorder = MetricsRecorder(queue_depths=lambda: {1: (0, 3)})
+    rng = random.Random(1)
+    for _ in range(10_000):
+        recorder.observe_job(1, "get_status", rng.random() * 1e-3, 0.02, True)
+    _report(
+        "metrics: record one job",
+        lambda: recorder.observe_job(1, "get_status", 1e-4, 0.02, True),
+    )
+    _report(
+        "metrics: record one command",
+        lambda: recorder.observe_command("get.statuses", 2e-6, 0.02, 1e-5, True),
+    )
+    _report("metrics: get.metrics snapshot", recorder.metrics, number=2_000)
+
+
+def bench_openmetrics() -> None:
+    rig = _rig()
+    recorder = MetricsRecorder(queue_depths=lambda: {d.id: (0, 3) for d in rig})
+    for device in rig:
+        for operation in ("get_status", "set_fixed_speed", "set_color"):
+            recorder.observe_job(device.id, operation, 1e-4, 0.02, True)
+    for command in ("get.statuses", "set.fixed_speed", "set.led"):
+        recorder.observe_command(command, 2e-6, 0.02, 1e-5, True)
+
+    def exporter() -> OpenMetricsExporter:
+        return OpenMetricsExporter(
+            recorder,
+            queue_depths=lambda: {d.id: (0, 3) for d in rig},
+            write_stats=lambda: [],
+            led_stats=lambda: [],
+            sensors=lambda: [(d.id, d.description, 1.0, d.status) for d in rig],
+        )
+
+    _report("openmetrics: full render", lambda: exporter().render(), number=200)
+    incremental = exporter()
+    incremental.render()
+    _report("openmetrics: render, nothing changed", incremental.render, number=2_000)
+
+
+def _palette_fields(request: LedRequest) -> tuple:
+    return request.palette, request.indices
+
+
+def _noop(**_: object) -> None:
+    pass
+
+
+class _QueueOnly:
+    """Executor stand-in that queues nothing, so only the pipeline is timed."""
+
+    def submit(self, device_id: int, fn: Callable, **kwargs: object) -> Future:
+        return Future()
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "decode": bench_decode,
+    "status_encoding": bench_status_encoding,
+    "status_poll": bench_status_poll,
+    "history": bench_history,
+    "virtual_sensors": bench_virtual_sensors,
+    "journal": bench_journal,
+    "led_frames": bench_led_frames,
+    "color_transform": bench_color_transform,
+    "device_resolution": bench_device_resolution,
+    "metrics": bench_metrics,
+    "openmetrics": bench_openmetrics,
+}
+
+
+def main() -> None:
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
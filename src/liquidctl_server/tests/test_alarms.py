@@ -0,0 +1,123 @@
+import threading
+import time
+
+from liquidctl_server.models import AlarmCondition, AlarmRule, StatusValue
+from liquidctl_server.service.alarms import AlarmEngine
+
+
+def _rule(**kwargs):
+    rule = dict(
+        name="Liquid hot",
+        device_id=1,
+        key="Liquid temperature",
+        condition=AlarmCondition.ABOVE,
+        threshold=40.0,
+    )
+    rule.update(kwargs)
+    return AlarmRule(**rule)
+
+
+def _sample(liquid=30.0, pump=2000.0):
+    return [
+        StatusValue(key="Liquid temperature", value=liquid, unit="°C"),
+        StatusValue(key="Pump speed", value=pump, unit="rpm"),
+    ]
+
+
+def _feed(engine, liquids, interval=1.0, **sample):
+    """One sample per interval, the last one taken just now."""
+    now = time.monotonic()
+    for n, liquid in enumerate(liquids):
+        age = (len(liquids) - 1 - n) * interval
+        engine.on_sample(1, _sample(liquid, **sample), now - age)
+
+
+def _engine(*rules, log_size=16):
+    engine = AlarmEngine(log_size)
+    for rule in rules:
+        engine.set_rule(rule)
+    return engine
+
+
+class TestAlarmEngine:
+    def test_raise_and_clear_events(self):
+        engine = _engine(_rule())
+        _feed(engine, [30.0, 41.0, 42.0, 39.0])
+
+        raised, cleared = engine.events(0, 0)
+        assert (raised.seq, raised.active, raised.value) == (1, True, 41.0)
+        assert (cleared.seq, cleared.active, cleared.value) == (2, False, 39.0)
+        assert raised.name == "Liquid hot"
+        assert abs(raised.time - (time.time() - 2.0)) < 1.0
+        (state,) = engine.alarms()
+        assert (state.active, state.value, state.raised) == (False, 39.0, 1)
+
+    def test_below_catches_a_stopped_pump(self):
+        engine = _engine(
+            _rule(
+                name="Pump stopped",
+                key="Pump speed",
+                condition=AlarmCondition.BELOW,
+                threshold=1.0,
+            )
+        )
+        engine.on_sample(1, _sample(pump=2000.0), 0.0)
+        engine.on_sample(1, _sample(pump=0.0), 1.0)
+        (event,) = engine.events(0, 0)
+        assert event.active and event.key == "Pump speed"
+
+    def test_hysteresis_holds_the_alarm(self):
+        engine = _engine(_rule(hysteresis=2.0))
+        _feed(engine, [41.0, 39.0, 38.5, 37.5])
+        assert [event.active for event in engine.events(0, 0)] == [True, False]
+        assert engine.events(0, 0)[1].value == 37.5
+
+    def test_debounce_ignores_short_spikes(self):
+        engine = _engine(_rule(debounce=2.0))
+        _feed(engine, [41.0, 30.0, 41.0, 41.0, 41.0])
+        (event,) = engine.events(0, 0)
+        assert event.active and event.value == 41.0
+        (state,) = engine.alarms()
+        assert state.raised == 1
+
+    def test_missing_reading_and_other_devices_are_ignored(self):
+        engine = _engine(_rule())
+        engine.on_sample(1, [StatusValue(key="Pump speed", value=0.0, unit="rpm")], 0)
+        engine.on_sample(2, _sample(liquid=50.0), 1.0)
+        assert engine.events(0, 0) == []
+        assert engine.source_devices() == {1}
+
+    def test_cursor_and_bounded_log(self):
+        engine = _engine(_rule(), log_size=3)
+        _feed(engine, [41.0, 30.0] * 3)
+
+        assert [event.seq for event in engine.events(0, 0)] == [4, 5, 6]
+        assert [event.seq for event in engine.events(5, 0)] == [6]
+        # A cursor from before a restart gets the whole log.
+        assert len(engine.events(99, 0)) == 3
+
+    def test_wait_returns_on_the_next_event(self):
+        engine = _engine(_rule())
+        timer = threading.Timer(
+            0.05, lambda: engine.on_sample(1, _sample(liquid=45.0), 0.0)
+        )
+        timer.start()
+        started = time.monotonic()
+        (event,) = engine.events(0, wait=5.0)
+        timer.join()
+
+        assert event.active
+        assert time.monotonic() - started < 2.0
+
+    def test_wait_times_out_empty(self):
+        assert _engine(_rule()).events(0, wait=0.01) == []
+
+    def test_replace_and_clear_rule(self):
+        engine = _engine(_rule())
+        engine.set_rule(_rule(threshold=50.0))
+        _feed(engine, [45.0])
+        assert engine.events(0, 0) == []
+
+        assert engine.clear_rule("Liquid hot")
+        assert not engine.clear_rule("Liquid hot")
+        assert engine.source_devices() == set()
@@ -0,0 +1,154 @@
+import threading
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+import pytest
+
+from liquidctl_server.models import EffectKind, LedEffect
+from liquidctl_server.service.animations import (
+    MAX_INTERVAL,
+    AnimationEngine,
+    _Animation,
+    render,
+)
+
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+
+
+def _effect(kind, **kwargs):
+    kwargs.setdefault("leds", 3)
+    kwargs.setdefault("colors", [RED, BLUE])
+    return LedEffect(device="Kraken", channel="ring", kind=kind, **kwargs)
+
+
+class TestRender:
+    def test_gradient_spans_the_stops(self):
+        frame = render(_effect(EffectKind.GRADIENT), 0.0)
+        assert frame == [RED, (128, 0, 128), BLUE]
+
+    def test_rotation_turns_once_per_period(self):
+        effect = _effect(EffectKind.ROTATE, leds=4, colors=[RED, BLUE], period=4.0)
+        start = render(effect, 0.0)
+        assert render(effect, 1.0) == start[1:] + start[:1]
+        assert render(effect, 4.0) == start
+
+    def test_breathing_fades_in_and_out(self):
+        effect = _effect(EffectKind.BREATHE, colors=[RED], period=2.0)
+        assert render(effect, 0.0) == [(0, 0, 0)] * 3
+        assert render(effect, 1.0) == [RED] * 3
+
+    def test_keyframes_blend_and_loop(self):
+        effect = _effect(EffectKind.KEYFRAMES, keyframes=[[RED], [BLUE]], period=2.0)
+        assert render(effect, 0.0) == [RED] * 3
+        assert render(effect, 0.5) == [(128, 0, 128)] * 3
+        assert render(effect, 1.5) == [(128, 0, 128)] * 3
+
+    def test_temperature_maps_into_colors(self):
+        effect = _effect(EffectKind.TEMPERATURE, low=30.0, high=40.0)
+        assert render(effect, 0.0, 35.0) == [(128, 0, 128)] * 3
+        assert render(effect, 0.0, 50.0) == [BLUE] * 3
+        assert render(effect, 0.0, None) is None
+
+
+def _done_future():
+    future = Future()
+    future.set_result(None)
+    return future
+
+
+class TestAdaptiveRate:
+    def _engine(self, submit):
+        return AnimationEngine(submit=submit, read_value=MagicMock())
+
+    def test_busy_device_backs_off(self):
+        engine = self._engine(MagicMock(return_value=Future()))
+        animation = _Animation(1, _effect(EffectKind.ROTATE, fps=20.0), 0.0)
+
+        engine._tick(animation, 0.0)
+        engine._tick(animation, animation.next_due)
+
+        assert animation.state.frames == 1
+        assert animation.state.skipped == 1
+        assert animation.interval == pytest.approx(0.05 * 1.25)
+
+    def test_rate_recovers_towards_target(self):
+        engine = self._engine(MagicMock(side_effect=lambda *_: _done_future()))
+        animation = _Animation(1, _effect(EffectKind.ROTATE, fps=20.0), 0.0)
+        animation.interval = MAX_INTERVAL
+
+        for _ in range(200):
+            engine._tick(animation, animation.next_due)
+
+        assert animation.interval == pytest.approx(0.05)
+        assert animation.state.fps == pytest.approx(20.0)
+
+    def test_static_effect_renders_rarely(self):
+        submit = MagicMock(return_value=None)  # Repeats are dropped by the pipeline
+        engine = self._engine(submit)
+        animation = _Animation(1, _effect(EffectKind.GRADIENT), 0.0)
+
+        engine._tick(animation, 0.0)
+
+        assert animation.next_due == pytest.approx(1.0)
+        assert animation.state.frames == 0
+
+
+class TestAnimationEngine:
+    def test_renders_on_its_own_thread(self):
+        rendered = threading.Event()
+
+        def submit(device_id, channel, mode, colors):
+            rendered.set()
+            return _done_future()
+
+        engine = AnimationEngine(submit=submit, read_value=MagicMock())
+        engine.set_effect(1, _effect(EffectKind.ROTATE))
+        try:
+            assert rendered.wait(timeout=2.0)
+        finally:
+            engine.stop()
+        assert engine.effects()[0].frames >= 1
+
+    def test_temperature_sources(self):
+        engine = AnimationEngine(submit=MagicMock(), read_value=MagicMock())
+        engine._animations[(1, "ring")] = _Animation(
+            1, _effect(EffectKind.TEMPERATURE, source_device_id=2), 0.0
+        )
+        engine._animations[(1, "logo")] = _Animation(1, _effect(EffectKind.ROTATE), 0.0)
+        assert engine.source_devices() == {2}
+        assert engine.clear_effect(1, "ring")
+        assert engine.source_devices() == set()
+
+    def test_clear_drops_a_frame_already_due(self):
+        # The scheduler picked the animation as due, then clear_effect() ran
+        # while its frame was being rendered (here: reading the source value).
+        submit = MagicMock(return_value=_done_future())
+        engine = AnimationEngine(submit=submit, read_value=MagicMock())
+        animation = _Animation(
+            1, _effect(EffectKind.TEMPERATURE, low=30.0, high=50.0), 0.0
+        )
+        engine._animations[(1, "ring")] = animation
+
+        def clear_while_rendering(device_id, key):
+            engine.clear_effect(1, "ring")
+            return 40.0
+
+        engine._read_value = clear_while_rendering
+        engine._tick(animation, 0.0)
+
+        submit.assert_not_called()
+        assert animation.state.frames == 0
+
+    def test_replaced_effect_stops_submitting(self):
+        submit = MagicMock(return_value=_done_future())
+        engine = AnimationEngine(submit=submit, read_value=MagicMock())
+        old = _Animation(1, _effect(EffectKind.ROTATE), 0.0)
+        engine._animations[(1, "ring")] = old
+
+        engine.set_effect(1, _effect(EffectKind.GRADIENT))
+        engine.stop()
+        submit.reset_mock()
+        engine._tick(old, 0.0)
+
+        submit.assert_not_called()
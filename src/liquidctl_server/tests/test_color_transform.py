@@ -0,0 +1,74 @@
+import pytest
+
+from liquidctl_server.models import ColorTransform
+from liquidctl_server.service.color_transform import ColorTransformStage, white_point
+
+FRAME = [(255, 0, 0), (0, 128, 0), (10, 20, 30)]
+
+
+def _stage(channel="ring", **kwargs):
+    stage = ColorTransformStage()
+    stage.set_transform(1, channel, ColorTransform(**kwargs))
+    return stage
+
+
+class TestWhitePoint:
+    def test_6500k_is_neutral(self):
+        assert white_point(6500) == pytest.approx((1.0, 1.0, 1.0))
+
+    def test_warm_white_cuts_blue(self):
+        red, green, blue = white_point(2700)
+        assert red == pytest.approx(1.0, abs=0.01)
+        assert blue < green < red
+
+
+class TestColorTransformStage:
+    def test_without_transform_frame_is_untouched(self):
+        stage = ColorTransformStage()
+        assert stage.apply(1, "ring", FRAME) is FRAME
+
+    def test_brightness_scales_every_channel(self):
+        frame = _stage(brightness=0.5).apply(1, "ring", FRAME)
+        assert frame == [(128, 0, 0), (0, 64, 0), (5, 10, 15)]
+
+    def test_gamma_darkens_midtones(self):
+        frame = _stage(gamma=2.0).apply(1, "ring", [(255, 128, 0)])
+        assert frame == [(255, 64, 0)]
+
+    def test_channel_order(self):
+        frame = _stage(channel_order="grb").apply(1, "ring", FRAME)
+        assert frame == [(0, 255, 0), (128, 0, 0), (20, 10, 30)]
+
+    def test_temperature_tints_white(self):
+        ((red, green, blue),) = _stage(temperature=3000).apply(
+            1, "ring", [(255, 255, 255)]
+        )
+        assert red == 255
+        assert blue < green < red
+
+    def test_device_default_applies_to_other_channels(self):
+        stage = _stage(channel=None, brightness=0.0)
+        stage.set_transform(1, "ring", ColorTransform(channel_order="bgr"))
+        assert stage.apply(1, "led1", FRAME) == [(0, 0, 0)] * 3
+        assert stage.apply(1, "ring", [(1, 2, 3)]) == [(3, 2, 1)]
+        assert stage.apply(2, "led1", FRAME) is FRAME
+
+    def test_identity_transform_removes_entry(self):
+        stage = _stage(brightness=0.5)
+        stage.set_transform(1, "ring", ColorTransform())
+        assert stage.transforms() == []
+        assert stage.apply(1, "ring", FRAME) is FRAME
+
+    def test_delta_matches_full_frame(self):
+        stage = _stage(brightness=0.5, channel_order="grb")
+        full = stage.apply(1, "ring", FRAME)
+        changes = stage.apply_delta(1, "ring", [(2, 10, 20, 30), (0, 255, 0, 0)])
+        assert changes == [(2, *full[2]), (0, *full[0])]
+
+    def test_empty_frame(self):
+        assert _stage(brightness=0.5).apply(1, "ring", []) == []
+
+    def test_transforms_lists_settings(self):
+        (state,) = _stage(gamma=2.2).transforms()
+        assert (state.device_id, state.channel) == (1, "ring")
+        assert state.transform.gamma == 2.2
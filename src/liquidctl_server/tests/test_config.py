@@ -82,3 +82,18 @@ class TestLoadDeviceFilter:
     def test_invalid_regex_returns_none(self, monkeypatch):
         monkeypatch.setattr(config, "_read_filter_pattern", lambda: "[")
         assert config.load_device_filter() is None
+
+
+class TestMetricsPort:
+    def test_unset_is_off(self, monkeypatch):
+        monkeypatch.delenv(config.METRICS_PORT_ENV, raising=False)
+        assert config.metrics_port() is None
+
+    def test_valid_port(self, monkeypatch):
+        monkeypatch.setenv(config.METRICS_PORT_ENV, "9464")
+        assert config.metrics_port() == 9464
+
+    def test_invalid_port_is_off(self, monkeypatch):
+        for value in ("http", "70000"):
+            monkeypatch.setenv(config.METRICS_PORT_ENV, value)
+            assert config.metrics_port() is None
@@ -0,0 +1,133 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from liquidctl_server.models import FanCurve, StatusValue
+from liquidctl_server.service.curves import CurveEngine, interpolate
+from liquidctl_server.service.sampler import StatusSampler
+
+POINTS = [(30.0, 20), (40.0, 60), (50.0, 100)]
+
+
+def _curve(**kwargs):
+    kwargs.setdefault("points", POINTS)
+    return FanCurve(
+        device_id=1, channel="fan", source_key="Liquid temperature", **kwargs
+    )
+
+
+def _sample(temperature):
+    return [StatusValue(key="Liquid temperature", value=temperature, unit="°C")]
+
+
+class TestInterpolate:
+    @pytest.mark.parametrize(
+        ("temperature", "duty"),
+        [(20.0, 20), (30.0, 20), (35.0, 40), (45.0, 80), (50.0, 100), (70.0, 100)],
+    )
+    def test_linear_and_clamped(self, temperature, duty):
+        assert interpolate(POINTS, temperature) == duty
+
+
+class TestCurveEngine:
+    def test_sample_writes_curve_duty(self):
+        write = MagicMock()
+        engine = CurveEngine(write)
+        engine.set_curve(_curve())
+
+        engine.on_sample(1, _sample(35.0), 0.0)
+
+        write.assert_called_once_with(1, "fan", 40)
+        (state,) = engine.curves()
+        assert (state.duty, state.evaluations, state.writes) == (40, 1, 1)
+        assert state.decision_latency is not None
+
+    def test_unchanged_duty_is_not_rewritten(self):
+        write = MagicMock()
+        engine = CurveEngine(write)
+        engine.set_curve(_curve())
+
+        engine.on_sample(1, _sample(35.0), 0.0)
+        engine.on_sample(1, _sample(35.0), 1.0)
+
+        write.assert_called_once()
+        assert engine.curves()[0].evaluations == 2
+
+    def test_hysteresis_holds_small_changes(self):
+        write = MagicMock()
+        engine = CurveEngine(write)
+        engine.set_curve(_curve(hysteresis=2.0))
+
+        for at, temperature in enumerate([35.0, 36.0, 34.0, 37.5]):
+            engine.on_sample(1, _sample(temperature), float(at))
+
+        assert [c.args[2] for c in write.call_args_list] == [40, 50]
+
+    def test_response_time_lags_temperature(self):
+        write = MagicMock()
+        engine = CurveEngine(write)
+        engine.set_curve(_curve(response_time=1.0))
+
+        engine.on_sample(1, _sample(30.0), 0.0)
+        engine.on_sample(1, _sample(40.0), 1.0)  # alpha = 1 / (1 + 1)
+
+        assert engine.curves()[0].temperature == pytest.approx(35.0)
+        assert write.call_args.args[2] == 40
+
+    def test_other_source_device_is_ignored(self):
+        write = MagicMock()
+        engine = CurveEngine(write)
+        engine.set_curve(_curve(source_device_id=2))
+
+        engine.on_sample(1, _sample(45.0), 0.0)
+        write.assert_not_called()
+        engine.on_sample(2, _sample(45.0), 0.0)
+        write.assert_called_once_with(1, "fan", 80)
+        assert engine.source_devices() == {2}
+
+    def test_missing_key_is_skipped(self):
+        write = MagicMock()
+        engine = CurveEngine(write)
+        engine.set_curve(_curve())
+
+        engine.on_sample(1, [StatusValue(key="Fan speed", value=900.0, unit="rpm")], 0)
+
+        write.assert_not_called()
+        assert engine.curves()[0].evaluations == 0
+
+    def test_clear_curve(self):
+        engine = CurveEngine(MagicMock())
+        engine.set_curve(_curve())
+        assert engine.clear_curve(1, "fan")
+        assert not engine.clear_curve(1, "fan")
+        assert engine.curves() == []
+
+
+class TestStatusSampler:
+    def test_samples_demanded_devices_until_stopped(self):
+        sampled = threading.Event()
+        sample = MagicMock(side_effect=lambda _: sampled.set())
+        sampler = StatusSampler(0.01, demand=lambda: [4], sample=sample)
+
+        sampler.start()
+        assert sampled.wait(timeout=2.0)
+        sampler.stop()
+
+        assert not sampler.running
+        sample.assert_called_with(4)
+
+    def test_failing_sample_keeps_loop_alive(self):
+        calls = []
+        done = threading.Event()
+
+        def sample(device_id):
+            calls.append(device_id)
+            if len(calls) >= 2:
+                done.set()
+            raise RuntimeError("device gone")
+
+        sampler = StatusSampler(0.01, demand=lambda: [1], sample=sample)
+        sampler.start()
+        assert done.wait(timeout=2.0)
+        sampler.stop()
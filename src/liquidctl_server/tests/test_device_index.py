@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+import pytest
+from liquidctl_server.service.device_index import MAX_MEMO_ENTRIES, DeviceIndex
+
+
+def _device(driver, description, vendor_id, product_id, color_channels):
+    # The index keys drivers on the class name, so each fake gets its own class.
+    device = type(driver, (MagicMock,), {})()
+    device.description = description
+    device.vendor_id = vendor_id
+    device.product_id = product_id
+    device._color_channels = color_channels
+    return device
+
+
+@pytest.fixture
+def index():
+    return DeviceIndex(
+        {
+            2: _device(
+                "SmartDevice2", "NZXT Smart Device V2", 0x1E71, 0x2006, {"led1": 1}
+            ),
+            1: _device(
+                "KrakenX3",
+                "NZXT Kraken X (X53, X63 or X73)",
+                0x1E71,
+                0x2007,
+                {"ring": 1},
+            ),
+        }
+    )
+
+
+class TestDeviceIndex:
+    @pytest.mark.parametrize(
+        ("match", "device_id"),
+        [
+            ("kraken", 1),
+            ("SMART DEVICE", 2),
+            ("nzxt", 1),  # Several matches: lowest id
+            ("id:2", 2),
+            ("driver:SmartDevice2", 2),
+            ("usb:1e71:2007", 1),
+            ("channel:led1", 2),
+            ("channel: Ring", 1),
+        ],
+    )
+    def test_resolves(self, index, match, device_id):
+        assert index.resolve(match) == device_id
+
+    @pytest.mark.parametrize("match", ["aquacomputer", "id:9", "driver:HydroPro"])
+    def test_unknown_match(self, index, match):
+        assert index.resolve(match) is None
+
+    def test_unknown_selector_is_a_description_match(self):
+        device = MagicMock()
+        device.description = "Fan hub: front"
+        assert DeviceIndex({1: device}).resolve("hub: front") == 1
+
+    def test_memoizes_matches(self, index):
+        index.resolve("kraken")
+        index._entries = []
+        assert index.resolve("kraken") == 1
+
+    def test_memo_is_bounded(self, index):
+        for n in range(MAX_MEMO_ENTRIES + 10):
+            index.resolve(f"missing {n}")
+        assert len(index._memo) <= MAX_MEMO_ENTRIES
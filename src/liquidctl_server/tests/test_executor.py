@@ -14,11 +14,10 @@ class TestDeviceJobRun:
         job.run()
         assert future.result() == 10
 
-    def test_exception_sets_on_future_and_reraises(self):
+    def test_exception_sets_on_future_only(self):
         future = Future()
         job = _DeviceJob(future, lambda: (_ for _ in ()).throw(ValueError("boom")))
-        with pytest.raises(ValueError, match="boom"):
-            job.run()
+        job.run()
         with pytest.raises(ValueError, match="boom"):
             future.result()
 
@@ -75,6 +74,111 @@ class TestSubmitAndShutdown:
         assert executor.device_queue_empty(1) is True
 
 
+class TestFailingJobs:
+    def test_worker_survives_a_failing_job(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+
+        def fail():
+            raise RuntimeError("HID write failed")
+
+        try:
+            with pytest.raises(RuntimeError):
+                executor.submit(1, fail).result(timeout=2.0)
+            with pytest.raises(RuntimeError):
+                executor.submit_idle(1, fail).result(timeout=2.0)
+            assert executor.submit(1, lambda: 7).result(timeout=2.0) == 7
+        finally:
+            executor.shutdown()
+
+
+class TestSubmitKwargs:
+    def test_job_can_take_device_id_keyword(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        try:
+            job = executor.submit(1, lambda device_id: device_id * 10, device_id=3)
+            idle = executor.submit_idle(1, lambda device_id: device_id, device_id=4)
+            assert job.result(timeout=2.0) == 30
+            assert idle.result(timeout=2.0) == 4
+        finally:
+            executor.shutdown()
+
+
+class TestSubmitIdle:
+    def test_idle_job_runs_after_queued_regular_jobs(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        order = []
+        gate = threading.Event()
+        try:
+            executor.submit(1, gate.wait)
+            idle = executor.submit_idle(1, lambda: order.append("idle"))
+            regular = executor.submit(1, lambda: order.append("regular"))
+            gate.set()
+            regular.result(timeout=2.0)
+            idle.result(timeout=2.0)
+        finally:
+            executor.shutdown()
+
+        assert order == ["regular", "idle"]
+
+    def test_idle_job_runs_on_idle_worker(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        try:
+            assert executor.submit_idle(1, lambda: 7).result(timeout=2.0) == 7
+        finally:
+            executor.shutdown()
+
+
+class TestObserve:
+    def test_jobs_report_timings(self):
+        observed = []
+        executor = DeviceExecutor(observe=lambda *args: observed.append(args))
+        executor.set_number_of_devices(1)
+
+        def get_status():
+            raise ValueError("boom")
+
+        try:
+            executor.submit(1, lambda: None).result(timeout=2.0)
+            with pytest.raises(ValueError):
+                executor.submit(1, get_status).result(timeout=2.0)
+        finally:
+            executor.shutdown()
+
+        (device_id, name, queue_wait, driver, ok), failed = observed
+        assert (device_id, name, ok) == (1, "<lambda>", True)
+        assert queue_wait >= 0 and driver >= 0
+        assert failed[1:2] == ("get_status",) and failed[4] is False
+
+    def test_queue_depths(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        gate = threading.Event()
+        try:
+            executor.submit(1, gate.wait)
+            executor.submit(1, lambda: None)
+            executor.submit(1, lambda: None)
+            depth, max_depth = executor.queue_depths()[1]
+            assert max_depth >= depth >= 1
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    def test_reset_max_depths(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        try:
+            executor.submit(1, lambda: None).result(timeout=2.0)
+            assert executor.queue_depths()[1][1] >= 1
+            executor.reset_max_depths()
+            assert executor.queue_depths()[1] == (0, 0)
+        finally:
+            executor.shutdown()
+
+
 class TestQueueWorker:
     def test_none_sentinel_terminates_worker(self):
         q = queue.SimpleQueue()
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from liquidctl_server.models import HistoryLimits, StatusValue
+from liquidctl_server.service.history import HistoryStore
+
+
+def _sample(temperature, speed=None):
+    values = [StatusValue(key="Liquid temperature", value=temperature, unit="°C")]
+    if speed is not None:
+        values.append(StatusValue(key="Pump speed", value=speed, unit="rpm"))
+    return values
+
+
+def _store(temperatures, interval=1.0, **limits):
+    """A store holding one sample per interval, the last one taken just now."""
+    store = HistoryStore(HistoryLimits(**limits))
+    now = time.monotonic()
+    for n, temperature in enumerate(temperatures):
+        age = (len(temperatures) - 1 - n) * interval
+        store.on_sample(1, _sample(temperature), now - age)
+    return store
+
+
+class TestHistoryStore:
+    def test_raw_samples_oldest_first(self):
+        (series,) = _store([30.0, 31.0, 32.0]).history(1, None, 60, 0, None)
+        assert (series.key, series.unit) == ("Liquid temperature", "°C")
+        assert series.values == [30.0, 31.0, 32.0]
+        assert series.ages == pytest.approx([2.0, 1.0, 0.0], abs=0.1)
+        assert series.min is None
+
+    def test_time_range(self):
+        store = _store([float(n) for n in range(10)])
+        (series,) = store.history(1, None, since=5.5, until=1.5, resolution=None)
+        assert series.values == [4.0, 5.0, 6.0, 7.0]
+
+    def test_ring_keeps_the_newest_samples(self):
+        store = _store([float(n) for n in range(10)], capacity=4)
+        (series,) = store.history(1, None, 60, 0, None)
+        assert series.values == [6.0, 7.0, 8.0, 9.0]
+
+    def test_buckets_report_mean_min_max(self):
+        store = _store([10.0, 20.0, 30.0, 40.0, 50.0, 60.0])
+        (series,) = store.history(1, None, since=5.5, until=0, resolution=2.0)
+        assert series.values == [15.0, 35.0, 55.0]
+        assert series.min == [10.0, 30.0, 50.0]
+        assert series.max == [20.0, 40.0, 60.0]
+        assert series.ages == pytest.approx([5.5, 3.5, 1.5], abs=0.1)
+
+    def test_empty_buckets_are_skipped(self):
+        store = _store([1.0, 2.0], interval=10.0)
+        (series,) = store.history(1, None, since=15, until=0, resolution=1.0)
+        assert series.values == [1.0, 2.0]
+
+    def test_key_selection_and_non_numeric_values(self):
+        store = HistoryStore(HistoryLimits())
+        store.on_sample(1, _sample(30.0, speed=2000.0), time.monotonic())
+        store.on_sample(
+            1, [StatusValue(key="Mode", value=None, unit="")], time.monotonic()
+        )
+        series = store.history(1, ["Pump speed", "Mode"], 60, 0, None)
+        assert [s.key for s in series] == ["Pump speed"]
+
+    def test_other_devices_are_not_returned(self):
+        assert _store([30.0]).history(2, None, 60, 0, None) == []
+
+    def test_series_limit(self):
+        store = HistoryStore(HistoryLimits(max_series=1))
+        store.on_sample(1, _sample(30.0, speed=2000.0), time.monotonic())
+        assert [s.key for s in store.history(1, None, 60, 0, None)] == [
+            "Liquid temperature"
+        ]
+
+    def test_new_limits_drop_history(self):
+        store = _store([30.0])
+        store.set_limits(HistoryLimits(capacity=10))
+        assert store.history(1, None, 60, 0, None) == []
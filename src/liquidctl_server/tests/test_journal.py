@@ -0,0 +1,149 @@
+import io
+import os
+import time
+
+import pytest
+
+from liquidctl_server.models import StatusValue
+from liquidctl_server.service import journal
+from liquidctl_server.service.journal import (
+    JournalReader,
+    SensorJournal,
+    _decode_series,
+    _encode_series,
+    export_csv,
+)
+
+
+def _values(temperature, speed):
+    return [
+        StatusValue(key="Liquid temperature", value=temperature, unit="°C"),
+        StatusValue(key="Pump speed", value=speed, unit="rpm"),
+        StatusValue(key="Firmware", value=None, unit=""),
+    ]
+
+
+def _write(path, samples, device_id=1):
+    """Journal (temperature, speed) samples one second apart, ending now."""
+    sensor_journal = SensorJournal(str(path))
+    now = time.monotonic()
+    for n, (temperature, speed) in enumerate(samples):
+        sampled_at = now - (len(samples) - 1 - n)
+        sensor_journal.on_sample(device_id, _values(temperature, speed), sampled_at)
+    sensor_journal.close()
+
+
+class TestSeriesEncoding:
+    @pytest.mark.parametrize(
+        "values",
+        [
+            [30.5, 30.5, 30.6, -2.25, 0.0, 1e300, float("inf")],
+            [1200.0, 1210.0, 1190.0],
+            [42.0],
+        ],
+    )
+    def test_round_trip(self, values):
+        times = [1_700_000_000_000 + 1000 * n + (n % 3) for n in range(len(values))]
+        out = bytearray()
+        _encode_series(out, 3, "Liquid temperature", "°C", times, values)
+
+        device_id, key, unit, decoded_times, decoded, end = _decode_series(
+            bytes(out), 0
+        )
+
+        assert (device_id, key, unit, end) == (3, "Liquid temperature", "°C", len(out))
+        assert decoded_times == [t / 1000 for t in times]
+        assert decoded == values
+
+    def test_repeated_values_take_one_byte(self):
+        out = bytearray()
+        _encode_series(out, 1, "k", "", [1000 * n for n in range(101)], [2000.0] * 101)
+        # Header and first sample, then one byte per time and per value.
+        assert len(out) < 30 + 2 * 100
+
+
+class TestSensorJournal:
+    def test_samples_round_trip_in_time_order(self, tmp_path):
+        path = tmp_path / "sensors.journal"
+        _write(path, [(30.0, 2000.0), (30.5, 2010.0), (31.0, 1990.0)])
+
+        with JournalReader(str(path)) as reader:
+            samples = list(reader.samples())
+
+        assert [(key, value) for _, _, key, value, _ in samples] == [
+            ("Liquid temperature", 30.0),
+            ("Pump speed", 2000.0),
+            ("Liquid temperature", 30.5),
+            ("Pump speed", 2010.0),
+            ("Liquid temperature", 31.0),
+            ("Pump speed", 1990.0),
+        ]
+        assert samples[-1][0] == pytest.approx(time.time(), abs=5)
+
+    def test_range_and_device_filter(self, tmp_path):
+        path = tmp_path / "sensors.journal"
+        _write(path, [(30.0, 2000.0), (31.0, 2000.0), (32.0, 2000.0)])
+        _write(path, [(40.0, 1000.0)], device_id=2)
+
+        with JournalReader(str(path)) as reader:
+            everything = list(reader.samples())
+            start = everything[0][0] + 0.5
+            in_range = list(reader.samples(start=start, device_id=1))
+
+        assert {sample[1] for sample in everything} == {1, 2}
+        assert [v for _, _, k, v, _ in in_range if k == "Liquid temperature"] == [
+            31.0,
+            32.0,
+        ]
+
+    def test_chunks_are_indexed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(journal, "CHUNK_SAMPLES", 4)
+        path = tmp_path / "sensors.journal"
+        _write(path, [(float(n), 1000.0) for n in range(10)])
+
+        assert os.path.getsize(str(path) + ".idx") == 5 * journal._INDEX_ENTRY.size
+        with JournalReader(str(path)) as reader:
+            assert len(list(reader.samples())) == 20
+
+    def test_torn_chunk_is_cut_off_on_reopen(self, tmp_path):
+        path = tmp_path / "sensors.journal"
+        _write(path, [(30.0, 2000.0)])
+        size = os.path.getsize(path)
+        with open(path, "ab") as data:
+            data.write(journal.CHUNK_MAGIC + b"\xff" * 10)  # Crash mid-write
+
+        _write(path, [(31.0, 2000.0)])
+
+        with JournalReader(str(path)) as reader:
+            temperatures = [v for _, _, k, v, _ in reader.samples() if "temp" in k]
+        assert temperatures == [30.0, 31.0]
+        assert os.path.getsize(path) > size
+
+    def test_missing_index_is_rebuilt(self, tmp_path):
+        path = tmp_path / "sensors.journal"
+        _write(path, [(30.0, 2000.0)])
+        os.remove(str(path) + ".idx")
+
+        with JournalReader(str(path)) as reader:
+            assert len(list(reader.samples())) == 2
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_bytes(b"hello world")
+        with pytest.raises(ValueError):
+            SensorJournal(str(path))
+
+
+class TestExportCsv:
+    def test_streams_rows(self, tmp_path):
+        path = tmp_path / "sensors.journal"
+        _write(path, [(30.0, 2000.0)])
+        out = io.StringIO()
+
+        rows = export_csv(str(path), out)
+
+        lines = out.getvalue().splitlines()
+        assert rows == 2
+        assert lines[0] == "time,device_id,key,value,unit"
+        assert lines[1].endswith(",1,Liquid temperature,30.0,°C")
+        assert "+00:00" in lines[1]
@@ -0,0 +1,248 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures import wait as wait_futures
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from liquidctl_server.models import BadRequestException
+from liquidctl_server.service.executor import DeviceExecutor
+from liquidctl_server.service.led_frames import LedFramePipeline
+
+RED = [(255, 0, 0)]
+GREEN = [(0, 255, 0)]
+
+
+def _pipeline():
+    executor = MagicMock()
+    executor.submit.side_effect = lambda *args, **kwargs: Future()
+    return LedFramePipeline(executor), executor
+
+
+def _run_last_job(executor):
+    """Run the most recently submitted frame job like a device worker would."""
+    call = executor.submit.call_args
+    call.args[1](**call.kwargs)
+
+
+class TestLedFramePipeline:
+    def test_identical_frame_is_dropped(self):
+        pipeline, executor = _pipeline()
+        set_color = MagicMock()
+
+        assert pipeline.submit(1, "ring", "fixed", RED, set_color) is not None
+        assert pipeline.submit(1, "ring", "fixed", list(RED), set_color) is None
+        assert pipeline.submit(1, "ring", "breathing", RED, set_color) is not None
+
+        (stats,) = pipeline.stats()
+        assert (stats.received, stats.identical) == (3, 1)
+        assert executor.submit.call_count == 2
+
+    def test_unstarted_frame_is_superseded(self):
+        pipeline, _ = _pipeline()
+        set_color = MagicMock()
+
+        first = pipeline.submit(1, "ring", "fixed", RED, set_color)
+        second = pipeline.submit(1, "ring", "fixed", GREEN, set_color)
+
+        assert first.cancelled()
+        assert not second.cancelled()
+        assert pipeline.stats()[0].superseded == 1
+
+    def test_running_frame_is_not_cancelled(self):
+        pipeline, _ = _pipeline()
+        first = pipeline.submit(1, "ring", "fixed", RED, MagicMock())
+        first.set_running_or_notify_cancel()
+
+        pipeline.submit(1, "ring", "fixed", GREEN, MagicMock())
+
+        assert not first.cancelled()
+        assert pipeline.stats()[0].superseded == 0
+
+    def test_channels_are_independent(self):
+        pipeline, _ = _pipeline()
+        ring = pipeline.submit(1, "ring", "fixed", RED, MagicMock())
+        pipeline.submit(1, "logo", "fixed", RED, MagicMock())
+        assert not ring.cancelled()
+        assert len(pipeline.stats()) == 2
+
+    def test_applied_frames_count_towards_fps(self):
+        pipeline, executor = _pipeline()
+        set_color = MagicMock()
+        with patch(
+            "liquidctl_server.service.led_frames.time.monotonic", return_value=10.0
+        ):
+            for colors in (RED, GREEN):
+                pipeline.submit(1, "ring", "fixed", colors, set_color)
+                _run_last_job(executor)
+            (stats,) = pipeline.stats()
+
+        set_color.assert_called_with(channel="ring", mode="fixed", colors=GREEN)
+        assert stats.applied == 2
+        assert stats.fps == pytest.approx(1.0)
+
+    def test_failed_frame_can_be_resent(self):
+        pipeline, executor = _pipeline()
+        set_color = MagicMock(side_effect=OSError("hid"))
+        pipeline.submit(1, "ring", "fixed", RED, set_color)
+        with pytest.raises(OSError):
+            _run_last_job(executor)
+
+        assert pipeline.submit(1, "ring", "fixed", RED, set_color) is not None
+        assert pipeline.stats()[0].failed == 1
+
+    def test_failures_do_not_stop_the_device_queue(self):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        pipeline = LedFramePipeline(executor)
+        set_color = MagicMock(side_effect=[OSError("hid"), OSError("hid"), None])
+        try:
+            for colors in (RED, GREEN, RED):
+                future = pipeline.submit(1, "ring", "fixed", colors, set_color)
+                wait_futures([future], timeout=2.0)
+            assert executor.submit(1, lambda: "status").result(timeout=2.0) == "status"
+        finally:
+            executor.shutdown()
+
+        (stats,) = pipeline.stats()
+        assert (stats.failed, stats.applied) == (2, 1)
+        assert future.exception() is None
+
+
+class TestDeltaFrames:
+    def test_changes_apply_to_current_frame(self):
+        pipeline, executor = _pipeline()
+        pipeline.submit(1, "led1", "super-fixed", RED * 4, MagicMock())
+
+        pipeline.submit_delta(1, "led1", "super-fixed", [(2, 0, 0, 255)], MagicMock())
+
+        frame = executor.submit.call_args.kwargs["frame"]
+        assert frame == ("super-fixed", [(255, 0, 0)] * 2 + [(0, 0, 255), (255, 0, 0)])
+
+    def test_deltas_chain_on_the_latest_frame(self):
+        pipeline, executor = _pipeline()
+        pipeline.submit(1, "led1", "super-fixed", RED * 2, MagicMock())
+        pipeline.submit_delta(1, "led1", "super-fixed", [(0, 0, 1, 0)], MagicMock())
+        pipeline.submit_delta(1, "led1", "super-fixed", [(1, 0, 2, 0)], MagicMock())
+
+        frame = executor.submit.call_args.kwargs["frame"]
+        assert frame[1] == [(0, 1, 0), (0, 2, 0)]
+
+    def test_no_change_is_an_identical_frame(self):
+        pipeline, _ = _pipeline()
+        pipeline.submit(1, "led1", "super-fixed", RED, MagicMock())
+        delta = [(0, 255, 0, 0)]
+        assert (
+            pipeline.submit_delta(1, "led1", "super-fixed", delta, MagicMock()) is None
+        )
+
+    def test_without_current_frame_raises(self):
+        pipeline, _ = _pipeline()
+        with pytest.raises(BadRequestException, match="No current frame"):
+            pipeline.submit_delta(1, "led1", "super-fixed", [(0, 1, 2, 3)], MagicMock())
+
+    def test_index_out_of_range_raises(self):
+        pipeline, _ = _pipeline()
+        pipeline.submit(1, "led1", "super-fixed", RED, MagicMock())
+        with pytest.raises(BadRequestException, match="out of range"):
+            pipeline.submit_delta(1, "led1", "super-fixed", [(1, 1, 2, 3)], MagicMock())
+
+
+class TestFrameGroups:
+    def _executor(self, devices=2):
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(devices)
+        return executor
+
+    @staticmethod
+    def _run_job(call):
+        call.args[1](**call.kwargs)
+
+    def test_single_frame_queued_after_a_group_is_the_latest(self):
+        pipeline, executor = _pipeline()
+        set_color = MagicMock()
+        pipeline.submit_group({1: (set_color, [("ring", "fixed", RED)])}, 1.0)
+        group_job = executor.submit.call_args
+        pipeline.submit(1, "ring", "fixed", GREEN, set_color)
+        single_job = executor.submit.call_args
+
+        self._run_job(group_job)
+        self._run_job(single_job)
+
+        set_color.assert_called_with(channel="ring", mode="fixed", colors=GREEN)
+        assert pipeline.submit(1, "ring", "fixed", RED, set_color) is not None
+        (stats,) = pipeline.stats()
+        assert (stats.received, stats.applied, stats.identical) == (3, 2, 0)
+
+    def test_group_supersedes_an_unstarted_frame(self):
+        pipeline, _ = _pipeline()
+        single = pipeline.submit(1, "ring", "fixed", GREEN, MagicMock())
+
+        pipeline.submit_group({1: (MagicMock(), [("ring", "fixed", RED)])}, 1.0)
+
+        assert single.cancelled()
+        assert pipeline.stats()[0].superseded == 1
+        assert pipeline.submit(1, "ring", "fixed", RED, MagicMock()) is None
+
+    def test_failed_group_frame_is_counted_and_can_be_resent(self):
+        pipeline, executor = _pipeline()
+        set_color = MagicMock(side_effect=[OSError("hid"), None])
+        frames = [("ring", "fixed", RED), ("logo", "fixed", GREEN)]
+        pipeline.submit_group({1: (set_color, frames)}, 1.0)
+
+        with pytest.raises(OSError):
+            self._run_job(executor.submit.call_args)
+
+        assert set_color.call_count == 2  # The other channel is still written
+        ring, logo = pipeline.stats()
+        assert (ring.failed, ring.applied) == (1, 0)
+        assert (logo.failed, logo.applied) == (0, 1)
+        assert pipeline.submit(1, "ring", "fixed", RED, set_color) is not None
+
+    def test_devices_start_together(self):
+        executor = self._executor()
+        pipeline = LedFramePipeline(executor)
+        ring, hub = MagicMock(), MagicMock()
+        try:
+            group = pipeline.submit_group(
+                {
+                    1: (ring, [("ring", "super-fixed", RED)]),
+                    2: (hub, [("led1", "super-fixed", GREEN), ("led2", "fixed", RED)]),
+                },
+                sync_timeout=2.0,
+            )
+            wait_futures(group.futures.values(), timeout=2.0)
+            result = group.update()
+        finally:
+            executor.shutdown()
+
+        assert result.done and result.synced
+        assert result.skew is not None and result.skew < 0.5
+        assert result.device_ids == [1, 2]
+        assert hub.call_count == 2
+        ring.assert_called_once_with(channel="ring", mode="super-fixed", colors=RED)
+        assert pipeline.submit(1, "ring", "super-fixed", RED, MagicMock()) is None
+
+    def test_busy_device_breaks_sync(self):
+        executor = self._executor()
+        pipeline = LedFramePipeline(executor)
+        release = threading.Event()
+        executor.submit(2, release.wait, timeout=2.0)  # Device 2 is busy
+        try:
+            group = pipeline.submit_group(
+                {
+                    1: (MagicMock(), [("ring", "fixed", RED)]),
+                    2: (MagicMock(), [("led1", "fixed", RED)]),
+                },
+                sync_timeout=0.05,
+            )
+            group.futures[1].result(timeout=2.0)
+            release.set()
+            group.futures[2].result(timeout=2.0)
+        finally:
+            executor.shutdown()
+
+        result = pipeline.group_results()[0]
+        assert not result.synced
+        assert result.done
+        assert result.errors == []
@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from liquidctl_server.service.metrics import LatencyHistogram, MetricsRecorder
+
+
+def _recorder(depths=None):
+    return MetricsRecorder(queue_depths=lambda: depths or {})
+
+
+class TestLatencyHistogram:
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for n in range(1, 101):
+            histogram.record(n / 1000)  # 1 ms .. 100 ms
+
+        summary = histogram.summary()
+        assert summary.count == 100
+        assert summary.mean == pytest.approx(0.0505)
+        assert 0.050 <= summary.p50 <= 0.050 * 1.1
+        assert 0.095 <= summary.p95 <= 0.095 * 1.1
+        assert 0.099 <= summary.p99 <= 0.100
+        assert summary.max == 0.1
+
+    def test_percentile_never_exceeds_max(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0123)
+        assert histogram.summary().p99 == 0.0123
+
+    def test_out_of_range_values(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        histogram.record(1000.0)
+        summary = histogram.summary()
+        # Below the first bound reports that bound; above the last, the max.
+        assert (summary.p50, summary.p99) == (1e-6, 1000.0)
+
+    def test_empty_summary(self):
+        summary = LatencyHistogram().summary()
+        assert (summary.count, summary.p50) == (0, None)
+
+
+class TestMetricsRecorder:
+    def test_jobs_by_device_and_operation(self):
+        recorder = _recorder()
+        recorder.observe_job(1, "get_status", 0.001, 0.02, True)
+        recorder.observe_job(1, "_long_async_status_request", 0.003, 0.04, False)
+        recorder.observe_job(2, "set_fixed_speed", 0.0, 0.01, True)
+
+        first, second = recorder.metrics().operations
+        assert (first.device_id, first.operation) == (1, "get_status")
+        assert first.driver.count == 2 and first.errors == 1
+        assert first.queue_wait.max == 0.003
+        assert (second.device_id, second.operation) == (2, "set_fixed_speed")
+
+    def test_commands(self):
+        recorder = _recorder()
+        recorder.observe_command("get.statuses", 1e-5, 0.02, 1e-4, True)
+        recorder.observe_command("invalid", 1e-5, None, 1e-5, False)
+
+        by_name = {c.command: c for c in recorder.metrics().commands}
+        assert by_name["get.statuses"].handle.count == 1
+        assert by_name["invalid"].handle.count == 0
+        assert by_name["invalid"].errors == 1
+
+    def test_device_counters_and_queue_depths(self):
+        recorder = _recorder(depths={1: (2, 5)})
+        recorder.count_timeout(1)
+        recorder.count_cache_fallback(1)
+        recorder.count_cache_fallback(3)
+
+        first, third = recorder.metrics().devices
+        assert (first.queue_depth, first.max_queue_depth) == (2, 5)
+        assert (first.timeouts, first.cache_fallbacks) == (1, 1)
+        assert (third.device_id, third.cache_fallbacks) == (3, 1)
+
+    def test_reset(self):
+        recorder = _recorder()
+        recorder.observe_job(1, "get_status", 0.001, 0.02, True)
+        recorder.count_timeout(1)
+
+        assert recorder.metrics(reset=True).operations
+        after = recorder.metrics()
+        assert after.operations == [] and after.devices == []
+
+    def test_reset_starts_queue_depth_maxima_over(self):
+        reset_queue_depths = MagicMock()
+        recorder = MetricsRecorder(
+            queue_depths=lambda: {1: (0, 4)}, reset_queue_depths=reset_queue_depths
+        )
+        recorder.metrics()
+        reset_queue_depths.assert_not_called()
+        recorder.metrics(reset=True)
+        reset_queue_depths.assert_called_once_with()
+
+    def test_fixed_speed_batches_are_their_own_operation(self):
+        recorder = _recorder()
+        recorder.observe_job(1, "set_fixed_speed", 0.0, 0.01, True)
+        recorder.observe_job(1, "_write_fixed_speeds", 0.0, 0.03, True)
+
+        names = [o.operation for o in recorder.metrics().operations]
+        assert names == ["set_fixed_speed", "set_fixed_speeds"]
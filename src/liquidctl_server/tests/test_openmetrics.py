@@ -0,0 +1,164 @@
+import re
+import urllib.error
+import urllib.request
+
+import pytest
+
+from liquidctl_server.models import LedChannelStats, StatusValue, WriteStats
+from liquidctl_server.service.metrics import MetricsRecorder
+from liquidctl_server.service.openmetrics import (
+    CONTENT_TYPE,
+    MetricsFileWriter,
+    MetricsHttpServer,
+    OpenMetricsExporter,
+)
+
+
+class _Rig:
+    def __init__(self):
+        self.metrics = MetricsRecorder(queue_depths=lambda: {1: (2, 4)})
+        self.rows = [StatusValue(key="Liquid temperature", value=30.5, unit="°C")]
+        self.sampled_at = 1.0
+        self.exporter = OpenMetricsExporter(
+            self.metrics,
+            queue_depths=lambda: {1: (2, 4)},
+            write_stats=lambda: [
+                WriteStats(device_id=1, channel="fan", applied=3, deferred=1)
+            ],
+            led_stats=lambda: [
+                LedChannelStats(device_id=1, channel="led1", applied=5, fps=12.5)
+            ],
+            sensors=lambda: [(1, 'Hub "A"', self.sampled_at, self.rows)],
+        )
+        self.exporter.clients = lambda: 2
+
+    def text(self):
+        return self.exporter.render().decode()
+
+
+def _sample(text, name):
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.MULTILINE)
+    return match and match.group(1)
+
+
+class TestOpenMetricsExporter:
+    def test_families_and_eof(self):
+        rig = _Rig()
+        rig.metrics.count_timeout(1)
+        text = rig.text()
+
+        assert text.endswith("# EOF\n")
+        assert "# TYPE liquidctl_bridge_timeouts counter" in text
+        assert _sample(text, 'liquidctl_bridge_timeouts_total{device="1"}') == "1"
+        assert _sample(text, 'liquidctl_bridge_queue_depth{device="1"}') == "2"
+        assert _sample(text, "liquidctl_bridge_clients") == "2"
+        assert (
+            _sample(
+                text,
+                'liquidctl_bridge_writes_total{device="1",channel="fan",outcome="deferred"}',
+            )
+            == "1"
+        )
+        assert _sample(text, 'liquidctl_bridge_led_fps{device="1",channel="led1"}') == (
+            "12.5"
+        )
+
+    def test_sensor_labels_are_escaped(self):
+        text = _Rig().text()
+        name = (
+            'liquidctl_bridge_sensor{device="1",description="Hub \\"A\\"",'
+            'key="Liquid temperature",unit="°C"}'
+        )
+        assert _sample(text, name) == "30.5"
+
+    def test_non_finite_sensor_values_use_openmetrics_spelling(self):
+        rig = _Rig()
+        rig.rows = [
+            StatusValue(key=key, value=value, unit="")
+            for key, value in (
+                ("ratio", float("nan")),
+                ("up", float("inf")),
+                ("down", float("-inf")),
+            )
+        ]
+        text = rig.text()
+        prefix = 'liquidctl_bridge_sensor{device="1",description="Hub \\"A\\"",key='
+        assert _sample(text, prefix + '"ratio",unit=""}') == "NaN"
+        assert _sample(text, prefix + '"up",unit=""}') == "+Inf"
+        assert _sample(text, prefix + '"down",unit=""}') == "-Inf"
+        assert not re.search(r" (nan|inf|-inf)$", text, re.MULTILINE)
+
+    def test_histogram_buckets_are_cumulative(self):
+        rig = _Rig()
+        for driver in (0.0015, 0.003, 0.2):
+            rig.metrics.observe_job(1, "get_status", 1e-5, driver, True)
+        text = rig.text()
+
+        labels = 'device="1",operation="get_status",phase="driver"'
+        buckets = [
+            int(count)
+            for count in re.findall(
+                rf"^liquidctl_bridge_operation_seconds_bucket\{{{labels},le=\S+\}} (\d+)$",
+                text,
+                re.MULTILINE,
+            )
+        ]
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == 3
+        assert (
+            _sample(text, f"liquidctl_bridge_operation_seconds_count{{{labels}}}")
+            == "3"
+        )
+        le_2ms = f'liquidctl_bridge_operation_seconds_bucket{{{labels},le="0.002048"}}'
+        assert _sample(text, le_2ms) == "1"
+
+    def test_unchanged_series_are_not_copied_again(self, monkeypatch):
+        rig = _Rig()
+        rig.metrics.observe_job(1, "get_status", 1e-5, 0.01, True)
+        rig.text()
+
+        copies = []
+        changed_series = rig.metrics.changed_series
+        monkeypatch.setattr(
+            rig.metrics,
+            "changed_series",
+            lambda seen: copies.extend(changed_series(seen)) or copies,
+        )
+        rig.text()
+        assert copies == []
+
+    def test_new_sample_rerenders_sensor(self):
+        rig = _Rig()
+        rig.text()
+        rig.rows[0].value = 31.0
+        assert "} 30.5\n" in rig.text()  # Same sample: cached text
+        rig.sampled_at = 2.0
+        assert "} 31.0\n" in rig.text()
+
+    def test_reset_drops_series(self):
+        rig = _Rig()
+        rig.metrics.observe_job(1, "get_status", 1e-5, 0.01, True)
+        assert "operation_seconds_count" in rig.text()
+        rig.metrics.metrics(reset=True)
+        assert "operation_seconds_count" not in rig.text()
+
+
+class TestOutputs:
+    def test_file_is_rewritten(self, tmp_path):
+        path = tmp_path / "bridge.prom"
+        writer = MetricsFileWriter(_Rig().exporter, str(path), interval=60)
+        writer.close()
+        assert path.read_text(encoding="utf-8").endswith("# EOF\n")
+        assert not (tmp_path / "bridge.prom.tmp").exists()
+
+    def test_http_endpoint(self):
+        server = MetricsHttpServer(_Rig().exporter, 0)
+        try:
+            url = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+                assert response.headers["Content-Type"] == CONTENT_TYPE
+                assert response.read().endswith(b"# EOF\n")
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other", timeout=5)
+        finally:
+            server.close()
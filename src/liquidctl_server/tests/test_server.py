@@ -1,3 +1,4 @@
+import base64
 import contextlib
 import json
 import logging
@@ -9,10 +10,23 @@ import pytest
 
 from liquidctl_server import server
 from liquidctl_server.models import (
+    AlarmCondition,
+    AlarmEvent,
     BadRequestException,
+    BridgeMetrics,
     BridgeResponse,
+    ColumnarStatus,
+    HistorySeries,
+    LatencySummary,
+    LedChannelStats,
+    LedGroupResult,
     MessageStatus,
+    OperationMetrics,
     PipeError,
+    ProfileTarget,
+    SpeedProfileResult,
+    WriteResult,
+    WriteStatus,
 )
 from liquidctl_server.server import process_request
 
@@ -25,6 +39,7 @@ def _mock_service(statuses=None):
     svc = MagicMock()
     svc.get_statuses.return_value = statuses or []
     svc.set_fixed_speed.return_value = None
+    svc.set_color.return_value = None
     return svc
 
 
@@ -35,6 +50,47 @@ class TestGetStatuses:
         assert resp.status == MessageStatus.SUCCESS
         svc.get_statuses.assert_called_once()
 
+    def test_columnar_format_uses_columnar_statuses(self):
+        svc = _mock_service()
+        svc.get_statuses_columnar.return_value = [ColumnarStatus(1, 7, [283, None])]
+        raw = process_request(
+            b'{"command":"get.statuses","format":"columnar","fixed_point":1}', svc
+        )
+        assert msgspec.json.decode(raw)["data"] == [[1, 7, [283, None], None]]
+        svc.get_statuses_columnar.assert_called_once()
+        assert svc.get_statuses_columnar.call_args.kwargs["fixed_point"] == 1
+        svc.get_statuses.assert_not_called()
+
+    def test_include_static_false_is_forwarded(self):
+        svc = _mock_service()
+        process_request(b'{"command":"get.statuses","include_static":false}', svc)
+        assert svc.get_statuses.call_args.kwargs["include_static"] is False
+
+    def test_select_is_decoded(self):
+        svc = _mock_service()
+        process_request(
+            b'{"command":"get.statuses","select":{"devices":[2],"units":["\xc2\xb0C"]}}',
+            svc,
+        )
+        select = svc.get_statuses.call_args.kwargs["select"]
+        assert select.devices == frozenset({2})
+        assert select.units == frozenset({"°C"})
+        assert select.keys is None
+
+    def test_capabilities(self):
+        svc = _mock_service()
+        svc.get_capabilities.return_value = []
+        resp = _decode(process_request(b'{"command":"get.capabilities"}', svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.get_capabilities.assert_called_once()
+
+    def test_status_schema(self):
+        svc = _mock_service()
+        svc.get_status_schema.return_value = []
+        resp = _decode(process_request(b'{"command":"get.status_schema"}', svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.get_status_schema.assert_called_once()
+
 
 class TestSetFixedSpeed:
     def test_valid_payload_calls_service(self):
@@ -50,7 +106,9 @@ class TestSetFixedSpeed:
         ).encode()
         resp = _decode(process_request(payload, svc))
         assert resp.status == MessageStatus.SUCCESS
-        svc.set_fixed_speed.assert_called_once_with(1, {"channel": "fan1", "duty": 50})
+        svc.set_fixed_speed.assert_called_once_with(
+            1, {"channel": "fan1", "duty": 50}, wait=True
+        )
 
     def test_null_data_returns_error(self):
         svc = _mock_service()
@@ -59,6 +117,297 @@ class TestSetFixedSpeed:
         assert "Missing data" in resp.error
 
 
+class TestSetFixedSpeeds:
+    def test_channels_are_collected(self):
+        svc = _mock_service()
+        svc.set_fixed_speeds.return_value = None
+        payload = (
+            b'{"command":"set.fixed_speeds","device_id":2,"speeds":['
+            b'{"channel":"fan1","duty":40},{"channel":"fan2","duty":45},'
+            b'{"channel":"fan1","duty":50}]}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.set_fixed_speeds.assert_called_once_with(
+            2, {"fan1": 50, "fan2": 45}, wait=True
+        )
+
+
+class TestV2Requests:
+    def test_inline_fixed_speed_calls_service(self):
+        svc = _mock_service()
+        payload = (
+            b'{"command":"set.fixed_speed","device_id":2,'
+            b'"speed_kwargs":{"channel":"pump","duty":70}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.set_fixed_speed.assert_called_once_with(
+            2, {"channel": "pump", "duty": 70}, wait=True
+        )
+
+    def test_inline_set_led_calls_set_color(self):
+        svc = _mock_service()
+        payload = (
+            b'{"command":"set.led","device":"Kraken","channel":"ring",'
+            b'"mode":"super-fixed","colors":[[1,2,3]]}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.set_color.assert_called_once_with(
+            "Kraken", "ring", "super-fixed", [(1, 2, 3)], wait=True
+        )
+
+    def test_invalid_field_type_returns_protocol_error(self):
+        svc = _mock_service()
+        payload = (
+            b'{"command":"set.fixed_speed","device_id":1,'
+            b'"speed_kwargs":{"channel":"pump","duty":"high"}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.ERROR
+        assert "Protocol Error" in resp.error
+        assert "speed_kwargs.duty" in resp.error
+        svc.set_fixed_speed.assert_not_called()
+
+    def test_v1_data_is_honoured_when_all_fields_have_defaults(self):
+        svc = _mock_service()
+        svc.get_metrics.return_value = None
+        payload = b'{"command":"get.metrics","data":{"reset":true}}'
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.get_metrics.assert_called_once_with(reset=True)
+
+    def test_v1_data_wins_over_inline_fields(self):
+        svc = _mock_service()
+        svc.get_alarm_events.return_value = []
+        payload = b'{"command":"get.alarm_events","after":1,"data":{"after":7}}'
+        process_request(payload, svc)
+        assert svc.get_alarm_events.call_args.kwargs["after"] == 7
+
+    def test_data_key_inside_a_v2_value_is_not_an_envelope(self):
+        svc = _mock_service()
+        svc.get_history.return_value = []
+        payload = b'{"command":"get.history","device_id":1,"keys":["data"]}'
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+
+    def test_v2_request_is_decoded_in_one_pass(self):
+        svc = _mock_service()
+        payload = (
+            b'{"command":"set.fixed_speed","device_id":2,'
+            b'"speed_kwargs":{"channel":"pump","duty":70}}'
+        )
+        with patch("liquidctl_server.server._ENVELOPE_DECODER") as envelope:
+            resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        envelope.decode.assert_not_called()
+
+    def test_unknown_v1_command_returns_error(self):
+        svc = _mock_service()
+        payload = b'{"command":"does.not.exist","data":{}}'
+        resp = _decode(process_request(payload, svc))
+        assert "Unknown command" in resp.error
+
+    def test_invalid_v1_data_returns_protocol_error(self):
+        svc = _mock_service()
+        payload = b'{"command":"set.fixed_speed","data":{"device_id":"one"}}'
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.ERROR
+        assert "Protocol Error" in resp.error
+
+
+class TestWriteResults:
+    def test_async_write_returns_ticket(self):
+        svc = _mock_service()
+        svc.set_fixed_speed.return_value = WriteResult(
+            ticket=3,
+            device_id=1,
+            operation="set.fixed_speed",
+            status=WriteStatus.QUEUED,
+        )
+        payload = (
+            b'{"command":"set.fixed_speed","device_id":1,'
+            b'"speed_kwargs":{"channel":"pump","duty":70},"wait":false}'
+        )
+        data = msgspec.json.decode(process_request(payload, svc))["data"]
+        assert data["ticket"] == 3
+        assert data["status"] == "queued"
+        assert svc.set_fixed_speed.call_args.kwargs["wait"] is False
+
+    def test_get_write_results(self):
+        svc = _mock_service()
+        svc.get_write_results.return_value = []
+        resp = _decode(process_request(b'{"command":"get.write_results"}', svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.get_write_results.assert_called_once()
+
+
+class TestFanCurves:
+    def test_set_curve_is_decoded(self):
+        svc = _mock_service()
+        svc.set_curve.return_value = None
+        payload = (
+            b'{"command":"set.curve","curve":{"device_id":1,"channel":"fan",'
+            b'"source_key":"Liquid temperature","points":[[30,20],[50,100]],'
+            b'"hysteresis":1.5}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        (curve,) = svc.set_curve.call_args.args
+        assert curve.points == [(30.0, 20), (50.0, 100)]
+        assert curve.hysteresis == 1.5
+
+    def test_set_speed_profile(self):
+        svc = _mock_service()
+        svc.set_speed_profile.return_value = SpeedProfileResult(
+            1, "pump", ProfileTarget.FIRMWARE
+        )
+        payload = (
+            b'{"command":"set.speed_profile","device_id":1,"channel":"pump",'
+            b'"profile":[[30,60],[50,100]]}'
+        )
+        data = msgspec.json.decode(process_request(payload, svc))["data"]
+        assert data["target"] == "firmware"
+        svc.set_speed_profile.assert_called_once_with(
+            1, "pump", [(30.0, 60), (50.0, 100)], "Liquid temperature"
+        )
+
+    def test_get_curves(self):
+        svc = _mock_service()
+        svc.get_curves.return_value = []
+        resp = _decode(process_request(b'{"command":"get.curves"}', svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.get_curves.assert_called_once()
+
+
+class TestHistory:
+    def test_get_history(self):
+        svc = _mock_service()
+        svc.get_history.return_value = [
+            HistorySeries(
+                device_id=1,
+                key="Liquid temperature",
+                unit="°C",
+                ages=[60.0],
+                values=[30.5],
+                min=[30.0],
+                max=[31.0],
+            )
+        ]
+        payload = (
+            b'{"command":"get.history","device_id":1,"keys":["Liquid temperature"],'
+            b'"since":3600,"resolution":60}'
+        )
+        data = msgspec.json.decode(process_request(payload, svc))["data"]
+        assert data[0]["max"] == [31.0]
+        svc.get_history.assert_called_once_with(
+            1, keys=["Liquid temperature"], since=3600.0, until=0.0, resolution=60.0
+        )
+
+    def test_set_history_limits(self):
+        svc = _mock_service()
+        svc.set_history_limits.return_value = None
+        payload = b'{"command":"set.history_limits","limits":{"capacity":600}}'
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        (limits,) = svc.set_history_limits.call_args.args
+        assert (limits.capacity, limits.max_series) == (600, 256)
+
+
+class TestVirtualSensors:
+    def test_set_virtual_sensor(self):
+        svc = _mock_service()
+        svc.set_virtual_sensor.return_value = None
+        payload = (
+            b'{"command":"set.virtual_sensor","sensor":{"device_id":1,"name":"Delta",'
+            b'"unit":"\xc2\xb0C","expression":"{Liquid temperature} - {#2:CPU}",'
+            b'"ema":5}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        (sensor,) = svc.set_virtual_sensor.call_args.args
+        assert (sensor.name, sensor.ema, sensor.median) == ("Delta", 5.0, None)
+
+    def test_clear_virtual_sensor(self):
+        svc = _mock_service()
+        svc.clear_virtual_sensor.return_value = None
+        payload = b'{"command":"clear.virtual_sensor","device_id":1,"name":"Delta"}'
+        process_request(payload, svc)
+        svc.clear_virtual_sensor.assert_called_once_with(1, "Delta")
+
+
+class TestAlarms:
+    def test_set_alarm(self):
+        svc = _mock_service()
+        svc.set_alarm.return_value = None
+        payload = (
+            b'{"command":"set.alarm","rule":{"name":"Liquid hot","device_id":1,'
+            b'"key":"Liquid temperature","condition":"above","threshold":40,'
+            b'"hysteresis":2}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        (rule,) = svc.set_alarm.call_args.args
+        assert (rule.condition, rule.hysteresis, rule.debounce) == (
+            AlarmCondition.ABOVE,
+            2.0,
+            0.0,
+        )
+
+    def test_get_alarm_events(self):
+        svc = _mock_service()
+        svc.get_alarm_events.return_value = [
+            AlarmEvent(
+                seq=3,
+                name="Liquid hot",
+                device_id=1,
+                key="Liquid temperature",
+                active=True,
+                value=41.0,
+                time=1.0,
+            )
+        ]
+        payload = b'{"command":"get.alarm_events","after":2,"wait":10}'
+        data = msgspec.json.decode(process_request(payload, svc))["data"]
+        assert data[0]["seq"] == 3
+        svc.get_alarm_events.assert_called_once_with(after=2, wait=10.0)
+
+
+class TestMetrics:
+    def test_commands_are_timed(self):
+        svc = _mock_service()
+        process_request(b'{"command":"get.statuses"}', svc)
+        process_request(b"not json", svc)
+
+        (ok_call, bad_call) = svc.record_command.call_args_list
+        assert ok_call.args == ("get.statuses",)
+        assert ok_call.kwargs["ok"] is True and ok_call.kwargs["handle"] >= 0
+        assert bad_call.args == ("invalid",)
+        assert bad_call.kwargs["ok"] is False and bad_call.kwargs["handle"] is None
+
+    def test_get_metrics(self):
+        svc = _mock_service()
+        svc.get_metrics.return_value = BridgeMetrics(
+            uptime=1.0,
+            devices=[],
+            operations=[
+                OperationMetrics(
+                    device_id=1,
+                    operation="get_status",
+                    queue_wait=LatencySummary(count=1, p99=0.001),
+                    driver=LatencySummary(count=1, p99=0.02),
+                )
+            ],
+            commands=[],
+        )
+        data = msgspec.json.decode(
+            process_request(b'{"command":"get.metrics","reset":true}', svc)
+        )["data"]
+        assert data["operations"][0]["driver"]["p99"] == 0.02
+        svc.get_metrics.assert_called_once_with(reset=True)
+
+
 class TestUnknownCommand:
     def test_unknown_command_returns_error(self):
         svc = _mock_service()
@@ -99,9 +448,166 @@ class TestSetLed:
         resp = _decode(process_request(payload, svc))
         assert resp.status == MessageStatus.SUCCESS
         svc.set_color.assert_called_once_with(
-            "Kraken X63", "ring", "fixed", [(255, 0, 0), (0, 255, 0)]
+            "Kraken X63", "ring", "fixed", [(255, 0, 0), (0, 255, 0)], wait=True
         )
 
+    @pytest.mark.parametrize(
+        "fields",
+        [
+            {"colors": [[256, 0, 0]]},
+            {"colors": [[0, -1, 0]]},
+            {"palette": [[0, 0, 300]], "indices": "AA=="},
+            {"delta": [[0, 0, 0, 999]]},
+        ],
+    )
+    def test_out_of_range_color_is_rejected(self, fields):
+        svc = _mock_service()
+        frame = {"command": "set.led", "device": "Kraken", "channel": "ring"}
+        payload = json.dumps({**frame, "mode": "fixed", **fields}).encode()
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.ERROR
+        assert resp.error.startswith("Protocol Error: Expected `int` ")
+        svc.set_color.assert_not_called()
+        svc.update_color.assert_not_called()
+
+    def test_packed_rgb_frame(self):
+        svc = _mock_service()
+        rgb = base64.b64encode(bytes([255, 0, 0, 0, 255, 0])).decode()
+        payload = json.dumps(
+            {
+                "command": "set.led",
+                "device": "Kraken",
+                "channel": "ring",
+                "mode": "super-fixed",
+                "rgb": rgb,
+            }
+        ).encode()
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.set_color.assert_called_once_with(
+            "Kraken", "ring", "super-fixed", [(255, 0, 0), (0, 255, 0)], wait=True
+        )
+
+    def test_packed_rgb_length_must_be_a_multiple_of_three(self):
+        svc = _mock_service()
+        rgb = base64.b64encode(bytes([1, 2, 3, 4])).decode()
+        payload = (
+            b'{"command":"set.led","device":"Kraken","channel":"ring",'
+            b'"mode":"super-fixed","rgb":"' + rgb.encode() + b'"}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.ERROR
+        assert "multiple of 3" in resp.error
+        svc.set_color.assert_not_called()
+
+    def test_palette_frame(self):
+        svc = _mock_service()
+        indices = base64.b64encode(bytes([1, 0, 1])).decode()
+        payload = json.dumps(
+            {
+                "command": "set.led",
+                "device": "Kraken",
+                "channel": "ring",
+                "mode": "super-fixed",
+                "palette": [[0, 0, 0], [0, 0, 255]],
+                "indices": indices,
+            }
+        ).encode()
+        _decode(process_request(payload, svc))
+        assert svc.set_color.call_args.args[3] == [(0, 0, 255), (0, 0, 0), (0, 0, 255)]
+
+    def test_palette_index_out_of_range(self):
+        svc = _mock_service()
+        indices = base64.b64encode(bytes([2])).decode()
+        payload = (
+            b'{"command":"set.led","device":"Kraken","channel":"ring",'
+            b'"mode":"super-fixed","palette":[[0,0,0]],"indices":"'
+            + indices.encode()
+            + b'"}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.ERROR
+        assert "Palette index" in resp.error
+
+    def test_delta_frame(self):
+        svc = _mock_service()
+        svc.update_color.return_value = None
+        payload = (
+            b'{"command":"set.led","device":"Kraken","channel":"ring",'
+            b'"mode":"super-fixed","delta":[[3,255,255,255]],"wait":false}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        svc.update_color.assert_called_once_with(
+            "Kraken", "ring", "super-fixed", [(3, 255, 255, 255)], wait=False
+        )
+        svc.set_color.assert_not_called()
+
+    def test_set_effect(self):
+        svc = _mock_service()
+        svc.set_effect.return_value = None
+        payload = (
+            b'{"command":"set.effect","effect":{"device":"Kraken","channel":"ring",'
+            b'"kind":"rotate","leds":8,"colors":[[255,0,0],[0,0,255]],"fps":20}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        (effect,) = svc.set_effect.call_args.args
+        assert effect.kind.value == "rotate"
+        assert effect.fps == 20.0
+
+    def test_led_group(self):
+        svc = _mock_service()
+        svc.set_color_group.return_value = LedGroupResult(group=1, device_ids=[1, 2])
+        rgb = base64.b64encode(bytes([0, 0, 255])).decode()
+        payload = json.dumps(
+            {
+                "command": "set.led_group",
+                "frames": [
+                    {
+                        "device": "Kraken",
+                        "channel": "ring",
+                        "mode": "fixed",
+                        "colors": [[255, 0, 0]],
+                    },
+                    {"device": "Smart", "channel": "led1", "mode": "fixed", "rgb": rgb},
+                ],
+            }
+        ).encode()
+        data = msgspec.json.decode(process_request(payload, svc))["data"]
+        assert data["device_ids"] == [1, 2]
+        svc.set_color_group.assert_called_once_with(
+            [
+                ("Kraken", "ring", "fixed", [(255, 0, 0)]),
+                ("Smart", "led1", "fixed", [(0, 0, 255)]),
+            ],
+            wait=True,
+        )
+
+    def test_set_color_transform(self):
+        svc = _mock_service()
+        svc.set_color_transform.return_value = None
+        payload = (
+            b'{"command":"set.color_transform","device":"Kraken",'
+            b'"transform":{"brightness":0.4,"channel_order":"grb"}}'
+        )
+        resp = _decode(process_request(payload, svc))
+        assert resp.status == MessageStatus.SUCCESS
+        device, channel, transform = svc.set_color_transform.call_args.args
+        assert (device, channel) == ("Kraken", None)
+        assert (transform.brightness, transform.gamma) == (0.4, 1.0)
+        assert transform.channel_order == "grb"
+
+    def test_get_led_stats(self):
+        svc = _mock_service()
+        svc.get_led_stats.return_value = [
+            LedChannelStats(device_id=1, channel="ring", received=3, identical=1)
+        ]
+        data = msgspec.json.decode(
+            process_request(b'{"command":"get.led_stats"}', svc)
+        )["data"]
+        assert data[0]["identical"] == 1
+
     def test_null_data_returns_error(self):
         svc = _mock_service()
         resp = _decode(process_request(b'{"command":"set.led"}', svc))
@@ -215,6 +721,40 @@ class TestMain:
             server.main()
         mocks["setup_logging"].assert_called_once_with("DEBUG")
 
+    def test_export_journal_skips_devices(self, tmp_path, capsys):
+        journal = tmp_path / "sensors.journal"
+        argv = ["prog", "--export-journal", "-", "--journal", str(journal)]
+        argv += ["--start", "2026-01-01T00:00:00+00:00"]
+        with (
+            _patched_main() as mocks,
+            patch.object(sys, "argv", argv),
+            patch("liquidctl_server.server.export_csv", return_value=0) as export,
+        ):
+            server.main()
+        mocks["LiquidctlService"].assert_not_called()
+        export.assert_called_once_with(
+            str(journal), sys.stdout, 1767225600.0, None, None
+        )
+        assert "Exported 0 samples" in capsys.readouterr().err
+
+    @pytest.mark.parametrize("content", [None, b"not a journal"])
+    def test_export_journal_reports_an_unusable_journal(
+        self, tmp_path, capsys, content
+    ):
+        journal = tmp_path / "sensors.journal"
+        if content is not None:
+            journal.write_bytes(content)
+        argv = ["prog", "--export-journal", "-", "--journal", str(journal)]
+        with (
+            _patched_main() as mocks,
+            patch.object(sys, "argv", argv),
+            pytest.raises(SystemExit) as exited,
+        ):
+            server.main()
+        mocks["LiquidctlService"].assert_not_called()
+        assert str(exited.value.code).startswith("Cannot export journal: ")
+        assert "Exported" not in capsys.readouterr().err
+
     def test_keyboard_interrupt_is_handled(self):
         with _patched_main() as mocks, patch.object(sys, "argv", ["prog"]):
             mocks["run_server_loop"].side_effect = KeyboardInterrupt
@@ -1,12 +1,33 @@
 import logging
 import re
+from concurrent.futures import Future
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 from unittest.mock import MagicMock, patch
 
 import pytest
-
-from liquidctl_server.models import BadRequestException, StatusValue
-from liquidctl_server.service.liquidctl_service import LiquidctlService
+from liquidctl.error import NotSupportedByDevice
+
+from liquidctl_server.models import (
+    AlarmCondition,
+    AlarmRule,
+    BadRequestException,
+    ColorTransform,
+    DeviceStatus,
+    DeviceValues,
+    EffectKind,
+    FanCurve,
+    HistoryLimits,
+    LedEffect,
+    LiquidctlException,
+    ProfileTarget,
+    StatusSelector,
+    StatusValue,
+    VirtualSensor,
+    WritePolicy,
+    WriteStatus,
+)
+from liquidctl_server.service.journal import JournalReader
+from liquidctl_server.service.liquidctl_service import LiquidctlService, _duty_channel
 
 
 def _make_service():
@@ -14,34 +35,50 @@ def _make_service():
         return LiquidctlService()
 
 
-class TestStringifyStatus:
+@pytest.fixture
+def live_service():
+    """A service with one mocked device behind the real DeviceExecutor."""
+    svc = LiquidctlService()
+    svc._executor.set_number_of_devices(1)
+    svc.devices = {1: MagicMock(description="Kraken X63")}
+    yield svc
+    svc.shutdown()
+
+
+class TestStoreReading:
+    """Driver tuples become the cached StatusValue rows."""
+
+    def _store(self, raw_status):
+        svc = _make_service()
+        rows = svc._store_reading(1, raw_status)
+        assert svc.device_status_cache[1] is rows
+        return rows
+
     def test_none_returns_empty(self):
-        assert LiquidctlService._stringify_status(None) == []
+        assert self._store(None) == []
 
     def test_empty_list_returns_empty(self):
-        assert LiquidctlService._stringify_status([]) == []
+        assert self._store([]) == []
 
     def test_numeric_value_parsed(self):
-        result = LiquidctlService._stringify_status([("Fan speed", 1200, "rpm")])
+        result = self._store([("Fan speed", 1200, "rpm")])
         assert len(result) == 1
         assert result[0].key == "Fan speed"
         assert result[0].value == pytest.approx(1200.0)
         assert result[0].unit == "rpm"
 
     def test_float_value_parsed(self):
-        result = LiquidctlService._stringify_status(
-            [("Liquid temperature", 27.5, "°C")]
-        )
+        result = self._store([("Liquid temperature", 27.5, "°C")])
         assert result[0].value == pytest.approx(27.5)
 
     def test_string_value_becomes_none(self):
-        result = LiquidctlService._stringify_status([("Pump mode", "balanced", "")])
+        result = self._store([("Pump mode", "balanced", "")])
         assert result[0].value is None
         assert result[0].key == "Pump mode"
 
     def test_mixed_list(self):
         raw = [("Temp", 30.0, "°C"), ("Mode", "quiet", ""), ("Fan speed", 800, "rpm")]
-        result = LiquidctlService._stringify_status(raw)
+        result = self._store(raw)
         assert result[0].value == pytest.approx(30.0)
         assert result[1].value is None
         assert result[2].value == pytest.approx(800.0)
@@ -73,6 +110,233 @@ class TestBuildDeviceStatus:
         assert result.speed_channels == []
 
 
+def _status_service(status_values):
+    svc = _make_service()
+    svc.get_statuses = MagicMock(
+        return_value=[DeviceStatus(id=1, description="Kraken", status=status_values)]
+    )
+    return svc
+
+
+class TestColumnarStatuses:
+    VALUES = [
+        StatusValue(key="Liquid temperature", value=28.3, unit="°C"),
+        StatusValue(key="Pump mode", value=None, unit=""),
+    ]
+
+    def test_schema_lists_keys_and_units_in_order(self):
+        (schema,) = _status_service(self.VALUES).get_status_schema()
+        assert schema.id == 1
+        assert schema.keys == ["Liquid temperature", "Pump mode"]
+        assert schema.units == ["°C", ""]
+
+    def test_columnar_values_share_schema_id(self):
+        svc = _status_service(self.VALUES)
+        (schema,) = svc.get_status_schema()
+        (row,) = svc.get_statuses_columnar()
+        assert row.schema_id == schema.schema_id
+        assert row.values == [28.3, None]
+
+    def test_fixed_point_scales_to_integers(self):
+        (row,) = _status_service(self.VALUES).get_statuses_columnar(fixed_point=1)
+        assert row.values == [283, None]
+
+    def test_schema_id_is_stable_and_layout_sensitive(self):
+        svc = _make_service()
+        other = [StatusValue(key="Liquid temperature", value=1.0, unit="°F")]
+        assert svc._schema_id(self.VALUES) == _make_service()._schema_id(self.VALUES)
+        assert svc._schema_id(self.VALUES) != svc._schema_id(other)
+
+
+class TestCapabilities:
+    def _service(self):
+        svc = _make_service()
+        dev = MagicMock(spec=["description", "vendor_id", "product_id"])
+        dev.description = "NZXT Kraken X63"
+        dev.vendor_id = 0x1E71
+        dev.product_id = 0x2007
+        dev._color_channels = {"ring": 0b010, "logo": 0b100}
+        dev._COLOR_MODES = {"fixed": None, "super-fixed": None}
+        svc.devices = {1: dev}
+        svc.speed_channels = {1: ["pump"]}
+        return svc
+
+    def test_reports_static_metadata(self):
+        (caps,) = self._service().get_capabilities()
+        assert caps.id == 1
+        assert caps.description == "NZXT Kraken X63"
+        assert caps.vendor_id == 0x1E71
+        assert caps.speed_channels == ["pump"]
+        assert caps.color_channels == ["ring", "logo"]
+        assert caps.color_modes == ["fixed", "super-fixed"]
+        assert caps.led_count is None
+
+    def test_cached_until_inventory_changes(self):
+        svc = self._service()
+        first = svc.get_capabilities()
+        assert svc.get_capabilities() is first
+
+        with patch(
+            "liquidctl_server.service.liquidctl_service.liquidctl"
+            ".find_liquidctl_devices",
+            return_value=[],
+        ):
+            svc._find_devices()
+
+        assert svc.get_capabilities() is not first
+
+    def test_module_level_color_modes(self):
+        from liquidctl.driver.kraken3 import KrakenX3
+
+        device = KrakenX3.__new__(KrakenX3)
+        assert "super-fixed" in LiquidctlService._get_color_modes(device)
+
+    @pytest.mark.parametrize(
+        ("driver", "supported"),
+        [
+            ("liquidctl.driver.kraken3.KrakenX3", True),
+            ("liquidctl.driver.commander_pro.CommanderPro", True),
+            ("liquidctl.driver.smart_device.SmartDevice2", False),
+        ],
+    )
+    def test_speed_profile_support(self, driver, supported):
+        module_name, class_name = driver.rsplit(".", 1)
+        driver_cls = getattr(__import__(module_name, fromlist=[class_name]), class_name)
+        device = driver_cls.__new__(driver_cls)
+        assert LiquidctlService._supports_speed_profile(device) is supported
+
+    def test_kraken2_follows_firmware_flag(self):
+        device = MagicMock(supports_cooling_profiles=False)
+        assert not LiquidctlService._supports_speed_profile(device)
+
+
+class TestGetStatusesWithoutStatic:
+    def test_drops_description_and_speed_channels(self):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "NZXT Kraken X63"
+        svc.devices = {1: dev}
+        values = [StatusValue(key="Pump speed", value=2000.0, unit="rpm")]
+        svc._get_current_or_cached_device_status = MagicMock(
+            return_value=DeviceStatus(
+                id=1, description="NZXT Kraken X63", status=values
+            )
+        )
+
+        (result,) = svc.get_statuses(include_static=False)
+
+        assert result == DeviceValues(id=1, status=values)
+
+
+class TestStatusSelection:
+    TEMP = StatusValue(key="Liquid temperature", value=30.0, unit="°C")
+    PUMP = StatusValue(key="Pump speed", value=2000.0, unit="rpm")
+
+    def _service(self):
+        svc = _make_service()
+        svc.devices = {1: _device("Kraken"), 2: _device("Smart Device")}
+        svc.device_status_cache = {1: [self.TEMP, self.PUMP], 2: [self.PUMP]}
+        svc._get_current_or_cached_device_status = MagicMock(
+            side_effect=lambda device_id, dev, **_: DeviceStatus(
+                id=device_id,
+                description=dev.description,
+                status=list(svc.device_status_cache[device_id]),
+            )
+        )
+        return svc
+
+    def test_unselected_device_is_not_read(self):
+        svc = self._service()
+
+        result = svc.get_statuses(select=StatusSelector(devices=frozenset({2})))
+
+        assert [s.id for s in result] == [2]
+        svc._get_current_or_cached_device_status.assert_called_once()
+
+    def test_unit_filter_projects_values_and_skips_devices_without_match(self):
+        svc = self._service()
+
+        result = svc.get_statuses(select=StatusSelector(units=frozenset({"°C"})))
+
+        assert [(s.id, s.status) for s in result] == [(1, [self.TEMP])]
+        svc._get_current_or_cached_device_status.assert_called_once()
+
+    def test_uncached_device_is_read_before_filtering(self):
+        svc = self._service()
+        svc.device_status_cache[3] = []
+        svc.devices[3] = _device("Commander")
+        del svc.device_status_cache[2]
+        svc._get_current_or_cached_device_status.side_effect = (
+            lambda device_id, dev, **_: DeviceStatus(
+                id=device_id, description="", status=[]
+            )
+        )
+
+        svc.get_statuses(select=StatusSelector(keys=frozenset({"Pump speed"})))
+
+        read_ids = [
+            c.args[0] for c in svc._get_current_or_cached_device_status.call_args_list
+        ]
+        assert read_ids == [1, 2]
+
+
+class TestFreshnessBoundedReads:
+    CACHED = [StatusValue(key="Liquid temperature", value=30.0, unit="°C")]
+
+    def _service(self, sample_age):
+        svc = _make_service()
+        svc.devices = {1: _device("Kraken")}
+        svc._store_reading(1, [("Liquid temperature", 30.0, "°C")])
+        svc.device_status_time[1] -= sample_age
+        return svc
+
+    def test_fresh_cache_is_served_without_device_read(self):
+        svc = self._service(sample_age=0.5)
+
+        (status,) = svc.get_statuses(max_age=2.0)
+
+        svc._executor.submit.assert_not_called()
+        assert status.status == self.CACHED
+        assert status.age == pytest.approx(0.5, abs=0.1)
+
+    def test_stale_cache_is_served_while_refresh_continues(self):
+        svc = self._service(sample_age=5.0)
+        pending = Future()
+        svc._executor.submit.return_value = pending
+
+        (status,) = svc.get_statuses(max_age=2.0, timeout=0.01)
+
+        assert status.status == self.CACHED
+        assert status.age > 2.0
+        assert not pending.cancelled()
+
+    def test_refresh_in_flight_is_joined(self):
+        svc = self._service(sample_age=5.0)
+        svc._executor.submit.return_value = Future()
+
+        svc.get_statuses(max_age=2.0, timeout=0.01)
+        svc.get_statuses(max_age=2.0, timeout=0.01)
+
+        svc._executor.submit.assert_called_once()
+
+    def test_completed_refresh_is_served(self):
+        svc = self._service(sample_age=5.0)
+        fresh = [StatusValue(key="Liquid temperature", value=31.0, unit="°C")]
+
+        def run_refresh(dev_id, fn, **kwargs):
+            future = Future()
+            svc._store_reading(dev_id, [("Liquid temperature", 31.0, "°C")])
+            future.set_result(None)
+            return future
+
+        svc._executor.submit.side_effect = run_refresh
+
+        (status,) = svc.get_statuses(max_age=2.0)
+
+        assert status.status == fresh
+        assert status.age < 1.0
+
+
 class TestBuildStatusFromCache:
     def test_no_cache_returns_none(self):
         svc = _make_service()
@@ -135,6 +399,652 @@ class TestSetFixedSpeedDeduplication:
         svc._executor.submit.assert_called_once()
 
 
+class TestSetFixedSpeedAsync:
+    def test_returns_ticket_without_waiting(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        job = Future()
+        svc._executor.submit.return_value = job
+
+        ticket = svc.set_fixed_speed(1, {"channel": "pump", "duty": 60}, wait=False)
+
+        assert ticket.status == WriteStatus.QUEUED
+        assert "1_pump" not in svc.previous_duty
+
+        job.set_running_or_notify_cancel()
+        job.set_result(None)
+
+        assert svc.previous_duty["1_pump"] == 60
+        assert [r.status for r in svc.get_write_results()] == [WriteStatus.SUCCESS]
+
+    def test_same_duty_reports_unchanged(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc.previous_duty = {"1_pump": 60}
+
+        ticket = svc.set_fixed_speed(1, {"channel": "pump", "duty": 60}, wait=False)
+
+        assert ticket.status == WriteStatus.UNCHANGED
+        svc._executor.submit.assert_not_called()
+
+
+class TestSetFixedSpeeds:
+    def _service(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc._executor.submit.return_value = Future()
+        return svc
+
+    def test_one_job_for_all_changed_channels(self):
+        svc = self._service()
+        svc.previous_duty = {"1_fan1": 40}
+
+        ticket = svc.set_fixed_speeds(
+            1, {"fan1": 40, "fan2": 50, "fan3": 60}, wait=False
+        )
+
+        assert ticket.status == WriteStatus.QUEUED
+        svc._executor.submit.assert_called_once()
+        assert svc._executor.submit.call_args.kwargs["speeds"] == {
+            "fan2": 50,
+            "fan3": 60,
+        }
+
+    def test_job_writes_back_to_back_and_reports_failures(self):
+        svc = self._service()
+        lc_device = svc.devices[1]
+        lc_device.set_fixed_speed.side_effect = [None, ValueError("bad channel"), None]
+
+        with pytest.raises(LiquidctlException, match="fan2: bad channel"):
+            svc._write_fixed_speeds(1, lc_device, {"fan1": 30, "fan2": 40, "fan3": 50})
+
+        assert lc_device.set_fixed_speed.call_count == 3
+        assert svc.previous_duty == {"1_fan1": 30, "1_fan3": 50}
+
+    def test_partial_failure_keeps_the_device_queue_alive(self, live_service):
+        lc_device = live_service.devices[1]
+        lc_device.set_fixed_speed.side_effect = [None, ValueError("bad channel")]
+
+        live_service.set_fixed_speeds(1, {"fan1": 30, "fan2": 40})
+
+        lc_device.set_fixed_speed.side_effect = None
+        ticket = live_service.set_fixed_speeds(1, {"fan2": 45}, wait=False)
+        live_service._executor.submit(1, lambda: None).result(timeout=2.0)
+        assert live_service.previous_duty == {"1_fan1": 30, "1_fan2": 45}
+        (result,) = [
+            r for r in live_service.get_write_results() if r.ticket == ticket.ticket
+        ]
+        assert result.status == WriteStatus.SUCCESS
+
+    def test_nothing_to_write_reports_unchanged(self):
+        svc = self._service()
+        svc.previous_duty = {"1_fan1": 40}
+
+        ticket = svc.set_fixed_speeds(1, {"fan1": 40}, wait=False)
+
+        assert ticket.status == WriteStatus.UNCHANGED
+        svc._executor.submit.assert_not_called()
+
+
+class TestReadYourWrites:
+    def _service(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc.device_status_cache = {
+            1: [
+                StatusValue(key="Pump speed", value=2000.0, unit="rpm"),
+                StatusValue(key="Pump duty", value=50.0, unit="%"),
+                StatusValue(key="Fan 1 duty", value=30.0, unit="%"),
+            ]
+        }
+        svc._executor.submit.return_value = _make_future()
+        return svc
+
+    def test_successful_write_updates_cache_as_pending(self):
+        svc = self._service()
+
+        svc.set_fixed_speed(1, {"channel": "pump", "duty": 80})
+
+        pump_speed, pump_duty, fan_duty = svc.device_status_cache[1]
+        assert pump_duty.value == 80.0
+        assert pump_duty.pending is True
+        assert not pump_speed.pending
+        assert fan_duty.value == 30.0
+        svc._executor.submit_idle.assert_called_once()
+
+    def test_write_does_not_join_a_read_already_running(self):
+        svc = self._service()
+        running = Future()
+        running.set_running_or_notify_cancel()  # Read the device before the write
+        svc._refreshes[1] = running
+
+        svc.set_fixed_speed(1, {"channel": "pump", "duty": 80})
+
+        svc._executor.submit_idle.assert_called_once()
+        assert svc._refreshes[1] is svc._executor.submit_idle.return_value
+
+    def test_write_joins_a_read_not_started_yet(self):
+        svc = self._service()
+        queued = Future()  # Reads the device after the write
+        svc._refreshes[1] = queued
+
+        svc.set_fixed_speed(1, {"channel": "pump", "duty": 80})
+
+        svc._executor.submit_idle.assert_not_called()
+        assert svc._refreshes[1] is queued
+
+    def test_failed_write_leaves_cache(self):
+        svc = self._service()
+        svc._executor.submit.return_value.result.side_effect = RuntimeError("HID")
+
+        svc.set_fixed_speed(1, {"channel": "pump", "duty": 80})
+
+        assert svc.device_status_cache[1][1].value == 50.0
+        svc._executor.submit_idle.assert_not_called()
+
+    def test_reads_reuse_the_cached_rows(self):
+        svc = self._service()
+        reading = [("Pump speed", 2000, "rpm"), ("Pump duty", 50, "%")]
+        svc.devices[1].get_status.return_value = reading
+        svc._long_async_status_request(1)
+        first = svc.device_status_cache[1]
+
+        reading[:] = [("Pump speed", 2100, "rpm"), ("Pump duty", 55, "%")]
+        svc._long_async_status_request(1)
+
+        assert svc.device_status_cache[1] is first
+        assert [v.value for v in first] == [2100.0, 55.0]
+
+    def test_responses_do_not_share_the_cached_rows(self):
+        svc = self._service()
+        svc._store_reading(1, [("Pump speed", 2000, "rpm")])
+        status = svc._build_status_from_cache(1, svc.devices[1])
+
+        svc._store_reading(1, [("Pump speed", 2100, "rpm")])
+
+        assert status.status[0].value == 2000.0
+        assert svc.device_status_cache[1][0].value == 2100.0
+
+    def test_confirming_read_clears_pending(self):
+        svc = self._service()
+        svc.set_fixed_speed(1, {"channel": "fan1", "duty": 45})
+        assert svc.device_status_cache[1][2].pending
+
+        svc.devices[1].get_status.return_value = [("Fan 1 duty", 45, "%")]
+        svc._long_async_status_request(1)
+
+        assert svc.device_status_cache[1][0].pending is False
+
+
+class TestDutyChannel:
+    @pytest.mark.parametrize(
+        "key, channel",
+        [
+            ("Pump duty", "pump"),
+            ("Fan duty", "fan"),
+            ("Fan 2 duty", "fan2"),
+            ("Fan duty 3", "fan3"),
+            ("Pump fan duty", "pump-fan"),
+            ("Liquid temperature", None),
+        ],
+    )
+    def test_mapping(self, key, channel):
+        assert _duty_channel(key) == channel
+
+
+class TestWritePolicy:
+    def test_held_write_reports_deferred(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc._executor.submit.return_value = Future()
+        svc.set_write_policy(1, "pump", WritePolicy(min_delta=5, max_delay=60.0))
+
+        svc.set_fixed_speed(1, {"channel": "pump", "duty": 40}, wait=False)
+        ticket = svc.set_fixed_speed(1, {"channel": "pump", "duty": 42}, wait=False)
+
+        assert ticket.status == WriteStatus.DEFERRED
+        svc._executor.submit.assert_called_once()
+        (stats,) = svc.get_write_stats()
+        assert (stats.applied, stats.deferred) == (1, 1)
+        svc._write_policy.clear()
+
+    def test_policy_writes_issue_no_tickets(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        written = Future()
+        written.set_result(None)
+        svc._executor.submit.return_value = written
+        svc.set_write_policy(1, "pump", WritePolicy(min_delta=5, max_delay=60.0))
+        svc.set_fixed_speed(1, {"channel": "pump", "duty": 40}, wait=False)
+        (client_write,) = svc.get_write_results()
+        assert client_write.status == WriteStatus.SUCCESS
+
+        svc._write_curve_duty(1, "pump", 42)  # Held by the policy
+        svc._flush_held_duty(1, "pump", 42)  # Its max_delay expired
+
+        assert svc._executor.submit.call_count == 2
+        assert svc.get_write_results() == []
+        svc._write_policy.clear()
+
+    def test_unknown_device_raises(self):
+        svc = _make_service()
+        svc.devices = {}
+        with pytest.raises(BadRequestException, match="not found"):
+            svc.set_write_policy(3, None, WritePolicy())
+
+    @pytest.mark.parametrize(
+        "policy",
+        [
+            WritePolicy(max_writes_per_second=0),
+            WritePolicy(max_writes_per_second=-1.0),
+            WritePolicy(burst=0),
+            WritePolicy(min_delta=-1),
+            WritePolicy(hysteresis=-1),
+            WritePolicy(min_interval=-0.5),
+            WritePolicy(max_delay=-1.0),
+        ],
+    )
+    def test_invalid_policy_is_rejected(self, policy):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        with pytest.raises(BadRequestException):
+            svc.set_write_policy(1, None, policy)
+        assert svc._write_policy._policies == {}
+
+
+class TestFanCurves:
+    def _curve(self, **kwargs):
+        return FanCurve(
+            device_id=1,
+            channel="fan",
+            source_key="Liquid temperature",
+            points=[(30.0, 20), (50.0, 100)],
+            **kwargs,
+        )
+
+    def test_new_sample_queues_curve_duty(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc._executor.submit.return_value = Future()
+        svc._sampler = MagicMock()
+        svc.set_curve(self._curve())
+
+        svc._store_reading(1, [("Liquid temperature", 40.0, "°C")])
+
+        svc._executor.submit.assert_called_once_with(
+            1, svc.devices[1].set_fixed_speed, channel="fan", duty=60
+        )
+        svc._sampler.start.assert_called_once()
+        assert svc.get_curves()[0].duty == 60
+        svc._write_policy.clear()
+
+    def test_curve_writes_issue_no_tickets(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc._executor.submit.side_effect = lambda *args, **kwargs: Future()
+        svc._sampler = MagicMock()
+        svc.set_curve(self._curve())
+
+        for temperature in (40.0, 40.0, 45.0):
+            svc._store_reading(1, [("Liquid temperature", temperature, "°C")])
+
+        assert svc._executor.submit.call_count == 2
+        assert svc.get_write_results() == []
+        svc._write_policy.clear()
+
+    def test_unknown_source_device_raises(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        with pytest.raises(BadRequestException, match="not found"):
+            svc.set_curve(self._curve(source_device_id=2))
+
+    def test_sampler_skips_fresh_devices(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc._refresh = MagicMock()
+        svc._sample_device(1)
+        svc._store_reading(1, [])
+        svc._sample_device(1)
+        svc._refresh.assert_called_once_with(1)
+
+    def test_clear_unknown_curve_raises(self):
+        svc = _make_service()
+        with pytest.raises(BadRequestException, match="No curve"):
+            svc.clear_curve(1, "fan")
+
+
+class TestHistory:
+    def test_samples_are_recorded(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        for temperature in (30.0, 31.0):
+            svc._store_reading(1, [("Liquid temperature", temperature, "°C")])
+
+        (series,) = svc.get_history(1)
+
+        assert series.values == [30.0, 31.0]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"device_id": 2}, {"since": 10, "until": 20}, {"resolution": 0}],
+    )
+    def test_invalid_query_raises(self, kwargs):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        kwargs.setdefault("device_id", 1)
+        with pytest.raises(BadRequestException):
+            svc.get_history(**kwargs)
+
+    @pytest.mark.parametrize(
+        "limits",
+        [
+            HistoryLimits(capacity=0),
+            HistoryLimits(max_series=-1),
+            HistoryLimits(capacity=10**9),
+            HistoryLimits(max_series=10**6),
+            HistoryLimits(capacity=86_400, max_series=1024),
+        ],
+    )
+    def test_invalid_limits_raise(self, limits):
+        svc = _make_service()
+        with pytest.raises(BadRequestException):
+            svc.set_history_limits(limits)
+
+    def test_largest_allowed_limits(self):
+        svc = _make_service()
+        svc.set_history_limits(HistoryLimits(capacity=86_400, max_series=128))
+
+
+class TestVirtualSensors:
+    def _service(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        return svc
+
+    def test_sensor_is_published_and_recorded(self):
+        svc = self._service()
+        svc.set_virtual_sensor(
+            VirtualSensor(
+                device_id=1,
+                name="Liquid (F)",
+                unit="°F",
+                expression="{Liquid temperature} * 1.8 + 32",
+            )
+        )
+        stored = svc._store_reading(1, [("Liquid temperature", 30.0, "°C")])
+
+        assert stored[-1].key == "Liquid (F)"
+        assert svc._cached_value(1, "Liquid (F)") == 86.0
+        (series,) = svc.get_history(1, keys=["Liquid (F)"])
+        assert series.values == [86.0]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"device_id": 2},
+            {"expression": "{Liquid temperature} +"},
+            {"name": "Liquid temperature"},
+            {"median": 0},
+            {"slew": 0},
+        ],
+    )
+    def test_invalid_sensor_raises(self, kwargs):
+        svc = self._service()
+        svc._status_table(1).update([("Liquid temperature", 30.0, "°C")])
+        sensor = dict(
+            device_id=1, name="Virtual", unit="°C", expression="{Liquid temperature}"
+        )
+        sensor.update(kwargs)
+        with pytest.raises(BadRequestException):
+            svc.set_virtual_sensor(VirtualSensor(**sensor))
+
+    def test_clear_unknown_sensor_raises(self):
+        with pytest.raises(BadRequestException):
+            self._service().clear_virtual_sensor(1, "Virtual")
+
+
+class TestAlarms:
+    def _service(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock()}
+        svc._sampler = MagicMock()
+        return svc
+
+    def _rule(self, **kwargs):
+        return AlarmRule(
+            name="Pump stopped",
+            device_id=1,
+            key="Pump speed",
+            condition=AlarmCondition.BELOW,
+            threshold=1.0,
+            **kwargs,
+        )
+
+    def test_sample_raises_event_and_sampler_runs(self):
+        svc = self._service()
+        svc.set_alarm(self._rule())
+        svc._store_reading(1, [("Pump speed", 0.0, "rpm")])
+
+        (event,) = svc.get_alarm_events()
+        assert event.active
+        svc._sampler.start.assert_called_once()
+        assert svc._sampled_devices() == [1]
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"device_id": 2}, {"name": ""}, {"debounce": -1.0}]
+    )
+    def test_invalid_rule_raises(self, kwargs):
+        rule = dict(
+            name="Pump stopped",
+            device_id=1,
+            key="Pump speed",
+            condition=AlarmCondition.BELOW,
+            threshold=1.0,
+        )
+        rule.update(kwargs)
+        with pytest.raises(BadRequestException):
+            self._service().set_alarm(AlarmRule(**rule))
+
+    def test_clear_unknown_alarm_raises(self):
+        with pytest.raises(BadRequestException):
+            self._service().clear_alarm("Pump stopped")
+
+    def test_invalid_cursor_raises(self):
+        with pytest.raises(BadRequestException):
+            self._service().get_alarm_events(after=-1)
+
+
+class TestMetrics:
+    def test_status_timeout_and_cache_fallback_are_counted(self):
+        svc = _make_service()
+        lc_device = MagicMock()
+        svc.devices = {1: lc_device}
+        svc._executor.queue_depths.return_value = {1: (0, 0)}
+        svc._executor.device_queue_empty.return_value = False
+        svc.device_status_cache[1] = [
+            StatusValue(key="Liquid temperature", value=30.0, unit="°C")
+        ]
+        job = Future()
+        svc._executor.submit.return_value = job
+
+        svc._get_current_or_cached_device_status(1, lc_device, timeout=0.01)
+
+        (device,) = svc.get_metrics().devices
+        assert (device.timeouts, device.cache_fallbacks) == (1, 1)
+
+    def test_record_command(self):
+        svc = _make_service()
+        svc._executor.queue_depths.return_value = {}
+        svc.record_command("get.statuses", 1e-5, 0.01, 1e-4, True)
+        (command,) = svc.get_metrics().commands
+        assert (command.command, command.handle.count) == ("get.statuses", 1)
+
+
+class TestMetricsExport:
+    def test_file_export_when_configured(self, tmp_path, monkeypatch):
+        path = tmp_path / "bridge.prom"
+        monkeypatch.setenv("LIQUIDCTL_BRIDGE_METRICS_FILE", str(path))
+        svc = _make_service()
+        svc._executor.queue_depths.return_value = {}
+        svc.devices = {1: MagicMock(description="Hub")}
+        svc._store_reading(1, [("Liquid temperature", 30.0, "°C")])
+
+        svc.start_metrics_export(clients=lambda: 1)
+        svc.shutdown()
+
+        text = path.read_text(encoding="utf-8")
+        assert "liquidctl_bridge_clients 1\n" in text
+        assert 'key="Liquid temperature",unit="°C"} 30.0' in text
+        assert svc._metrics_outputs == []
+
+    def test_export_is_off_by_default(self, monkeypatch):
+        monkeypatch.delenv("LIQUIDCTL_BRIDGE_METRICS_FILE", raising=False)
+        monkeypatch.delenv("LIQUIDCTL_BRIDGE_METRICS_PORT", raising=False)
+        svc = _make_service()
+        svc.start_metrics_export(clients=lambda: 0)
+        assert svc._metrics_outputs == []
+
+
+class TestJournal:
+    def test_samples_are_journaled_when_enabled(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "sensors.journal")
+        monkeypatch.setenv("LIQUIDCTL_BRIDGE_JOURNAL", path)
+        svc = _make_service()
+        svc._store_reading(1, [("Liquid temperature", 30.0, "°C")])
+        svc.shutdown()
+
+        with JournalReader(path) as reader:
+            ((_, device_id, key, value, _),) = reader.samples()
+        assert (device_id, key, value) == (1, "Liquid temperature", 30.0)
+
+    def test_unusable_journal_is_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LIQUIDCTL_BRIDGE_JOURNAL", str(tmp_path))
+        svc = _make_service()
+        assert svc._journal is None
+
+
+class TestSpeedProfile:
+    PROFILE = [(30.0, 30), (50.0, 100)]
+
+    def _service(self, supported=True):
+        svc = _make_service()
+        svc.devices = {1: MagicMock(supports_cooling_profiles=supported)}
+        svc._sampler = MagicMock()
+        return svc
+
+    def test_firmware_profile(self):
+        svc = self._service()
+        svc.previous_duty["1_fan"] = 40
+        svc._executor.submit.return_value = _make_future()
+
+        result = svc.set_speed_profile(1, "fan", self.PROFILE)
+
+        assert result.target == ProfileTarget.FIRMWARE
+        svc._executor.submit.assert_called_once_with(
+            1, svc.devices[1].set_speed_profile, channel="fan", profile=self.PROFILE
+        )
+        assert "1_fan" not in svc.previous_duty
+        assert svc.get_curves() == []
+
+    def test_unsupported_driver_falls_back_to_curve(self):
+        svc = self._service(supported=False)
+
+        result = svc.set_speed_profile(1, "fan", self.PROFILE)
+
+        assert result.target == ProfileTarget.BRIDGE
+        svc._executor.submit.assert_not_called()
+        (state,) = svc.get_curves()
+        assert state.curve.points == self.PROFILE
+        assert state.curve.source_key == "Liquid temperature"
+
+    def test_device_rejection_falls_back_to_curve(self):
+        svc = self._service()
+        svc._executor.submit.return_value.result.side_effect = NotSupportedByDevice()
+
+        result = svc.set_speed_profile(1, "fan", self.PROFILE)
+
+        assert result.target == ProfileTarget.BRIDGE
+        assert len(svc.get_curves()) == 1
+        svc._executor.submit.reset_mock()
+        svc.set_speed_profile(1, "fan", self.PROFILE)
+        svc._executor.submit.assert_not_called()
+
+    def test_driver_error_is_reported_with_device_and_channel(self):
+        svc = self._service()
+        svc._executor.submit.return_value.result.side_effect = OSError("USB write")
+
+        with pytest.raises(LiquidctlException, match=r"fan .*#1: USB write"):
+            svc.set_speed_profile(1, "fan", self.PROFILE)
+
+        assert svc.get_curves() == []
+        assert 1 not in svc._profile_rejected
+
+    def test_rejection_keeps_the_device_queue_alive(self, live_service):
+        lc_device = live_service.devices[1]
+        lc_device.supports_cooling_profiles = True
+        lc_device.set_speed_profile.side_effect = NotSupportedByDevice()
+        lc_device.get_status.return_value = [("Liquid temperature", 40.0, "°C")]
+
+        result = live_service.set_speed_profile(1, "fan", self.PROFILE)
+
+        assert result.target == ProfileTarget.BRIDGE
+        (status,) = live_service.get_statuses()
+        assert status.status[0].value == 40.0
+        live_service.set_fixed_speed(1, {"channel": "fan", "duty": 50})
+        lc_device.set_fixed_speed.assert_called_with(channel="fan", duty=50)
+
+
+class TestEffects:
+    def _service(self):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "Kraken X63"
+        svc.devices = {1: dev}
+        svc._animations = MagicMock()
+        svc._sampler = MagicMock()
+        return svc
+
+    def test_temperature_effect_starts_sampling(self):
+        svc = self._service()
+        effect = LedEffect(
+            device="Kraken",
+            channel="ring",
+            kind=EffectKind.TEMPERATURE,
+            leds=8,
+            colors=[(0, 0, 255), (255, 0, 0)],
+        )
+
+        svc.set_effect(effect)
+
+        svc._animations.set_effect.assert_called_once_with(1, effect)
+        svc._sampler.start.assert_called_once()
+
+    @pytest.mark.parametrize(
+        ("kwargs", "message"),
+        [
+            ({"kind": EffectKind.ROTATE}, "needs colors"),
+            (
+                {"kind": EffectKind.KEYFRAMES, "keyframes": [[(1, 2, 3)] * 2]},
+                "Keyframes",
+            ),
+            ({"kind": EffectKind.ROTATE, "colors": [(1, 2, 3)], "fps": 0}, "fps > 0"),
+        ],
+    )
+    def test_invalid_effect_raises(self, kwargs, message):
+        svc = self._service()
+        effect = LedEffect(device="Kraken", channel="ring", leds=8, **kwargs)
+        with pytest.raises(BadRequestException, match=message):
+            svc.set_effect(effect)
+
+    def test_cached_value(self):
+        svc = self._service()
+        svc.device_status_cache = {
+            1: [StatusValue(key="Liquid temperature", value=31.0, unit="°C")]
+        }
+        assert svc._cached_value(1, "Liquid temperature") == 31.0
+        assert svc._cached_value(1, "Fan speed") is None
+
+
 def _make_future(return_value=None):
     mock = MagicMock()
     mock.result.return_value = return_value
@@ -172,6 +1082,26 @@ class TestResolveDeviceId:
         svc.devices = {}
         assert svc._resolve_device_id("unknown") is None
 
+    def test_selector(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock(description="Kraken"), 2: MagicMock()}
+        assert svc._resolve_device_id("id:2") == 2
+
+    def test_index_rebuilt_when_inventory_changes(self):
+        svc = _make_service()
+        svc.devices = {1: MagicMock(description="NZXT Kraken X63")}
+        assert svc._resolve_device_id("smart") is None
+
+        with patch(
+            "liquidctl_server.service.liquidctl_service.liquidctl"
+            ".find_liquidctl_devices",
+            return_value=[],
+        ):
+            svc._find_devices()
+        svc.devices[2] = MagicMock(description="NZXT Smart Device V2")
+
+        assert svc._resolve_device_id("smart") == 2
+
 
 class TestSetColor:
     def test_success_calls_executor(self):
@@ -185,12 +1115,106 @@ class TestSetColor:
 
         svc._executor.submit.assert_called_once()
 
+    def test_identical_frame_reports_unchanged(self):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "Kraken X63"
+        svc.devices = {1: dev}
+        svc._executor.submit.return_value = Future()
+
+        svc.set_color("Kraken", "ring", "fixed", [(255, 0, 0)], wait=False)
+        ticket = svc.set_color("Kraken", "ring", "fixed", [(255, 0, 0)], wait=False)
+
+        assert ticket.status == WriteStatus.UNCHANGED
+        svc._executor.submit.assert_called_once()
+        assert svc.get_led_stats()[0].identical == 1
+
+    def test_superseded_frame_returns_quietly(self):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "Kraken X63"
+        svc.devices = {1: dev}
+        cancelled = Future()
+        cancelled.cancel()
+        svc._executor.submit.return_value = cancelled
+
+        assert svc.set_color("Kraken", "ring", "fixed", [(255, 0, 0)]) is None
+
+    def test_client_frame_stops_effect(self):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "Kraken X63"
+        svc.devices = {1: dev}
+        svc._animations = MagicMock()
+        svc._executor.submit.return_value = Future()
+
+        svc.set_color("Kraken", "ring", "fixed", [(255, 0, 0)], wait=False)
+
+        svc._animations.clear_effect.assert_called_once_with(1, "ring")
+
+    def test_group_queues_one_job_per_device(self):
+        svc = _make_service()
+        kraken, hub = MagicMock(), MagicMock()
+        kraken.description = "Kraken X63"
+        hub.description = "Smart Device V2"
+        svc.devices = {1: kraken, 2: hub}
+        svc._executor.submit.side_effect = lambda *args, **kwargs: Future()
+
+        result = svc.set_color_group(
+            [
+                ("Kraken", "ring", "super-fixed", [(255, 0, 0)]),
+                ("Smart", "led1", "super-fixed", [(0, 255, 0)]),
+                ("Smart", "led2", "super-fixed", [(0, 0, 255)]),
+            ],
+            wait=False,
+        )
+
+        assert result.device_ids == [1, 2]
+        assert not result.done
+        assert svc._executor.submit.call_count == 2
+        hub_frames = svc._executor.submit.call_args_list[1].kwargs["frames"]
+        assert [state.channel for state, _ in hub_frames] == ["led1", "led2"]
+
     def test_unknown_device_raises(self):
         svc = _make_service()
         svc.devices = {}
         with pytest.raises(BadRequestException, match="No device matching"):
             svc.set_color("NonExistent", "ring", "fixed", [(255, 0, 0)])
 
+    def test_color_transform_applies_to_frames_and_deltas(self):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "Kraken X63"
+        svc.devices = {1: dev}
+        svc._executor.submit.return_value = Future()
+        svc.set_color_transform(
+            "Kraken", "ring", ColorTransform(brightness=0.5, channel_order="grb")
+        )
+
+        svc.set_color("Kraken", "ring", "fixed", [(255, 0, 0)], wait=False)
+        svc.update_color("Kraken", "ring", "fixed", [(0, 0, 0, 128)], wait=False)
+
+        frames = [c.kwargs["frame"] for c in svc._executor.submit.call_args_list]
+        assert frames == [("fixed", [(0, 128, 0)]), ("fixed", [(0, 0, 64)])]
+
+    @pytest.mark.parametrize(
+        "transform",
+        [
+            ColorTransform(brightness=1.5),
+            ColorTransform(gamma=0),
+            ColorTransform(temperature=100),
+            ColorTransform(channel_order="rrb"),
+        ],
+    )
+    def test_invalid_color_transform_raises(self, transform):
+        svc = _make_service()
+        dev = MagicMock()
+        dev.description = "Kraken X63"
+        svc.devices = {1: dev}
+        with pytest.raises(BadRequestException):
+            svc.set_color_transform("Kraken", None, transform)
+        assert svc.get_color_transforms() == []
+
     def test_timeout_is_swallowed(self):
         svc = _make_service()
         dev = MagicMock()
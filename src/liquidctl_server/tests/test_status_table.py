@@ -0,0 +1,75 @@
+import sys
+
+import pytest
+
+from liquidctl_server.models import StatusValue
+from liquidctl_server.service.status_table import StatusTable
+
+READING = [("Liquid temperature", 30.5, "°C"), ("Pump speed", 2000, "rpm")]
+
+
+class TestStatusTable:
+    def test_first_read_builds_rows(self):
+        rows = StatusTable().update(READING)
+        assert [(r.key, r.value, r.unit) for r in rows] == [
+            ("Liquid temperature", 30.5, "°C"),
+            ("Pump speed", 2000.0, "rpm"),
+        ]
+
+    def test_same_layout_updates_rows_in_place(self):
+        table = StatusTable()
+        first = table.update(READING)
+        temperature = first[0]
+
+        rows = table.update(
+            [("Liquid temperature", 31.0, "°C"), ("Pump speed", 1990, "rpm")]
+        )
+
+        assert rows is first
+        assert rows[0] is temperature
+        assert temperature.value == pytest.approx(31.0)
+        assert rows[1].value == pytest.approx(1990.0)
+
+    @pytest.mark.parametrize(
+        "reading",
+        [
+            READING[:1],
+            [("Liquid temperature", 30.5, "°C"), ("Pump duty", 60, "%")],
+            [("Liquid temperature", 30.5, "°F"), ("Pump speed", 2000, "rpm")],
+        ],
+    )
+    def test_layout_change_rebuilds(self, reading):
+        table = StatusTable()
+        first = table.update(READING)
+        rows = table.update(reading)
+        assert rows is not first
+        assert [(r.key, r.unit) for r in rows] == [(k, u) for k, _, u in reading]
+
+    def test_keys_and_units_are_interned(self):
+        number = 1
+        key = f"Fan {number} speed"  # Built at runtime, so not interned
+        (row,) = StatusTable().update([(key, 900, "rpm")])
+        assert row.key is sys.intern("Fan 1 speed")
+
+    def test_non_numeric_value_is_none(self):
+        table = StatusTable()
+        table.update([("Firmware", "2.1", ""), ("Mode", "quiet", "")])
+        rows = table.update([("Firmware", "2.1", ""), ("Mode", "extreme", "")])
+        assert rows[0].value == pytest.approx(2.1)
+        assert rows[1].value is None
+
+    def test_none_reading_is_empty(self):
+        assert StatusTable().update(None) == []
+
+    def test_snapshot_is_detached_from_later_reads(self):
+        table = StatusTable()
+        rows = table.update(READING)
+        snapshot = table.snapshot(rows)
+
+        table.update([("Liquid temperature", 35.0, "°C"), ("Pump speed", 2100, "rpm")])
+
+        assert snapshot == [
+            StatusValue(key="Liquid temperature", value=30.5, unit="°C"),
+            StatusValue(key="Pump speed", value=2000.0, unit="rpm"),
+        ]
+        assert snapshot[0] is not rows[0]
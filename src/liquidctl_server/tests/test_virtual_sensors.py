@@ -0,0 +1,147 @@
+import pytest
+
+from liquidctl_server.models import StatusValue, VirtualSensor
+from liquidctl_server.service.virtual_sensors import (
+    VirtualSensorEngine,
+    compile_expression,
+)
+
+
+def _rows(liquid=30.0, pump=2000.0):
+    return [
+        StatusValue(key="Liquid temperature", value=liquid, unit="°C"),
+        StatusValue(key="Pump speed", value=pump, unit="rpm"),
+    ]
+
+
+def _sensor(expression="{Liquid temperature}", name="Virtual", **kwargs):
+    return VirtualSensor(
+        device_id=1, name=name, unit="°C", expression=expression, **kwargs
+    )
+
+
+def _engine(*sensors, other=None):
+    engine = VirtualSensorEngine(
+        read_value=lambda device_id, key: (other or {}).get((device_id, key))
+    )
+    for sensor in sensors:
+        engine.set_sensor(sensor)
+    return engine
+
+
+def _value(published, key="Virtual"):
+    return next(row.value for row in published if row.key == key)
+
+
+class TestCompileExpression:
+    def test_arithmetic_and_functions(self):
+        function, references = compile_expression(
+            "max({a}, {#2:b}) - avg({a}, 2) / 4 + abs(-1)"
+        )
+        assert references == [(None, "a"), (2, "b"), (None, "a")]
+        assert function(10.0, 20.0, 10.0) == 20.0 - 1.5 + 1
+
+    @pytest.mark.parametrize(
+        "expression",
+        [
+            "30",
+            "{a} +",
+            "{a}.__class__",
+            "__import__('os')",
+            "{a} ** 2",
+            "'x' + {a}",
+            "min({a}, key=abs)",
+            "[{a}]",
+            "{a} if {a} else 0",
+        ],
+    )
+    def test_rejects_anything_else(self, expression):
+        with pytest.raises(ValueError):
+            compile_expression(expression)
+
+
+class TestVirtualSensorEngine:
+    def test_sensor_is_appended_to_the_rows(self):
+        engine = _engine(_sensor("{Liquid temperature} * 2", scale=0.5, offset=1.0))
+        published = engine.apply(1, _rows(liquid=30.0), 0.0)
+
+        assert [row.key for row in published] == [
+            "Liquid temperature",
+            "Pump speed",
+            "Virtual",
+        ]
+        assert published[-1].unit == "°C"
+        assert _value(published) == 31.0
+
+    def test_other_devices_and_earlier_sensors(self):
+        engine = _engine(
+            _sensor("{Liquid temperature} - {#2:CPU}", name="Delta"),
+            _sensor("{Delta} * 10", name="Scaled"),
+            other={(2, "CPU"): 25.0},
+        )
+        published = engine.apply(1, _rows(liquid=30.0), 0.0)
+        assert _value(published, "Delta") == 5.0
+        assert _value(published, "Scaled") == 50.0
+
+    def test_missing_input_or_division_by_zero_publish_none(self):
+        engine = _engine(
+            _sensor("{Pump speed} / {Liquid temperature}", name="Ratio"),
+            _sensor("{#3:Missing}", name="Other"),
+        )
+        published = engine.apply(1, _rows(liquid=0.0), 0.0)
+        assert _value(published, "Ratio") is None
+        assert _value(published, "Other") is None
+
+    def test_same_rows_publish_the_same_list(self):
+        engine = _engine(_sensor())
+        rows = _rows()
+        first = engine.apply(1, rows, 0.0)
+        rows[0].value = 40.0
+        second = engine.apply(1, rows, 1.0)
+
+        assert second is first
+        assert _value(second) == 40.0
+
+    def test_devices_without_sensors_pass_through(self):
+        rows = _rows()
+        assert _engine(_sensor()).apply(2, rows, 0.0) is rows
+
+    def test_median_rejects_spikes(self):
+        engine = _engine(_sensor(median=3))
+        results = [
+            _value(engine.apply(1, _rows(liquid=liquid), float(n)))
+            for n, liquid in enumerate([30.0, 30.0, 90.0, 31.0, 31.0])
+        ]
+        assert results == [30.0, 30.0, 30.0, 31.0, 31.0]
+
+    def test_ema_follows_the_time_constant(self):
+        engine = _engine(_sensor(ema=1.0))
+        engine.apply(1, _rows(liquid=30.0), 0.0)
+        assert _value(engine.apply(1, _rows(liquid=40.0), 1.0)) == 35.0
+
+    def test_slew_limits_change_per_second(self):
+        engine = _engine(_sensor(slew=2.0))
+        engine.apply(1, _rows(liquid=30.0), 0.0)
+        assert _value(engine.apply(1, _rows(liquid=40.0), 1.5)) == 33.0
+        assert _value(engine.apply(1, _rows(liquid=20.0), 2.0)) == 32.0
+
+    def test_missing_reading_keeps_filter_state(self):
+        engine = _engine(_sensor(ema=1.0))
+        engine.apply(1, _rows(liquid=30.0), 0.0)
+        assert _value(engine.apply(1, _rows(liquid=None), 1.0)) is None
+        assert _value(engine.apply(1, _rows(liquid=40.0), 1.0)) == 35.0
+
+    def test_self_reference_is_rejected(self):
+        with pytest.raises(ValueError):
+            _engine(_sensor("{Virtual} + 1"))
+
+    def test_clear_and_state(self):
+        engine = _engine(_sensor())
+        engine.apply(1, _rows(liquid=30.0), 0.0)
+        (state,) = engine.sensors()
+        assert (state.value, state.evaluations) == (30.0, 1)
+
+        assert engine.clear_sensor(1, "Virtual")
+        assert not engine.clear_sensor(1, "Virtual")
+        rows = _rows()
+        assert engine.apply(1, rows, 1.0) is rows
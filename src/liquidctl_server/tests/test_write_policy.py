@@ -0,0 +1,107 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from liquidctl_server.models import WritePolicy
+from liquidctl_server.service.write_policy import WritePolicyEngine, _TokenBucket
+
+_MONOTONIC = "liquidctl_server.service.write_policy.time.monotonic"
+
+
+def _engine(policy=None, channel="pump"):
+    engine = WritePolicyEngine(flush=MagicMock())
+    if policy is not None:
+        engine.set_policy(1, channel, policy)
+    return engine
+
+
+def _admit_at(engine, now, duty, channel="pump"):
+    with patch(_MONOTONIC, return_value=now):
+        return engine.admit(1, channel, duty)
+
+
+class TestAdmit:
+    def test_default_policy_admits_every_change(self):
+        engine = _engine()
+        assert all(_admit_at(engine, t, duty) for t, duty in enumerate([40, 41, 42]))
+        engine.clear()
+
+    def test_small_change_is_held(self):
+        engine = _engine(WritePolicy(min_delta=3))
+        assert _admit_at(engine, 0.0, 40)
+        assert not _admit_at(engine, 1.0, 41)
+        assert _admit_at(engine, 2.0, 45)
+        (stats,) = engine.stats()
+        assert (stats.applied, stats.deferred) == (2, 1)
+        engine.clear()
+
+    def test_reversal_needs_hysteresis_on_top_of_delta(self):
+        engine = _engine(WritePolicy(min_delta=2, hysteresis=3))
+        assert _admit_at(engine, 0.0, 40)
+        assert _admit_at(engine, 1.0, 43)  # rising
+        assert not _admit_at(engine, 2.0, 40)  # falling by 3 < 2 + 3
+        assert _admit_at(engine, 3.0, 38)  # falling by 5
+        engine.clear()
+
+    def test_min_interval_holds_fast_writes(self):
+        engine = _engine(WritePolicy(min_interval=1.0))
+        assert _admit_at(engine, 0.0, 40)
+        assert not _admit_at(engine, 0.5, 60)
+        assert _admit_at(engine, 1.5, 70)
+        engine.clear()
+
+    def test_channel_without_policy_uses_device_default(self):
+        engine = WritePolicyEngine(flush=MagicMock())
+        engine.set_policy(1, None, WritePolicy(min_delta=5))
+        assert _admit_at(engine, 0.0, 40, channel="fan1")
+        assert not _admit_at(engine, 1.0, 42, channel="fan1")
+        engine.clear()
+
+    def test_token_bucket_limits_device_writes(self):
+        engine = WritePolicyEngine(flush=MagicMock())
+        engine.set_policy(1, None, WritePolicy(max_writes_per_second=1.0, burst=2))
+        assert _admit_at(engine, 0.0, 10, channel="fan1")
+        assert _admit_at(engine, 0.0, 10, channel="fan2")
+        assert not _admit_at(engine, 0.0, 10, channel="fan3")
+        assert _admit_at(engine, 1.0, 20, channel="fan3")
+        engine.clear()
+
+
+class TestFlush:
+    def test_held_value_is_flushed_within_max_delay(self):
+        flushed = threading.Event()
+        calls = []
+
+        def flush(device_id, channel, duty):
+            calls.append((device_id, channel, duty))
+            flushed.set()
+
+        engine = WritePolicyEngine(flush=flush)
+        engine.set_policy(1, "pump", WritePolicy(min_delta=5, max_delay=0.05))
+        assert engine.admit(1, "pump", 40)
+        assert not engine.admit(1, "pump", 41)
+        assert not engine.admit(1, "pump", 42)
+
+        assert flushed.wait(timeout=2.0)
+        assert calls == [(1, "pump", 42)]
+        (stats,) = engine.stats()
+        assert (stats.applied, stats.deferred, stats.flushed) == (2, 2, 1)
+
+    def test_release_drops_held_value(self):
+        engine = _engine(WritePolicy(min_delta=5, max_delay=0.05))
+        engine.admit(1, "pump", 40)
+        engine.admit(1, "pump", 41)
+
+        engine.release(1, "pump")
+
+        threading.Event().wait(0.1)
+        engine._flush.assert_not_called()
+
+
+class TestTokenBucket:
+    def test_forced_write_goes_into_debt(self):
+        bucket = _TokenBucket(rate=1.0, burst=1, now=0.0)
+        assert bucket.take(0.0)
+        bucket.force(0.0)
+        assert bucket.wait_time(0.0) == 2.0
+        assert not bucket.take(1.5)
+        assert bucket.take(2.0)
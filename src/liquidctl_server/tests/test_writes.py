@@ -0,0 +1,128 @@
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+from liquidctl_server.models import WriteStatus
+from liquidctl_server.service.executor import DeviceExecutor
+from liquidctl_server.service.writes import WriteTracker
+
+
+def _statuses(tracker):
+    return {r.ticket: r.status for r in tracker.results()}
+
+
+class TestTrack:
+    def test_queued_ticket_is_listed_as_pending(self):
+        tracker = WriteTracker(timeout=5.0)
+        result = tracker.track(1, "set.fixed_speed", "1_pump", Future())
+        assert result.status == WriteStatus.QUEUED
+        assert _statuses(tracker) == {result.ticket: WriteStatus.QUEUED}
+
+    def test_success_runs_callback_and_is_drained_once(self):
+        tracker = WriteTracker(timeout=5.0)
+        future, on_success = Future(), MagicMock()
+        result = tracker.track(1, "set.fixed_speed", "1_pump", future, on_success)
+
+        future.set_running_or_notify_cancel()
+        future.set_result(None)
+
+        on_success.assert_called_once()
+        (finished,) = tracker.results()
+        assert finished.ticket == result.ticket
+        assert finished.status == WriteStatus.SUCCESS
+        assert finished.latency is not None
+        assert tracker.results() == []
+
+    def test_error_is_reported_with_message(self):
+        tracker = WriteTracker(timeout=5.0)
+        future = Future()
+        tracker.track(1, "set.led", "1_ring_led", future)
+
+        future.set_running_or_notify_cancel()
+        future.set_exception(RuntimeError("HID write failed"))
+
+        (finished,) = tracker.results()
+        assert finished.status == WriteStatus.ERROR
+        assert finished.error == "HID write failed"
+
+    def test_failed_write_does_not_stall_later_tickets(self):
+        tracker = WriteTracker(timeout=5.0)
+        executor = DeviceExecutor()
+        executor.set_number_of_devices(1)
+        write = MagicMock(side_effect=[RuntimeError("HID write failed"), None])
+        try:
+            failed = tracker.track(
+                1, "set.fixed_speed", "1_pump", executor.submit(1, write)
+            )
+            second = tracker.track(
+                1, "set.fixed_speed", "1_fan", executor.submit(1, write)
+            )
+        finally:
+            executor.shutdown()  # Joins the worker, so both tickets are done
+
+        assert _statuses(tracker) == {
+            failed.ticket: WriteStatus.ERROR,
+            second.ticket: WriteStatus.SUCCESS,
+        }
+
+    def test_newer_write_supersedes_unstarted_one(self):
+        tracker = WriteTracker(timeout=5.0)
+        older, newer = Future(), Future()
+        first = tracker.track(1, "set.fixed_speed", "1_pump", older)
+        second = tracker.track(1, "set.fixed_speed", "1_pump", newer)
+
+        assert older.cancelled()
+        assert _statuses(tracker) == {
+            first.ticket: WriteStatus.SUPERSEDED,
+            second.ticket: WriteStatus.QUEUED,
+        }
+
+    def test_running_write_is_not_superseded(self):
+        tracker = WriteTracker(timeout=5.0)
+        running = Future()
+        running.set_running_or_notify_cancel()
+        tracker.track(1, "set.fixed_speed", "1_pump", running)
+        tracker.track(1, "set.fixed_speed", "1_pump", Future())
+        assert not running.cancelled()
+
+    def test_overdue_write_reports_timeout(self):
+        tracker = WriteTracker(timeout=5.0)
+        with patch("liquidctl_server.service.writes.time.monotonic", return_value=0.0):
+            result = tracker.track(1, "set.fixed_speed", "1_pump", Future())
+        with patch("liquidctl_server.service.writes.time.monotonic", return_value=10.0):
+            (finished,) = tracker.results()
+        assert finished.ticket == result.ticket
+        assert finished.status == WriteStatus.TIMEOUT
+
+
+class TestTrackInternal:
+    def test_supersedes_and_is_superseded_without_a_ticket(self):
+        tracker = WriteTracker(timeout=5.0)
+        client, internal, newer = Future(), Future(), Future()
+        ticket = tracker.track(1, "set.fixed_speed", "1_pump", client)
+
+        tracker.track_internal("1_pump", internal)
+        assert client.cancelled()
+        tracker.track_internal("1_pump", newer)
+        assert internal.cancelled()
+
+        assert _statuses(tracker) == {ticket.ticket: WriteStatus.SUPERSEDED}
+
+    def test_success_runs_callback_and_reports_nothing(self):
+        tracker = WriteTracker(timeout=5.0)
+        future, on_success = Future(), MagicMock()
+        tracker.track_internal("1_pump", future, on_success)
+
+        future.set_running_or_notify_cancel()
+        future.set_result(None)
+
+        on_success.assert_called_once()
+        assert tracker.results() == []
+        assert tracker._latest == {}
+
+
+class TestSettled:
+    def test_reported_as_finished(self):
+        tracker = WriteTracker(timeout=5.0)
+        result = tracker.settled(1, "set.fixed_speed", WriteStatus.UNCHANGED)
+        assert result.status == WriteStatus.UNCHANGED
+        assert tracker.results() == [result]